@@ -1,9 +1,49 @@
 # 程序配置常量
 LOG_FILE_PATH = "logs/app.log"
+LOG_JSONL_FILE_PATH = "logs/app.jsonl"  # 结构化日志（JSON Lines），[log] jsonl = true 时输出
+LOG_MAX_BYTES = 5 * 1024 * 1024  # 单个日志文件的最大大小
+LOG_ROTATION = 'size'  # 轮转方式：size 保留 5 个备份 / compress 后台压缩归档并按总大小和天数清理
+LOG_COMPRESSION = 'gzip'  # compress 轮转的压缩格式：gzip / zstd（需安装 zstandard）/ none
+LOG_RETENTION_MB = 500  # compress 轮转时归档的总大小上限（MB），0 为不限制
+LOG_RETENTION_DAYS = 30  # compress 轮转时归档的保留天数，0 为不限制
+STARTUP_TRACE_FILE = "logs/startup_trace.json"  # 启动耗时追踪文件（Chrome trace-event 格式）
+LOG_MAX_LINES = 100000  # 日志面板保留的最大行数
+LOG_BATCH_SIZE = 5000  # 日志面板每次刷新最多显示的行数，其余留到下一次
+LOG_REFRESH_INTERVAL = 100  # 日志面板刷新间隔（毫秒）
+LOG_QUEUE_SIZE = 10000  # 日志队列容量，0 为不限制
+LOG_QUEUE_OVERFLOW = 'block'  # 日志队列满时的策略：block 等待 / drop-oldest 丢弃最早 / drop-debug 丢弃 DEBUG
+LOG_INDEX_DIR = "logs/.index"  # 日志全文索引目录
+LOG_SEARCH_LIMIT = 1000  # 日志搜索最多返回的条数
+LOG_INDEX_COMPACT_BATCHES = 64  # 日志索引增量写入多少次后整理（每个词的偏移连续存放）
+LOG_STATS_DIR = "logs/.stats"  # 日志统计的解析缓存目录
+LOG_DEDUP = True  # 合并同一 logger 连续重复的日志
+LOG_RATE_LIMIT = 50  # 每个 logger 每秒允许的日志数，0 为不限速
+LOG_RATE_BURST = 200  # 限速令牌桶容量，允许短时间突发
+LOG_REPORT_INTERVAL = 60  # 汇报重复和限速丢弃条数的间隔（秒）
 
 # 插件更新下载缓存目录
 PLUGIN_UPDATE_CACHE_DIR = "cache"  # 插件更新下载缓存目录
 PLUGIN_DIR = "plugins"  # 插件目录
+PLUGIN_INDEX_FILE = "cache/plugin_index.json"  # 插件清单索引缓存
+PLUGIN_LOADER_WORKERS = 4  # 后台加载插件的线程数
+PLUGIN_IDLE_MINUTES = 10  # 标签页模式下插件多久未查看后卸载，0 为不卸载
+TASK_SCHEDULER_WORKERS = 4  # 任务调度器的最大并发线程数
+COALESCE_INTERVAL = 16  # 信号合并器刷新间隔（毫秒），约每帧一次
+ASYNC_POLL_INTERVAL = 10  # 不支持 QtSelector 的 asyncio 事件循环（如 ProactorEventLoop）的轮询间隔（毫秒）
+PROCESS_POOL_WORKERS = None  # 共享进程池大小，None 为 CPU 核心数
+HTTP_POOL_HOSTS = 10  # 共享 HTTP 会话缓存连接池的主机数
+HTTP_POOL_PER_HOST = 4  # 每个主机最多同时使用的连接数，超出时等待
+HTTP_CACHE_DIR = "cache/http"  # 插件更新信息等 HTTP 元数据缓存目录
+HTTP_CACHE_TTL = 60  # 缓存多少秒内直接使用，不请求服务器；之后用 ETag / Last-Modified 向服务器确认
+HTTP_CACHE_OFFLINE_TTL = 7 * 24 * 3600  # 无法连接服务器时，多少秒内的缓存仍可使用
+HTTP_CACHE_MAX_MB = 20  # 缓存总大小上限（MB），超出时删除最久未使用的
+UPDATE_CHECK_WORKERS = 8  # 同时检查插件更新的线程数
+UPDATE_CHECK_TIMEOUT = 5  # 检查插件更新的超时（秒）
+PROCESS_CANCEL_GRACE = 3  # 进程任务取消后等待退出的秒数，超时强制结束
+CONFIG_BACKEND = 'ini'  # 配置存储：ini / sqlite（首次使用时从 config.ini 导入）
+CONFIG_DB_FILE = "utils/config.db"  # sqlite 配置库，存在时总是使用
+CONFIG_PROFILE_DIR = "profiles"  # 配置方案目录，每个方案一个 JSON 文件
+CONFIG_AUTOSAVE_DELAY = 1.0  # 配置修改后多久自动写入文件（秒），期间的修改合并为一次写入
 
 
 class WindowConstants:
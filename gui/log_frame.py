@@ -1,46 +1,126 @@
-from queue import Queue
+from collections import deque
+
+from PySide2.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+from PySide2.QtGui import QFont, QKeySequence
+from PySide2.QtWidgets import QApplication, QListView, QVBoxLayout, QWidget
+
+from constants.config import LOG_BATCH_SIZE, LOG_MAX_LINES, LOG_REFRESH_INTERVAL
+
+
+class LogModel(QAbstractListModel):
+    """环形缓冲区日志模型，超出容量时丢弃最早的行"""
+    def __init__(self, capacity=LOG_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self._lines = [None] * capacity
+        self._start = 0
+        self._count = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self._lines[(self._start + index.row()) % self.capacity]
+        return None
+
+    def line(self, row):
+        return self._lines[(self._start + row) % self.capacity]
+
+    def lines(self):
+        """按顺序返回全部行"""
+        return [self.line(row) for row in range(self._count)]
+
+    def append_lines(self, lines):
+        """追加一批日志
+        Returns:
+            int: 因超出容量被丢弃的旧行数
+        """
+        if not lines:
+            return 0
+        if len(lines) > self.capacity:
+            lines = lines[-self.capacity:]
+        overflow = max(0, self._count + len(lines) - self.capacity)
+        if overflow:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            self._start = (self._start + overflow) % self.capacity
+            self._count -= overflow
+            self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), self._count, self._count + len(lines) - 1)
+        for line in lines:
+            self._lines[(self._start + self._count) % self.capacity] = line
+            self._count += 1
+        self.endInsertRows()
+        return overflow
+
+    def clear(self):
+        self.beginResetModel()
+        self._lines = [None] * self.capacity
+        self._start = 0
+        self._count = 0
+        self.endResetModel()
 
-from PySide2.QtCore import QTimer
-from PySide2.QtWidgets import QPlainTextEdit, QVBoxLayout, QWidget
-from utils.logger_manager import logger_manager
 
 class LogFrame(QWidget):
     def __init__(self):
         super().__init__()
-        self.max_lines = 100
+        self.max_lines = LOG_MAX_LINES
         self.create_widgets()
 
     def create_widgets(self):
         layout = QVBoxLayout(self)
-        
-        self.log_text = QPlainTextEdit()
-        self.log_text.setReadOnly(True)
-        self.log_text.setStyleSheet("background-color: black; color: green;")
-        # self.log_text.setMinimumHeight(300)  # 设置最小高度为100像素
-        layout.addWidget(self.log_text)
-        
-        self.queue = Queue()
+
+        # 只绘制可见行，十万行历史也能流畅滚动
+        self.model = LogModel(self.max_lines, self)
+        self.log_view = QListView()
+        self.log_view.setModel(self.model)
+        self.log_view.setUniformItemSizes(True)
+        self.log_view.setSelectionMode(QListView.ExtendedSelection)
+        self.log_view.setVerticalScrollMode(QListView.ScrollPerItem)
+        self.log_view.setFont(QFont("Consolas"))
+        self.log_view.setStyleSheet("background-color: black; color: green;")
+        self.log_view.installEventFilter(self)
+        layout.addWidget(self.log_view)
+
+        # deque 的 append / popleft 线程安全，可在任意线程写入
+        self.queue = deque()
         self.timer = QTimer()
         self.timer.timeout.connect(self.check_queue)
-        self.timer.start(100)
+        self.timer.start(LOG_REFRESH_INTERVAL)
 
     def check_queue(self):
-        while not self.queue.empty():
-            msg = self.queue.get()
-            self.log_text.appendPlainText(msg)
-            
-            # 优化：批量删除超出行数
-            if self.log_text.blockCount() > self.max_lines:
-                cursor = self.log_text.textCursor()
-                cursor.movePosition(cursor.Start)
-                cursor.movePosition(cursor.Down, cursor.KeepAnchor, 
-                                  self.log_text.blockCount() - self.max_lines)
-                cursor.removeSelectedText()
-            
-            # 滚动到底部
-            self.log_text.verticalScrollBar().setValue(
-                self.log_text.verticalScrollBar().maximum()
-            )
+        """每次最多取出 LOG_BATCH_SIZE 行一次性插入模型"""
+        if not self.queue:
+            return
+        batch = []
+        queue = self.queue
+        try:
+            for _ in range(LOG_BATCH_SIZE):
+                batch.append(queue.popleft())
+        except IndexError:
+            pass
+
+        scroll_bar = self.log_view.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+        removed = self.model.append_lines(batch)
+        if at_bottom:
+            # 只有停在底部时才跟随滚动
+            self.log_view.scrollToBottom()
+        elif removed:
+            # 顶部旧行被丢弃，保持当前查看的内容不动
+            scroll_bar.setValue(max(0, scroll_bar.value() - removed))
 
     def write(self, msg):
-        self.queue.put(msg)
\ No newline at end of file
+        self.queue.append(msg)
+
+    def clear(self):
+        self.queue.clear()
+        self.model.clear()
+
+    def eventFilter(self, obj, event):
+        # Ctrl+C 复制选中的日志行
+        if obj is self.log_view and event.type() == event.KeyPress and event.matches(QKeySequence.Copy):
+            rows = sorted(index.row() for index in self.log_view.selectionModel().selectedRows())
+            QApplication.clipboard().setText('\n'.join(self.model.line(row) for row in rows))
+            return True
+        return super().eventFilter(obj, event)
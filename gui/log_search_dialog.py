@@ -0,0 +1,129 @@
+import os
+
+from PySide2.QtWidgets import (QCheckBox, QComboBox, QDialog, QHBoxLayout,
+                               QHeaderView, QLabel, QLineEdit, QPushButton,
+                               QTableWidget, QTableWidgetItem, QVBoxLayout)
+
+from constants.config import LOG_SEARCH_LIMIT
+from utils.log_index import log_index, match_line
+from utils.task_scheduler import TaskPriority, task_scheduler
+
+
+class LogSearchDialog(QDialog):
+    """日志搜索，查询界面日志缓存和所有日志文件（含轮转备份）"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.window = parent
+        self.setWindowTitle("搜索日志")
+        self.resize(900, 500)
+        self.search_task = None
+        self.memory_results = []
+
+        layout = QVBoxLayout(self)
+        query_layout = QHBoxLayout()
+        self.keyword_edit = QLineEdit()
+        self.keyword_edit.setPlaceholderText("关键字")
+        self.keyword_edit.returnPressed.connect(self.search)
+        query_layout.addWidget(self.keyword_edit)
+
+        self.level_combo = QComboBox()
+        self.level_combo.addItems(["全部级别", "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"])
+        query_layout.addWidget(self.level_combo)
+
+        self.start_edit = QLineEdit()
+        self.start_edit.setPlaceholderText("开始 HH:MM")
+        self.start_edit.setInputMask("99:99;_")
+        self.end_edit = QLineEdit()
+        self.end_edit.setPlaceholderText("结束 HH:MM")
+        self.end_edit.setInputMask("99:99;_")
+        query_layout.addWidget(self.start_edit)
+        query_layout.addWidget(self.end_edit)
+
+        self.memory_check = QCheckBox("包含界面日志")
+        self.memory_check.setChecked(True)
+        query_layout.addWidget(self.memory_check)
+
+        self.search_button = QPushButton("搜索")
+        self.search_button.clicked.connect(self.search)
+        query_layout.addWidget(self.search_button)
+        layout.addLayout(query_layout)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(2)
+        self.table.setHorizontalHeaderLabels(["来源", "内容"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        # 打开时先在后台补齐索引
+        self.status_label.setText("正在更新索引...")
+        task_scheduler.submit(self._update_index, name="更新日志索引", priority=TaskPriority.LOW,
+                              owner='日志', on_progress=self.status_label.setText,
+                              on_finished=self._on_index_updated)
+
+    @staticmethod
+    def _update_index(ctx):
+        log_index.update(ctx.token, ctx.progress)
+
+    def _on_index_updated(self, result):
+        self.status_label.setText("索引已更新")
+
+    def _query(self):
+        level = self.level_combo.currentText()
+        start = self.start_edit.text() if self.start_edit.hasAcceptableInput() else None
+        end = self.end_edit.text() if self.end_edit.hasAcceptableInput() else None
+        return {
+            'text': self.keyword_edit.text().strip(),
+            'level': None if level == "全部级别" else level,
+            'start': start,
+            'end': end,
+        }
+
+    def search(self):
+        query = self._query()
+        if not any(query.values()):
+            self.status_label.setText("请输入查询条件")
+            return
+        if self.search_task is not None:
+            task_scheduler.cancel(self.search_task.task_id)
+
+        self.memory_results = []
+        if self.memory_check.isChecked():
+            # 界面缓存最多十万行，直接逐行匹配
+            lines = self.window.log_frame.model.lines() if hasattr(self.window, 'log_frame') else []
+            self.memory_results = [line for line in lines if match_line(line, **query)][-LOG_SEARCH_LIMIT:]
+
+        self.status_label.setText("正在搜索...")
+        # 回调使用绑定方法，对话框删除后连接自动断开
+        self.search_task = task_scheduler.submit(
+            self._search_files, query, name="搜索日志", priority=TaskPriority.HIGH, owner='日志',
+            on_finished=self._show_results)
+
+    @staticmethod
+    def _search_files(ctx, query):
+        # 先索引新追加的内容，再查询
+        log_index.update(ctx.token)
+        return log_index.search(**query)
+
+    def _show_results(self, file_results):
+        self.search_task = None
+        memory_results = self.memory_results
+        rows = [("界面", line) for line in memory_results]
+        rows += [(os.path.basename(path), line) for path, offset, line in file_results]
+        self.table.setRowCount(len(rows))
+        for row, (source, line) in enumerate(rows):
+            self.table.setItem(row, 0, QTableWidgetItem(source))
+            self.table.setItem(row, 1, QTableWidgetItem(line))
+        self.table.scrollToBottom()
+        self.status_label.setText(
+            f"界面 {len(memory_results)} 条，文件 {len(file_results)} 条（每处最多显示 {LOG_SEARCH_LIMIT} 条最新结果）")
+
+    def done(self, result):
+        # 关闭按钮和 Esc 都经过 done()
+        task_scheduler.cancel_owner('日志')
+        super().done(result)
@@ -0,0 +1,124 @@
+from datetime import datetime
+
+from PySide2.QtWidgets import (QCheckBox, QComboBox, QDialog, QHBoxLayout,
+                               QHeaderView, QLabel, QPushButton, QTableWidget,
+                               QTableWidgetItem, QTabWidget, QVBoxLayout)
+
+from utils.log_stats import LEVELS, log_stats, since_hours, summarize
+from utils.task_scheduler import TaskPriority, task_scheduler
+
+# (显示名称, 小时数)，0 为全部
+TIME_RANGES = [("最近 1 小时", 1), ("最近 24 小时", 24), ("最近 7 天", 24 * 7), ("全部", 0)]
+
+
+def _table(headers):
+    table = QTableWidget()
+    table.setColumnCount(len(headers))
+    table.setHorizontalHeaderLabels(headers)
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+    table.horizontalHeader().setStretchLastSection(True)
+    table.setEditTriggers(QTableWidget.NoEditTriggers)
+    table.setSortingEnabled(True)
+    return table
+
+
+def _fill(table, rows):
+    table.setSortingEnabled(False)
+    table.setRowCount(len(rows))
+    for row, values in enumerate(rows):
+        for column, value in enumerate(values):
+            item = QTableWidgetItem()
+            # 数字按数值排序
+            item.setData(0, value)
+            table.setItem(row, column, item)
+    table.setSortingEnabled(True)
+
+
+class LogStatsDialog(QDialog):
+    """日志统计：各插件的错误和警告数、每分钟计数、高频消息"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("日志统计")
+        self.resize(900, 600)
+        self.data = None
+        self.load_task = None
+
+        layout = QVBoxLayout(self)
+        option_layout = QHBoxLayout()
+        self.range_combo = QComboBox()
+        for name, hours in TIME_RANGES:
+            self.range_combo.addItem(name, hours)
+        self.range_combo.setCurrentIndex(1)
+        self.range_combo.currentIndexChanged.connect(self.update_summary)
+        option_layout.addWidget(self.range_combo)
+
+        self.level_checks = {}
+        for level in LEVELS:
+            check = QCheckBox(level)
+            check.setChecked(level in ('WARNING', 'ERROR', 'CRITICAL'))
+            check.toggled.connect(self.update_summary)
+            self.level_checks[level] = check
+            option_layout.addWidget(check)
+
+        self.reload_button = QPushButton("重新读取")
+        self.reload_button.clicked.connect(self.reload)
+        option_layout.addWidget(self.reload_button)
+        option_layout.addStretch()
+        layout.addLayout(option_layout)
+
+        self.tabs = QTabWidget()
+        self.plugin_table = _table(["插件"] + list(LEVELS))
+        self.minute_table = _table(["时间", "插件", "级别", "数量"])
+        self.message_table = _table(["数量", "级别", "插件", "消息"])
+        self.tabs.addTab(self.plugin_table, "插件")
+        self.tabs.addTab(self.minute_table, "每分钟")
+        self.tabs.addTab(self.message_table, "高频消息")
+        layout.addWidget(self.tabs)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.reload()
+
+    def reload(self):
+        """在后台读取日志文件（已解析的文件直接读取缓存）"""
+        if self.load_task is not None:
+            return
+        self.reload_button.setEnabled(False)
+        self.status_label.setText("正在读取日志...")
+        self.load_task = task_scheduler.submit(
+            self._load, name="日志统计", priority=TaskPriority.NORMAL, owner='日志统计',
+            on_progress=self.status_label.setText, on_finished=self._on_loaded, on_failed=self._on_failed)
+
+    @staticmethod
+    def _load(ctx):
+        return log_stats.load(ctx.token, ctx.progress)
+
+    def _on_loaded(self, data):
+        self.load_task = None
+        self.reload_button.setEnabled(True)
+        if data is None:
+            return
+        self.data = data
+        self.update_summary()
+
+    def _on_failed(self, error):
+        self.load_task = None
+        self.reload_button.setEnabled(True)
+        self.status_label.setText("读取日志失败")
+
+    def update_summary(self, *args):
+        if self.data is None:
+            return
+        levels = [level for level, check in self.level_checks.items() if check.isChecked()]
+        summary = summarize(self.data, since=since_hours(self.range_combo.currentData()), levels=levels)
+        _fill(self.plugin_table, [[plugin] + [counts.get(level, 0) for level in LEVELS]
+                                  for plugin, counts in summary['per_plugin']])
+        _fill(self.minute_table, [[datetime.fromtimestamp(minute).strftime('%m-%d %H:%M'), plugin, level, count]
+                                  for minute, plugin, level, count in summary['per_minute']])
+        _fill(self.message_table, [list(row) for row in summary['top_messages']])
+        self.status_label.setText(f"共 {len(self.data['ts'])} 条日志，统计 {summary['total']} 条")
+
+    def done(self, result):
+        # 关闭按钮和 Esc 都经过 done()
+        task_scheduler.cancel_owner('日志统计')
+        super().done(result)
@@ -0,0 +1,187 @@
+import os
+
+from PySide2.QtCore import QEvent, Qt, QTimer
+from PySide2.QtGui import QFont
+from PySide2.QtWidgets import (QCheckBox, QComboBox, QDialog, QFileDialog,
+                               QHBoxLayout, QLabel, QLineEdit, QPlainTextEdit,
+                               QPushButton, QScrollBar, QVBoxLayout)
+
+from constants.config import LOG_FILE_PATH
+from utils.log_files import log_files
+from utils.log_pager import LogPager
+from utils.task_scheduler import TaskPriority, task_scheduler
+
+
+class LogViewerDialog(QDialog):
+    """日志文件查看器，只读取和显示当前可见的行"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("查看日志文件")
+        self.resize(1000, 600)
+        self.pager = None
+        self.index_task = None
+        self._rendered = None
+
+        layout = QVBoxLayout(self)
+        file_layout = QHBoxLayout()
+        self.file_combo = QComboBox()
+        self.file_combo.currentIndexChanged.connect(self._on_file_changed)
+        file_layout.addWidget(self.file_combo, 1)
+        open_button = QPushButton("打开文件")
+        open_button.clicked.connect(self.open_file)
+        file_layout.addWidget(open_button)
+
+        self.time_edit = QLineEdit()
+        self.time_edit.setInputMask("99:99:99;_")
+        self.time_edit.setFixedWidth(80)
+        self.time_edit.returnPressed.connect(self.jump_to_time)
+        file_layout.addWidget(self.time_edit)
+        jump_button = QPushButton("跳转到时间")
+        jump_button.clicked.connect(self.jump_to_time)
+        file_layout.addWidget(jump_button)
+
+        self.follow_check = QCheckBox("跟随")
+        self.follow_check.toggled.connect(self._on_follow_toggled)
+        file_layout.addWidget(self.follow_check)
+        layout.addLayout(file_layout)
+
+        view_layout = QHBoxLayout()
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.text.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.text.setFont(QFont("Consolas"))
+        self.text.viewport().installEventFilter(self)
+        view_layout.addWidget(self.text)
+        self.scroll_bar = QScrollBar(Qt.Vertical)
+        self.scroll_bar.valueChanged.connect(self.render)
+        view_layout.addWidget(self.scroll_bar)
+        layout.addLayout(view_layout)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        # 定时检查文件增长和索引进度
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(500)
+
+        self.file_combo.addItems(list(reversed(log_files(LOG_FILE_PATH))))
+
+    def open_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "打开日志文件", os.path.dirname(LOG_FILE_PATH),
+                                              "日志文件 (*.log *.log.* *.gz *.zst);;所有文件 (*)")
+        if path:
+            self.file_combo.addItem(path)
+            self.file_combo.setCurrentIndex(self.file_combo.count() - 1)
+
+    def _on_file_changed(self, index):
+        self._cancel_index()
+        if self.pager is not None:
+            self.pager.close()
+        path = self.file_combo.itemText(index)
+        self.pager = LogPager(path) if path else None
+        self.follow_check.setEnabled(self.pager is not None and not self.pager.compressed)
+        self.scroll_bar.setRange(0, 0)
+        self.text.clear()
+        self._start_index()
+
+    def _on_follow_toggled(self, checked):
+        if checked:
+            self.scroll_bar.setValue(self.scroll_bar.maximum())
+
+    def _start_index(self):
+        if self.pager is None or self.index_task is not None:
+            return
+        self.index_task = task_scheduler.submit(
+            self._build_index, self.pager, name="索引日志文件", priority=TaskPriority.LOW, owner='日志查看',
+            on_finished=self._on_index_finished)
+
+    @staticmethod
+    def _build_index(ctx, pager):
+        truncated = pager.build_index(ctx.token, lambda done, total: ctx.progress(f"{done * 100 // max(total, 1)}%"))
+        return pager, truncated
+
+    def _on_index_finished(self, result):
+        pager, truncated = result
+        if pager is not self.pager:
+            return
+        self.index_task = None
+        if truncated:
+            # 文件已轮转或被截断，重新建立索引
+            pager.reset()
+            self._start_index()
+        self.refresh()
+
+    def _cancel_index(self):
+        if self.index_task is not None:
+            task_scheduler.cancel(self.index_task.task_id)
+            self.index_task = None
+
+    def visible_lines(self):
+        return max(1, self.text.viewport().height() // self.text.fontMetrics().lineSpacing())
+
+    def refresh(self):
+        """更新滚动范围，文件增长时继续索引"""
+        pager = self.pager
+        if pager is None:
+            return
+        if self.index_task is None and not pager.compressed:
+            try:
+                size = os.path.getsize(pager.path)
+            except OSError:
+                size = pager.size
+            # 末尾不完整的行在写完之前不用重新索引，只在文件增长或被截断时索引
+            if size > pager.size or size < pager.indexed:
+                self._start_index()
+        at_bottom = self.scroll_bar.value() >= self.scroll_bar.maximum()
+        self.scroll_bar.blockSignals(True)
+        self.scroll_bar.setRange(0, max(0, pager.line_count - self.visible_lines()))
+        self.scroll_bar.setPageStep(self.visible_lines())
+        if self.follow_check.isChecked() and at_bottom:
+            self.scroll_bar.setValue(self.scroll_bar.maximum())
+        self.scroll_bar.blockSignals(False)
+        indexing = f"，正在索引 {pager.size and pager.indexed * 100 // pager.size}%" if self.index_task else ""
+        self.status_label.setText(f"{os.path.basename(pager.path)}  共 {pager.line_count} 行{indexing}")
+        self.render()
+
+    def render(self, *args):
+        if self.pager is None:
+            return
+        # 内容没有变化时不重绘，避免清除选中的文本
+        state = (self.pager, self.scroll_bar.value(), self.visible_lines(), self.pager.line_count)
+        if state == self._rendered:
+            return
+        self._rendered = state
+        lines = self.pager.lines(self.scroll_bar.value(), self.visible_lines())
+        self.text.setPlainText('\n'.join(lines))
+
+    def jump_to_time(self):
+        if self.pager is None or not self.time_edit.hasAcceptableInput():
+            return
+        line = self.pager.find_time(self.time_edit.text())
+        if line is None:
+            self.status_label.setText("已索引的部分中没有该时间之后的日志")
+            return
+        self.follow_check.setChecked(False)
+        self.scroll_bar.setValue(line)
+
+    def eventFilter(self, obj, event):
+        # 滚轮和翻页由外部滚动条处理
+        if obj is self.text.viewport() and event.type() == QEvent.Wheel:
+            steps = -event.angleDelta().y() // 40
+            self.scroll_bar.setValue(self.scroll_bar.value() + steps)
+            return True
+        return super().eventFilter(obj, event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.refresh()
+
+    def done(self, result):
+        # 关闭按钮和 Esc 都经过 done()
+        self.timer.stop()
+        task_scheduler.cancel_owner('日志查看')
+        if self.pager is not None:
+            self.pager.close()
+        super().done(result)
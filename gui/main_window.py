@@ -1,15 +1,23 @@
 
 from dataclasses import dataclass
-from typing import Dict, Optional
 
-from PySide2.QtWidgets import (QCheckBox, QComboBox, QLineEdit, QMainWindow,
-                               QRadioButton, QSpinBox, QVBoxLayout, QWidget)
+from PySide2.QtCore import QTimer
+from PySide2.QtWidgets import QMainWindow, QVBoxLayout, QWidget
 
-from constants.config import WindowConstants
+from constants.config import (CONFIG_AUTOSAVE_DELAY, LOG_COMPRESSION, LOG_DEDUP, LOG_QUEUE_OVERFLOW,
+                              LOG_QUEUE_SIZE, LOG_RATE_BURST, LOG_RATE_LIMIT,
+                              LOG_REPORT_INTERVAL, LOG_RETENTION_DAYS,
+                              LOG_RETENTION_MB, LOG_ROTATION,
+                              PLUGIN_IDLE_MINUTES, WindowConstants)
 from gui.log_frame import LogFrame
 from gui.menu_bar import MenuBuilder
 from gui.plugin_manager import PluginArea, PluginManager
-from utils.logger_manager import logger_manager
+from gui.widget_binding import widget_bindings
+from utils.config_profiles import config_profiles
+from utils.logger_manager import PLUGIN_LOG_LEVELS, logger_manager
+from utils.process_worker import shutdown_process_pool
+from utils.task_scheduler import task_scheduler
+from utils.tracer import tracer
 
 
 @dataclass
@@ -23,89 +31,70 @@ class WindowConfig:
     min_width: int = WindowConstants.MIN_WIDTH
 
 
-class ConfigHandler:
-    """配置处理类"""
-    @staticmethod
-    def process_widget(widget: QWidget, load_data: Optional[Dict] = None, save_data: Optional[Dict] = None, widget_name: str = '') -> Dict:
-        handlers = {
-            QLineEdit: ConfigHandler._handle_line_edit,
-            QCheckBox: ConfigHandler._handle_checkbox,
-            QRadioButton: ConfigHandler._handle_radio,
-            QComboBox: ConfigHandler._handle_combobox,
-            QSpinBox: ConfigHandler._handle_spinbox
-        }
-        
-        for widget_type, handler in handlers.items():
-            if isinstance(widget, widget_type):
-                return handler(widget, load_data, save_data, widget_name)
-        return save_data or {}
-
-    @staticmethod
-    def _handle_line_edit(widget: QLineEdit, load_data: Optional[Dict], save_data: Optional[Dict], name: str) -> Dict:
-        if load_data is not None:
-            widget.setText(str(load_data.get(name, '')))
-        elif save_data is not None:
-            save_data[name] = widget.text()
-        return save_data or {}
-
-    @staticmethod
-    def _handle_checkbox(widget: QCheckBox, load_data: Optional[Dict], save_data: Optional[Dict], name: str) -> Dict:
-        if load_data is not None:
-            widget.setChecked(load_data.get(name, False))
-        elif save_data is not None:
-            save_data[name] = widget.isChecked()
-        return save_data or {}
-
-    @staticmethod
-    def _handle_radio(widget: QRadioButton, load_data: Optional[Dict], save_data: Optional[Dict], name: str) -> Dict:
-        if load_data is not None:
-            widget.setChecked(load_data.get(name, False))
-        elif save_data is not None:
-            save_data[name] = widget.isChecked()
-        return save_data or {}
-
-    @staticmethod
-    def _handle_combobox(widget: QComboBox, load_data: Optional[Dict], save_data: Optional[Dict], name: str) -> Dict:
-        if load_data is not None:
-            index = load_data.get(name, 0)
-            widget.setCurrentIndex(index)
-        elif save_data is not None:
-            save_data[name] = widget.currentIndex()
-        return save_data or {}
-
-    @staticmethod
-    def _handle_spinbox(widget: QSpinBox, load_data: Optional[Dict], save_data: Optional[Dict], name: str) -> Dict:
-        if load_data is not None:
-            widget.setValue(load_data.get(name, widget.minimum()))
-        elif save_data is not None:
-            save_data[name] = widget.value()
-        return save_data or {}
-
-
 class MainWindow(QMainWindow):
     def __init__(self, config_manager):
         super().__init__()
         self.config_manager = config_manager
         self.config = self._load_window_config()
         self.log_show = 'true'
+        # 后台加载插件，窗口先显示，插件导入完成后逐个添加
+        self.async_plugin_loading = self.config_manager.get('window', 'async_plugin_loading', 'true').lower() == 'true'
+        self._saved_data = {}
         # 初始化界面
         self._init_window()
         # 初始化日志控件
         self._init_widgets()
-        logger_manager.setup(self.log_frame)
+        with tracer.span('初始化日志'):
+            logger_manager.setup(
+                self.log_frame,
+                queue_size=int(self.config_manager.get('log', 'queue_size', LOG_QUEUE_SIZE)),
+                overflow=self.config_manager.get('log', 'overflow', LOG_QUEUE_OVERFLOW),
+                console_level=self.config_manager.get('log', 'console_level', 'info'),
+                jsonl=self.config_manager.get('log', 'jsonl', 'false').lower() == 'true',
+                rotation=self.config_manager.get('log', 'rotation', LOG_ROTATION),
+                compression=self.config_manager.get('log', 'compression', LOG_COMPRESSION),
+                retention_mb=float(self.config_manager.get('log', 'retention_mb', LOG_RETENTION_MB)),
+                retention_days=float(self.config_manager.get('log', 'retention_days', LOG_RETENTION_DAYS)))
         # 初始化插件
-        self.plugin_area = PluginArea(self)
+        self.plugin_area = PluginArea(
+            self,
+            mode=self.config_manager.get('window', 'plugin_layout', 'vertical'),
+            idle_minutes=int(self.config_manager.get('window', 'plugin_idle_minutes', PLUGIN_IDLE_MINUTES)))
         self.plugin_manager = PluginManager('plugins')
-        self.plugin_manager.load_plugins()
+        with tracer.span('扫描插件'):
+            if self.async_plugin_loading:
+                # 注册表在扫描插件后才有内容，启用列表由 load_plugins_async 在扫描后获取
+                self.plugin_loader = self.plugin_manager.load_plugins_async(self._enabled_plugin_names)
+            else:
+                self.plugin_manager.load_plugins()
         self._init_plugins()
         # 构建菜单
-        self.create_menu_bar()
+        with tracer.span('构建菜单'):
+            self.create_menu_bar()
         # 添加插件区域
         self.main_layout.addWidget(self.plugin_area)
+        # 绑定主窗口自身的控件，插件控件在添加插件时绑定
+        widget_bindings.bind_tree(self, stop_at_plugins=True)
+        # 控件修改后自动保存，一个间隔内的修改合并为一次
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(int(CONFIG_AUTOSAVE_DELAY * 1000))
+        self.autosave_timer.timeout.connect(self._autosave)
+        widget_bindings.on_changed = self._on_widget_changed
         # 加载配置
-        self.load_config()
+        with tracer.span('加载控件配置'):
+            self.load_config()
         # 检查并应用待更新的插件
         pass
+        if self.async_plugin_loading:
+            # 事件循环启动（窗口显示）后再开始加载
+            self.plugin_loader.plugin_loaded.connect(self._on_plugin_loaded)
+            self.plugin_loader.plugin_failed.connect(self._on_plugin_failed)
+            self.plugin_loader.finished.connect(self._on_plugins_finished)
+            QTimer.singleShot(0, self.plugin_loader.start)
+        else:
+            # 窗口显示后写出启动追踪
+            QTimer.singleShot(0, tracer.finish)
 
     def _load_window_config(self) -> WindowConfig:
         """加载窗口配置"""
@@ -134,6 +123,71 @@ class MainWindow(QMainWindow):
         # 检查更新信息
         pass
 
+    def _enabled_plugin_names(self):
+        """获取配置中已启用的插件类名"""
+        registry = self.plugin_manager.registry
+        # configparser 的键是小写的，按注册表中的类名匹配
+        widget_names = {name.lower(): name for name in registry.widget_names()}
+        return [widget_names[key.lower()] for key, value in self.config_manager.items('plugins')
+                if value.lower() == 'true' and key.lower() in widget_names]
+
+    def _on_plugin_loaded(self, plugin_name, class_names):
+        """后台导入一个插件完成，添加菜单项并创建已启用的控件"""
+        self._apply_plugin_log_level(plugin_name)
+        for class_name in class_names:
+            try:
+                enabled = self.menu_builder.add_plugin_action(class_name, load=False)
+                if not enabled:
+                    continue
+                plugin_class = self.plugin_manager.get_plugin(class_name)
+                if plugin_class is None or self.plugin_area.has_plugin(plugin_class):
+                    continue
+                plugin = self.plugin_area.add_plugin(plugin_class)
+                if plugin is None:
+                    # 标签页模式下首次显示时才创建
+                    continue
+                with tracer.span(f'加载配置 {class_name}', cat='config'):
+                    self._process_widgets(plugin, load_data=self._saved_data)
+            except Exception as e:
+                logger_manager.logger.error(f"加载插件 {plugin_name}.{class_name} 失败: {e}")
+
+    def _on_plugin_failed(self, plugin_name, message):
+        logger_manager.logger.error(f"加载插件 {plugin_name} 失败: {message}")
+
+    def _on_plugins_finished(self):
+        logger_manager.logger.debug("插件加载完成")
+        tracer.finish()
+
+    def hot_reload_plugin(self, plugin_name, update=None):
+        """热更新插件，不重启程序，其他插件保持运行
+        Args:
+            plugin_name: 插件名（文件夹名）
+            update: 解压更新包的函数，在旧的插件实例销毁后调用，返回是否成功
+        Returns:
+            bool: 是否成功
+        """
+        if not self.plugin_manager.can_hot_reload(plugin_name):
+            return False
+        if plugin_name in self.plugin_manager.registry:
+            widgets = self.plugin_area.reload_plugin(self.plugin_manager, plugin_name, update)
+        elif update is not None and not update():
+            widgets = None
+        else:
+            # 新安装的插件，扫描后直接导入
+            widgets = None
+            for name, kind, path in self.plugin_manager.scan_plugins():
+                if name == plugin_name:
+                    widgets = self.plugin_manager.import_plugin(name, kind, path)
+            self.plugin_manager.index.save()
+        if widgets is None:
+            logger_manager.logger.error(f"热更新插件 {plugin_name} 失败")
+            return False
+        for class_name in widgets:
+            self.menu_builder.add_plugin_action(class_name, load=False)
+        self._apply_plugin_log_level(plugin_name)
+        logger_manager.logger.info(f"插件 {plugin_name} 已热更新")
+        return True
+
     def _init_widgets(self):
         self.log_frame = LogFrame()
         self.log_frame.setVisible(True)  # 默认显示
@@ -145,15 +199,34 @@ class MainWindow(QMainWindow):
         self.frame_log_level = self.config_manager.get('log', 'frame_level', 'info')
         logger_manager.set_file_level(self.file_log_level)  # 使用全局 logger_manager
         logger_manager.set_frame_level(self.frame_log_level)  # 使用全局 logger_manager
+        # 插件单独设置的日志级别
+        for plugin_name, level in self._load_plugin_log_levels().items():
+            logger_manager.set_plugin_level(plugin_name, level)
+        # 重复日志合并和限速
+        get = self.config_manager.get
+        logger_manager.configure_throttle(
+            dedup=get('log', 'dedup', str(LOG_DEDUP)).lower() == 'true',
+            rate=float(get('log', 'rate_limit', LOG_RATE_LIMIT)),
+            burst=float(get('log', 'rate_burst', LOG_RATE_BURST)),
+            plugin_rates=self._load_plugin_rates(),
+            report_interval=float(get('log', 'report_interval', LOG_REPORT_INTERVAL)))
         
         # 加载其他配置
         saved_data = self.config_manager.load_all()
+        self._saved_data = saved_data
         self._process_widgets(self, load_data=saved_data)
 
     def save_config(self):
         # 保存日志级别
         self.config_manager.set('log', 'file_level', self.file_log_level)
         self.config_manager.set('log', 'frame_level', self.frame_log_level)
+        # 只处理已登记的插件，尚未加载的插件保留配置中的级别
+        for plugin_name in self.plugin_manager.registry.names():
+            level = logger_manager.plugin_level(plugin_name)
+            if level:
+                self.config_manager.set('log_plugins', plugin_name, level)
+            else:
+                self.config_manager.remove('log_plugins', plugin_name)
         self.config_manager.set('window', 'height', self.height())
         self.config_manager.set('window', 'width', self.width())
         # 保存其他配置
@@ -161,42 +234,117 @@ class MainWindow(QMainWindow):
         save_data = self._process_widgets(self, save_data=save_data)
         self.config_manager.save_all(save_data)
 
-    def _process_widgets(self, parent, load_data=None, save_data=None, prefix=''):
-        """递归处理所有控件"""
-        save_data = save_data or {}
-        for child in parent.findChildren(QWidget):
-            widget_name = child.objectName()
-            if not widget_name:
-                continue
-            # 获取插件名称
-            plugin_name = ''
-            if hasattr(child, 'parent'):
-                parent_widget = child.parent()
-                while parent_widget:
-                    if hasattr(parent_widget, 'plugin_name'):
-                        plugin_name = parent_widget.plugin_name
-                        break
-                    parent_widget = parent_widget.parent()
-                    
-            full_name = f"{plugin_name}.{widget_name}" if plugin_name else widget_name
-            # 使用 ConfigHandler 处理控件
-            ConfigHandler.process_widget(child, load_data, save_data, full_name)
-            # 递归处理子控件
-            if hasattr(child, 'layout'):
-                new_prefix = f"{full_name}." if widget_name else prefix
-                self._process_widgets(child, load_data, save_data, new_prefix)
-
-        return save_data
+    def _on_widget_changed(self):
+        # 不重新计时，保证修改最多延迟一个间隔写入
+        if not self.autosave_timer.isActive():
+            self.autosave_timer.start()
+
+    def _autosave(self):
+        """读取控件的值，只有变化的节会由后台线程写入文件"""
+        save_data = self._process_widgets(self, save_data={})
+        self._saved_data.update(save_data)
+        self.config_manager.update(save_data)
+        self.config_manager.save_later()
+
+    def _plugin_options(self, section):
+        """读取以插件名为键的配置节
+        Returns:
+            dict: {插件名: 值}
+        """
+        # configparser 的键是小写的，按注册表中的插件名匹配
+        names = {name.lower(): name for name in self.plugin_manager.registry.names()}
+        return {names[key.lower()]: value for key, value in self.config_manager.items(section)
+                if key.lower() in names}
+
+    def _apply_plugin_log_level(self, plugin_name):
+        """插件登记后应用配置中的日志级别，并添加到插件日志级别菜单
+        启动时读取配置只能应用已登记（索引有效）的插件，后台导入或热更新的插件在这里补上
+        """
+        level = self._load_plugin_log_levels().get(plugin_name)
+        if level is not None and logger_manager.plugin_level(plugin_name) is None:
+            logger_manager.set_plugin_level(plugin_name, level)
+        self.menu_builder.add_plugin_log_level_menu(plugin_name, logger_manager.plugin_level(plugin_name))
+
+    def _load_plugin_rates(self):
+        """读取 [log_rate_limits] 中插件的限速，以配置中的插件名（小写）为键，
+        尚未加载的插件也生效，见 LogThrottleFilter.configure()
+        """
+        rates = {}
+        for name, value in self.config_manager.items('log_rate_limits'):
+            try:
+                rates[name.lower()] = float(value)
+            except ValueError:
+                logger_manager.logger.warning(f"插件 {name} 的日志限速无效: {value}")
+        return rates
+
+    def _load_plugin_log_levels(self):
+        """读取 [log_plugins] 中插件的日志级别"""
+        return {name: value.lower() for name, value in self._plugin_options('log_plugins').items()
+                if value.lower() in PLUGIN_LOG_LEVELS}
+
+    def _process_widgets(self, parent, load_data=None, save_data=None):
+        """读取或保存已绑定控件的配置，parent 为主窗口时处理所有控件，为插件时只处理该插件
+        读取时只修改值不同的控件，见 WidgetBindings.apply()
+        """
+        roots = None
+        if parent is not self:
+            roots = [parent]
+            if not widget_bindings.is_bound(parent):
+                widget_bindings.bind_tree(parent)
+        if load_data is not None:
+            self.apply_config(load_data, roots)
+            return save_data or {}
+        return widget_bindings.process(roots, save_data=save_data)
+
+    def apply_config(self, data, roots=None, reset_missing=True):
+        """把配置应用到控件，只修改值不同的控件，有修改时稍后自动保存
+        Returns:
+            dict: {根控件: 修改过的配置键}
+        """
+        changed = widget_bindings.apply(data, roots, reset_missing)
+        if changed:
+            self._on_widget_changed()
+        return changed
+
+    def current_profile(self):
+        return self.config_manager.get('window', 'profile', '')
+
+    def save_profile(self, name):
+        """把当前所有控件的值保存为配置方案"""
+        config_profiles.save(name, self._process_widgets(self, save_data={}))
+        self.config_manager.set('window', 'profile', name)
+        logger_manager.logger.info(f"已保存配置方案: {name}")
+
+    def switch_profile(self, name):
+        """切换配置方案，方案中没有的控件保持不变"""
+        data = config_profiles.load(name)
+        changed = self.apply_config(data, reset_missing=False)
+        self._saved_data.update(data)
+        self.config_manager.set('window', 'profile', name)
+        count = sum(len(keys) for keys in changed.values())
+        logger_manager.logger.info(f"已切换到配置方案 {name}，修改了 {count} 个控件")
+
+    def delete_profile(self, name):
+        config_profiles.delete(name)
+        if self.current_profile() == name:
+            self.config_manager.remove('window', 'profile')
 
     def closeEvent(self, event):
         """关闭事件"""
+        self.autosave_timer.stop()
+        widget_bindings.on_changed = None
         self.save_config()
+        self.config_manager.close()
+        task_scheduler.shutdown()
+        shutdown_process_pool()
+        logger_manager.shutdown()
         super().closeEvent(event)
 
     # MainWindow 类中添加新方法
     def create_menu_bar(self):
         """创建菜单栏"""
-        MenuBuilder(self).build_all_menus()
+        self.menu_builder = MenuBuilder(self)
+        self.menu_builder.build_all_menus()
 
     def clear_config(self):
         """清空所有控件的值"""
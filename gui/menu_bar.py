@@ -1,12 +1,14 @@
 from pathlib import Path
 
-from PySide2.QtCore import QUrl
+from PySide2.QtCore import Qt, QUrl
 from PySide2.QtGui import QDesktopServices
-from PySide2.QtWidgets import QAction, QActionGroup, QMenu, QMessageBox
+from PySide2.QtWidgets import (QAction, QActionGroup, QInputDialog, QMenu,
+                               QMessageBox)
 
 from constants.config import WindowConstants
-from utils.logger_manager import logger_manager
+from utils.logger_manager import PLUGIN_LOG_LEVELS, logger_manager
 from utils.messages import show_message
+from utils.tracer import tracer
 
 
 # 新增 MenuBuilder 类来处理菜单创建
@@ -33,24 +35,45 @@ class MenuBuilder:
     
     def build_plugin_menu(self):
         """构建插件菜单"""
-        plugin_menu = self.menubar.addMenu('插件')
-        plugin_names = self.window.plugin_manager.get_plugin_names()
-        for plugin_name in plugin_names:
-            plugin_alias = self.window.plugin_manager.get_plugin_alias(plugin_name)
-            action = QAction(plugin_alias, self.window, objectName=plugin_name)
-            action.setCheckable(True)
-            # 获取插件显示状态
-            status = self.config_manager.get('plugins', plugin_name, 'false')
-            if status.lower() == 'true':
-                self.window.plugin_area.add_plugin(self.window.plugin_manager.get_plugin(plugin_name))
-            action.setChecked(status.lower() == 'true')
-            action.triggered.connect(lambda checked=(status.lower() == 'true'), name=plugin_name: self.toggle_plugin(name, checked))
-            plugin_menu.addAction(action)
+        self.plugin_menu = self.menubar.addMenu('插件')
         # 添加版本检查菜单项
-        plugin_menu.addSeparator()
+        self.plugin_separator = self.plugin_menu.addSeparator()
         version_action = QAction('插件管理', self.window)
         version_action.triggered.connect(self.show_version_dialog)
-        plugin_menu.addAction(version_action)
+        self.plugin_menu.addAction(version_action)
+        task_action = QAction('任务', self.window)
+        task_action.triggered.connect(self.show_task_panel)
+        self.plugin_menu.addAction(task_action)
+        # 插件名和别名来自插件清单索引，只有启用的插件才会被导入
+        # 后台加载时由 MainWindow 在插件导入完成后创建控件
+        load = not self.window.async_plugin_loading
+        for record in self.window.plugin_manager.registry.rows():
+            for class_name in record.widgets:
+                self.add_plugin_action(class_name, load)
+
+    def add_plugin_action(self, plugin_name, load=True):
+        """在插件菜单中添加插件项
+        Args:
+            plugin_name: 插件类名
+            load: 插件已启用时是否立即创建控件
+        Returns:
+            bool: 插件是否已启用
+        """
+        if self.window.findChild(QAction, plugin_name):
+            return self.config_manager.get('plugins', plugin_name, 'false').lower() == 'true'
+        plugin_alias = self.window.plugin_manager.get_plugin_alias(plugin_name)
+        action = QAction(plugin_alias, self.window, objectName=plugin_name)
+        action.setCheckable(True)
+        # 获取插件显示状态
+        status = self.config_manager.get('plugins', plugin_name, 'false')
+        if status.lower() == 'true' and load:
+            plugin_class = self.window.plugin_manager.get_plugin(plugin_name)
+            if plugin_class:
+                self.window.plugin_area.add_plugin(plugin_class)
+        action.setChecked(status.lower() == 'true')
+        action.triggered.connect(lambda checked=(status.lower() == 'true'), name=plugin_name: self.toggle_plugin(name, checked))
+        self.plugin_menu.insertAction(self.plugin_separator, action)
+        return status.lower() == 'true'
 
     def build_help_menu(self):
         """构建帮助菜单"""
@@ -59,6 +82,9 @@ class MenuBuilder:
         git_action = QAction('Github', self.window)
         git_action.triggered.connect(lambda: QDesktopServices.openUrl(QUrl("https://github.com/aduuuu213/Py-Modular-GUI")))
         help_menu.addAction(git_action)
+        startup_action = QAction('启动性能', self.window)
+        startup_action.triggered.connect(self.show_startup_dialog)
+        help_menu.addAction(startup_action)
         about_action = QAction('关于', self.window)
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
@@ -73,6 +99,22 @@ class MenuBuilder:
         show_log_action.setChecked(self.log_show.lower() == 'true')
         show_log_action.triggered.connect(self.toggle_log_frame)
         log_menu.addAction(show_log_action)
+
+        # 搜索日志
+        search_log_action = QAction('搜索日志', self.window)
+        search_log_action.setShortcut('Ctrl+Shift+F')
+        search_log_action.triggered.connect(self.show_log_search_dialog)
+        log_menu.addAction(search_log_action)
+
+        # 查看日志文件
+        view_log_action = QAction('查看日志文件', self.window)
+        view_log_action.triggered.connect(self.show_log_viewer_dialog)
+        log_menu.addAction(view_log_action)
+
+        # 日志统计
+        stats_log_action = QAction('日志统计', self.window)
+        stats_log_action.triggered.connect(self.show_log_stats_dialog)
+        log_menu.addAction(stats_log_action)
         
         # 日志级别子菜单
         self._build_log_level_menu(log_menu)
@@ -110,6 +152,42 @@ class MenuBuilder:
             frame_menu.addAction(action)
         parent_menu.addMenu(frame_menu)
 
+        # 插件日志级别，每个插件可单独调高或调低；后台加载的插件导入后再添加
+        self.plugin_log_menu = QMenu('插件日志级别', self.window)
+        self._plugin_level_menus = {}  # {插件名: 级别子菜单}
+        plugin_levels = self.window._load_plugin_log_levels()
+        for plugin_name in self.window.plugin_manager.registry.names():
+            self.add_plugin_log_level_menu(plugin_name, plugin_levels.get(plugin_name))
+        parent_menu.addMenu(self.plugin_log_menu)
+
+    def add_plugin_log_level_menu(self, plugin_name, current_level=None):
+        """在插件日志级别菜单中添加插件的级别子菜单（按插件名排序），已存在时只更新选中项
+        Args:
+            plugin_name: 插件名
+            current_level: 插件单独设置的级别，None 为跟随全局
+        """
+        level_menu = self._plugin_level_menus.get(plugin_name)
+        if level_menu is not None:
+            for action in level_menu.actions():
+                action.setChecked(action.data() == current_level)
+            return
+        record = self.window.plugin_manager.registry.get(plugin_name)
+        level_menu = QMenu(record.alias if record and record.alias else plugin_name, self.window)
+        level_group = QActionGroup(level_menu)
+        for level in (None,) + PLUGIN_LOG_LEVELS:
+            action = QAction('跟随全局' if level is None else level, level_menu)
+            action.setData(level)
+            action.setCheckable(True)
+            action.setChecked(level == current_level)
+            action.triggered.connect(lambda checked=False, name=plugin_name, level=level:
+                                     self.set_plugin_log_level(name, level))
+            level_group.addAction(action)
+            level_menu.addAction(action)
+        following = [name for name in self._plugin_level_menus if name > plugin_name]
+        before = self._plugin_level_menus[min(following)].menuAction() if following else None
+        self.plugin_log_menu.insertMenu(before, level_menu)
+        self._plugin_level_menus[plugin_name] = level_menu
+
     def create_file_log_handler(self, level):
         """创建文件日志级别触发处理函数"""
         file_group = self.window.findChild(QActionGroup, 'file_group')
@@ -166,6 +244,14 @@ class MenuBuilder:
                 action.triggered.connect(lambda: self.change_style('style'))
                 style_group.addAction(action)
                 style_menu.addAction(action)
+        # 插件显示方式
+        style_menu.addSeparator()
+        tabs_action = QAction('插件标签页模式（重启生效）', self.window)
+        tabs_action.setCheckable(True)
+        tabs_action.setChecked(self.config_manager.get('window', 'plugin_layout', 'vertical') == 'tabs')
+        tabs_action.triggered.connect(
+            lambda checked: self.config_manager.set('window', 'plugin_layout', 'tabs' if checked else 'vertical'))
+        style_menu.addAction(tabs_action)
         # 初始加载
         self.change_style('default')
 
@@ -180,8 +266,49 @@ class MenuBuilder:
             action = QAction(name, self.window)
             action.triggered.connect(handler)
             config_menu.addAction(action)
+        # 配置方案，打开菜单时刷新列表
+        config_menu.addSeparator()
+        self.profile_menu = config_menu.addMenu('配置方案')
+        self.profile_menu.aboutToShow.connect(self.refresh_profile_menu)
         return config_menu
 
+    def refresh_profile_menu(self):
+        """重建配置方案菜单"""
+        from utils.config_profiles import config_profiles
+        self.profile_menu.clear()
+        current = self.window.current_profile()
+        profile_group = QActionGroup(self.profile_menu)
+        names = config_profiles.names()
+        for name in names:
+            action = QAction(name, self.profile_menu)
+            action.setCheckable(True)
+            action.setChecked(name == current)
+            action.triggered.connect(lambda checked=False, name=name: self.window.switch_profile(name))
+            profile_group.addAction(action)
+            self.profile_menu.addAction(action)
+        if not names:
+            empty_action = self.profile_menu.addAction('（没有配置方案）')
+            empty_action.setEnabled(False)
+        self.profile_menu.addSeparator()
+        self.profile_menu.addAction('另存为配置方案...', self.save_profile_as)
+        delete_action = self.profile_menu.addAction(f'删除配置方案 {current}', self.delete_current_profile)
+        delete_action.setEnabled(current in names)
+
+    def save_profile_as(self):
+        name, ok = QInputDialog.getText(self.window, '另存为配置方案', '方案名称:', text=self.window.current_profile())
+        if not ok:
+            return
+        try:
+            self.window.save_profile(name.strip())
+        except (ValueError, OSError) as e:
+            QMessageBox.warning(self.window, '保存失败', str(e))
+
+    def delete_current_profile(self):
+        name = self.window.current_profile()
+        reply = QMessageBox.question(self.window, '删除配置方案', f'确定删除配置方案 {name}？')
+        if reply == QMessageBox.Yes:
+            self.window.delete_profile(name)
+
     def show_about(self):
         disclaimer = (
             "免责声明：\n\n"
@@ -250,6 +377,11 @@ class MenuBuilder:
         logger_manager.set_frame_level(level)
         logger_manager.logger.info(f'设置界面日志级别: {level}')
 
+    def set_plugin_log_level(self, plugin_name, level):
+        """设置插件日志级别，None 为跟随全局"""
+        logger_manager.set_plugin_level(plugin_name, level)
+        logger_manager.logger.info(f'设置插件 {plugin_name} 日志级别: {level or "跟随全局"}')
+
     def change_style(self, style_name):
         """切换样式"""
         style_group = self.window.findChild(QActionGroup, 'style_group')
@@ -261,11 +393,56 @@ class MenuBuilder:
         else:
             qss_path = Path(f'resources/qss/{style_name}.qss')
             if qss_path.exists():
-                with open(qss_path, 'r', encoding='utf-8') as f:
-                    self.window.setStyleSheet(f.read())
+                with tracer.span(f'应用样式 {style_name}'):
+                    with open(qss_path, 'r', encoding='utf-8') as f:
+                        self.window.setStyleSheet(f.read())
         # 保存样式设置
         self.config_manager.set('window', 'style', style_name)
 
+    def show_startup_dialog(self):
+        """显示启动性能对话框"""
+        from .startup_dialog import StartupDialog
+        dialog = StartupDialog(self.window)
+        dialog.exec_()
+
+    def show_log_search_dialog(self):
+        """显示日志搜索对话框（非模态）"""
+        from .log_search_dialog import LogSearchDialog
+        self._show_tool_dialog('log_search_dialog', LogSearchDialog)
+
+    def show_log_viewer_dialog(self):
+        """显示日志文件查看器（非模态）"""
+        from .log_viewer_dialog import LogViewerDialog
+        self._show_tool_dialog('log_viewer_dialog', LogViewerDialog)
+
+    def show_log_stats_dialog(self):
+        """显示日志统计（非模态）"""
+        from .log_stats_dialog import LogStatsDialog
+        self._show_tool_dialog('log_stats_dialog', LogStatsDialog)
+
+    def _show_tool_dialog(self, attr, dialog_class):
+        """显示非模态对话框，已打开时只激活；关闭后对话框被删除
+        Args:
+            attr: 保存对话框的属性名
+            dialog_class: 对话框类，以主窗口为父窗口创建
+        """
+        dialog = getattr(self, attr, None)
+        if dialog is not None:
+            dialog.raise_()
+            dialog.activateWindow()
+            return dialog
+        dialog = dialog_class(self.window)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.finished.connect(lambda result: setattr(self, attr, None))
+        setattr(self, attr, dialog)
+        dialog.show()
+        return dialog
+
+    def show_task_panel(self):
+        """显示任务面板（非模态）"""
+        from .task_panel import TaskPanel
+        self._show_tool_dialog('task_panel', TaskPanel)
+
     def show_version_dialog(self):
         """显示版本检查对话框"""
         from .version_dialog import VersionDialog
@@ -279,7 +456,11 @@ class MenuBuilder:
         checked = action.isChecked()
         self.config_manager.set('plugins', name, str(checked).lower())
         print(self.config_manager.get('plugins', name))
+        plugin_class = self.window.plugin_manager.get_plugin(name)
+        if plugin_class is None:
+            logger_manager.logger.error(f'加载插件失败: {name}')
+            return
         if checked:
-            self.window.plugin_area.add_plugin(self.window.plugin_manager.get_plugin(name))
+            self.window.plugin_area.add_plugin(plugin_class)
         else:
-            self.window.plugin_area.remove_plugin(self.window.plugin_manager.get_plugin(name))
\ No newline at end of file
+            self.window.plugin_area.remove_plugin(plugin_class)
\ No newline at end of file
@@ -1,91 +1,175 @@
 import importlib
 import importlib.util
+import inspect
 import os
 import sys
+import threading
+import time
 import traceback
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 
-from PySide2.QtWidgets import QVBoxLayout, QWidget
+from PySide2.QtCore import QCoreApplication, QEvent, QObject, QTimer, Signal
+from PySide2.QtWidgets import QTabWidget, QVBoxLayout, QWidget
+
+from constants.config import PLUGIN_LOADER_WORKERS
+from gui.widget_binding import widget_bindings
+from utils.memory_profiler import memory_tracker, process_rss
+from utils.plugin_index import PluginIndex
+from utils.plugin_registry import PluginRegistry
+from utils.task_scheduler import task_scheduler
+from utils.tracer import tracer
 
 
 class PluginManager:
     def __init__(self, plugins_folder = 'plugins'):
         self.plugins_folder = plugins_folder
-        self.plugins = {}
+        self.package_path = ''
+        self.registry = PluginRegistry()  # 插件注册表，按插件名登记
+        self.index = PluginIndex()
 
     def load_plugins(self):
-        # 加载 plugins 包中的所有插件
+        # 扫描 plugins 包中的所有插件，只导入索引失效的插件
         self._load_plugins_from_package()
 
+    def load_plugins_async(self, enabled=(), max_workers=PLUGIN_LOADER_WORKERS):
+        """在后台线程池中导入插件
+        Args:
+            enabled: 已启用的插件类名，需要导入后创建控件；
+                可以是返回类名列表的函数，在扫描插件（登记索引有效的插件）之后调用
+            max_workers: 线程池大小
+        Returns:
+            PluginLoader: 连接信号后调用 start() 开始加载
+        """
+        jobs = self.scan_plugins()
+        if callable(enabled):
+            enabled = enabled()
+        queued = {job[0] for job in jobs}
+        for class_name in enabled:
+            record = self.registry.by_widget(class_name)
+            if not record or class_name in record.classes or record.name in queued:
+                continue
+            queued.add(record.name)
+            jobs.append((record.name, record.kind, os.path.join(self.package_path, record.path)))
+        return PluginLoader(self, jobs, max_workers)
+
     def _load_plugins_from_package(self):
+        for plugin_name, kind, item_path in self.scan_plugins():
+            # 索引失效，导入插件并刷新索引
+            print(f"索引失效，导入插件: {plugin_name}")
+            self.import_plugin(plugin_name, kind, item_path)
+        self.index.save()
+
+    def scan_plugins(self):
+        """扫描插件目录，登记索引有效的插件
+        Returns:
+            list: 索引失效需要导入的插件 [(plugin_name, kind, path)]
+        """
         # 导入 plugins 包
         package_name = self.plugins_folder
         package = importlib.import_module(package_name)
         package_path = os.path.dirname(package.__file__)
-        # 加载 .pyd 文件
-        for file in os.listdir(package_path):
-            if file.endswith('.pyd'):
-                try:
-                    module_name = os.path.splitext(file)[0]
-                    spec = importlib.util.spec_from_file_location(module_name, os.path.join(package_path, file))
-                    print(f"目录: {package_path}")
-                    print(f"目录插件: {module_name}")
-                    print(spec)
-                    if spec:
-                        module = importlib.util.module_from_spec(spec)
-                        try:
-                            spec.loader.exec_module(module)
-                            # 获取插件信息
-                            plugin_info = getattr(module, 'PLUGIN_INFO', {})
-                            print(f"插件信息: {plugin_info}")
-                            plugin_alias = plugin_info.get('name', module_name)  # 如果没有设置别名，使用文件夹名
-                            # 查找模块中的 QWidget 子类
-                            for attr_name in dir(module):
-                                attr = getattr(module, attr_name)
-                                if isinstance(attr, type) and issubclass(attr, QWidget):
-                                    setattr(attr, 'plugin_name', module_name)
-                                    setattr(attr, 'plugin_alias', plugin_alias)
-                                    setattr(attr, 'plugin_info', plugin_info)
-                                    self.plugins[attr_name] = attr
-                        except Exception as e:
-                            print(f"加载插件 {module_name} 失败: {str(e)}")
-                except Exception as e:
-                    traceback.print_exc()
-                    print(f"导入 {file} 失败: {str(e)}")
-                    continue
-        
-        # 加载文件夹
+        self.package_path = package_path
+        found = set()
+        pending = []
         for item in os.listdir(package_path):
-            folder_path = os.path.join(package_path, item)
-            if os.path.isdir(folder_path):
-                init_file = os.path.join(folder_path, '__init__.py')
-                if os.path.exists(init_file):
-                    try:
-                        # 构造模块名
-                        module_name = f'{package_name}.{item}'
-                        # 导入模块
-                        module = importlib.import_module(module_name)
-                        # 获取插件信息
-                        plugin_info = getattr(module, 'PLUGIN_INFO', {})
-                        print(f"插件信息: {plugin_info}")
-                        plugin_alias = plugin_info.get('name', item)  # 如果没有设置别名，使用文件夹名
-                        # 查找模块中的 QWidget 子类
-                        for attr_name in dir(module):
-                            attr = getattr(module, attr_name)
-                            if isinstance(attr, type) and issubclass(attr, QWidget):
-                                setattr(attr, 'plugin_name', item)
-                                setattr(attr, 'plugin_alias', plugin_alias)
-                                setattr(attr, 'plugin_info', plugin_info)
-                                self.plugins[attr_name] = attr
-                    except Exception as e:
-                        print(f"加载插件文件夹 {item} 失败: {str(e)}")
-                        traceback.print_exc()
+            item_path = os.path.join(package_path, item)
+            if item.endswith('.pyd') and os.path.isfile(item_path):
+                # 加载 .pyd 文件
+                plugin_name, kind = os.path.splitext(item)[0], 'pyd'
+            elif os.path.isdir(item_path) and os.path.exists(os.path.join(item_path, '__init__.py')):
+                # 加载文件夹
+                plugin_name, kind = item, 'package'
+            else:
+                continue
+            found.add(plugin_name)
+            entry = self.index.lookup(plugin_name, kind, item_path)
+            if entry is None:
+                pending.append((plugin_name, kind, item_path))
+            else:
+                self._register(plugin_name, entry)
+        self.index.prune(found)
+        return pending
+
+    def import_plugin(self, plugin_name, kind, path):
+        """导入插件并登记到注册表，可在后台线程调用
+        Returns:
+            list: 插件中的 QWidget 类名，导入失败返回 None
+        """
+        result = self._import_plugin(plugin_name, kind, path)
+        if result is None:
+            return None
+        entry, classes = result
+        self._register(plugin_name, entry)
+        self.registry.set_classes(plugin_name, classes)
+        return entry['widgets']
+
+    def _register(self, plugin_name, entry):
+        """按索引项登记插件"""
+        return self.registry.register(plugin_name, entry['kind'], entry['path'],
+                                      entry.get('alias', plugin_name), entry.get('info', {}),
+                                      entry.get('widgets', []))
+
+    def _import_module(self, plugin_name, kind, path):
+        """导入插件模块"""
+        if kind == 'pyd':
+            spec = importlib.util.spec_from_file_location(plugin_name, path)
+            print(f"目录插件: {plugin_name}")
+            print(spec)
+            if not spec:
+                return None
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+        # 构造模块名
+        return importlib.import_module(f'{self.plugins_folder}.{plugin_name}')
+
+    def _import_plugin(self, plugin_name, kind, path):
+        """导入插件，查找 QWidget 子类并更新索引
+        Returns:
+            tuple: (新的索引项, {类名: 类})，导入失败返回 None
+        """
+        try:
+            with tracer.span(f'导入 {plugin_name}', cat='import', kind=kind), \
+                    memory_tracker.measure(plugin_name, 'load'):
+                module = self._import_module(plugin_name, kind, path)
+            if module is None:
+                return None
+            # 获取插件信息
+            plugin_info = getattr(module, 'PLUGIN_INFO', {})
+            print(f"插件信息: {plugin_info}")
+            plugin_alias = plugin_info.get('name', plugin_name)  # 如果没有设置别名，使用文件夹名
+            # 查找模块中的 QWidget 子类
+            widgets = {}
+            for attr_name in dir(module):
+                attr = getattr(module, attr_name)
+                if isinstance(attr, type) and issubclass(attr, QWidget):
+                    setattr(attr, 'plugin_name', plugin_name)
+                    setattr(attr, 'plugin_alias', plugin_alias)
+                    setattr(attr, 'plugin_info', plugin_info)
+                    widgets[attr_name] = attr
+        except Exception as e:
+            traceback.print_exc()
+            print(f"加载插件 {plugin_name} 失败: {str(e)}")
+            return None
+        entry = self.index.update(plugin_name, kind, path, plugin_info, plugin_alias, widgets)
+        if entry is None:
+            return None
+        return entry, widgets
 
     def get_plugin_names(self):
-        return list(self.plugins.keys())
+        """获取所有插件的 QWidget 类名"""
+        return self.registry.widget_names()
 
     def get_plugin(self, name):
-        # 返回插件类而不是实例
-        return self.plugins.get(name)
+        # 返回插件类而不是实例，未导入时按需导入
+        record = self.registry.by_widget(name)
+        if not record:
+            return None
+        if name not in record.classes:
+            if self.import_plugin(record.name, record.kind, os.path.join(self.package_path, record.path)) is not None:
+                self.index.save()
+        return record.classes.get(name)
 
     def get_plugin_alias(self, name):
         """获取插件别名
@@ -94,59 +178,310 @@ class PluginManager:
         Returns:
             str: 插件别名或原名
         """
-        try:
-            plugin_class = self.plugins.get(name)
-            if not plugin_class:
-                return name
-            # 先尝试从类属性获取
-            plugin_info = getattr(plugin_class, 'plugin_alias', None)
-            return plugin_info
-        except Exception as e:
-            print(f"获取插件 {name} 别名失败: {str(e)}")
-            return name
-    
+        record = self.registry.by_widget(name)
+        return record.alias if record else name
+
     def get_plugin_name_by_alias(self, alias):
-        """根据别名获取插件名"""
-        for plugin_name, plugin_class in self.plugins.items():
-            if self.get_plugin_alias(plugin_name) == alias:
-                return plugin_name
-        return None
+        """根据别名获取插件名（插件的第一个 QWidget 类名）"""
+        record = self.registry.by_alias(alias)
+        if not record or not record.widgets:
+            return None
+        return record.widgets[0]
 
     def get_plugin_info_list(self):
-        """获取所有插件信息列表"""
-        plugin_info_list = []
-        for plugin_name in self.get_plugin_names():
-            module = self.plugins.get(plugin_name)
-            if hasattr(module, 'plugin_info'):
-                plugin_info_list.append(module.plugin_info)
-        return plugin_info_list
+        """获取所有插件信息列表，顺序与 registry.rows() 一致"""
+        return [record.info for record in self.registry.rows()]
+
+    def plugin_path(self, plugin_name):
+        """插件路径，pyd 插件去掉后缀，用于按路径统计内存"""
+        return os.path.join(self.package_path, plugin_name)
+
+    def can_hot_reload(self, plugin_name):
+        """插件是否可以热重载，未登记的新插件可以直接导入"""
+        record = self.registry.get(plugin_name)
+        return record is None or record.kind == 'package'
+
+    def reload_plugin(self, plugin_name):
+        """热重载插件：清除插件模块后重新导入
+        pyd 插件是扩展模块，无法从进程中卸载，只能重启后生效
+        Returns:
+            list: 新的 QWidget 类名，无法热重载或导入失败返回 None
+        """
+        record = self.registry.get(plugin_name)
+        if record is None or record.kind != 'package':
+            return None
+        module_name = f'{self.plugins_folder}.{plugin_name}'
+        for name in list(sys.modules):
+            if name == module_name or name.startswith(module_name + '.'):
+                del sys.modules[name]
+        importlib.invalidate_caches()
+        widgets = self.import_plugin(plugin_name, record.kind, os.path.join(self.package_path, record.path))
+        self.index.save()
+        return widgets
+
+class PluginLoader(QObject):
+    """后台插件加载器
+
+    在线程池中导入插件模块，每个插件完成后发出信号，由主线程添加菜单和控件。
+    单个插件导入失败只发出 plugin_failed，不影响其他插件。
+    """
+    plugin_loaded = Signal(str, list)  # 插件名, QWidget 类名列表
+    plugin_failed = Signal(str, str)  # 插件名, 错误信息
+    finished = Signal()
+
+    def __init__(self, plugin_manager, jobs, max_workers=PLUGIN_LOADER_WORKERS):
+        super().__init__()
+        self.plugin_manager = plugin_manager
+        self.jobs = jobs
+        self.max_workers = max_workers
+        self._remaining = len(jobs)
+        self._lock = threading.Lock()
+
+    def start(self):
+        if not self.jobs:
+            self.finished.emit()
+            return
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='plugin_loader')
+        for plugin_name, kind, path in self.jobs:
+            executor.submit(self._load, plugin_name, kind, path)
+        executor.shutdown(wait=False)
+
+    def _load(self, plugin_name, kind, path):
+        try:
+            widgets = self.plugin_manager.import_plugin(plugin_name, kind, path)
+            if widgets is None:
+                self.plugin_failed.emit(plugin_name, '导入失败')
+            else:
+                self.plugin_loaded.emit(plugin_name, widgets)
+        except Exception as e:
+            traceback.print_exc()
+            self.plugin_failed.emit(plugin_name, str(e))
+        finally:
+            with self._lock:
+                self._remaining -= 1
+                done = self._remaining == 0
+            if done:
+                self.plugin_manager.index.save()
+                self.finished.emit()
 
 def unload_all_plugins(self):
     """卸载所有插件"""
     for plugin_class in self.plugins[:]:  # 使用切片以避免修改列表时出错
         self.remove_plugin(plugin_class)
 
+class PluginSlot:
+    """标签页模式下的插件位置，控件在首次显示时才创建"""
+    def __init__(self, plugin_class, page):
+        self.plugin_class = plugin_class
+        self.page = page
+        self.widget = None
+        self.last_shown = time.monotonic()
+
+
 class PluginArea(QWidget):
-    def __init__(self, main_window):
+    """插件区域
+
+    vertical 模式：所有插件纵向排列，添加时立即创建。
+    tabs 模式：每个插件一个标签页，首次切换到标签页时才创建控件；
+    切走时调用插件的 plugin_suspend()，切回时调用 plugin_resume()；
+    超过 idle_minutes 未查看的插件保存配置后卸载，再次查看时重建。
+    """
+    def __init__(self, main_window, mode='vertical', idle_minutes=0):
         super().__init__()
         self.main_window = main_window
+        self.mode = mode
+        self.idle_minutes = idle_minutes
         self.plugin_layout = QVBoxLayout(self)
-        self.plugins = []
+        self.plugins = []  # 已创建的插件实例
+        self.slots = []  # 标签页模式下的插件位置，顺序与标签页一致
+        self._current_slot = None
+        # 构造函数是否需要 main_window，按类缓存；弱引用，热重载后旧的类和模块可以被回收
+        self._signature_cache = weakref.WeakKeyDictionary()
+        if self.mode == 'tabs':
+            self.plugin_layout.setContentsMargins(0, 0, 0, 0)
+            self.tab_widget = QTabWidget()
+            self.tab_widget.currentChanged.connect(self._on_tab_changed)
+            self.plugin_layout.addWidget(self.tab_widget)
+            self.idle_timer = QTimer(self)
+            self.idle_timer.timeout.connect(self._unload_idle)
+            if self.idle_minutes > 0:
+                self.idle_timer.start(60 * 1000)
 
-    def add_plugin(self, plugin_class):
-        # 创建插件实例并添加
-        import inspect
-        if 'main_window' not in inspect.signature(plugin_class.__init__).parameters:
-            plugin = plugin_class()
-        else:
-            plugin = plugin_class(self.main_window)
+    def add_plugin(self, plugin_class, index=-1):
+        """添加插件
+        Returns:
+            QWidget: 插件实例，标签页模式下延迟创建时返回 None
+        """
+        if self.mode != 'tabs':
+            plugin = self._create_plugin(plugin_class)
+            self.plugin_layout.insertWidget(index, plugin)
+            return plugin
+        page = QWidget()
+        page_layout = QVBoxLayout(page)
+        page_layout.setContentsMargins(0, 0, 0, 0)
+        slot = PluginSlot(plugin_class, page)
+        if index < 0 or index > len(self.slots):
+            index = len(self.slots)
+        self.slots.insert(index, slot)
+        # 第一个标签页插入时会触发 currentChanged，在那里创建控件
+        self.tab_widget.insertTab(index, page, getattr(plugin_class, 'plugin_alias', plugin_class.__name__))
+        return None
+
+    def _create_plugin(self, plugin_class):
+        # 创建插件实例，构造函数签名按类缓存
+        needs_main_window = self._signature_cache.get(plugin_class)
+        if needs_main_window is None:
+            needs_main_window = 'main_window' in inspect.signature(plugin_class.__init__).parameters
+            self._signature_cache[plugin_class] = needs_main_window
+        plugin_name = getattr(plugin_class, 'plugin_name', plugin_class.__name__)
+        with tracer.span(f'创建 {plugin_class.__name__}', cat='construct'), \
+                memory_tracker.measure(plugin_name, 'construct'):
+            if needs_main_window:
+                plugin = plugin_class(self.main_window)
+            else:
+                plugin = plugin_class()
+        # 绑定配置控件，之后保存和读取配置不再遍历控件树
+        widget_bindings.bind_tree(plugin)
         self.plugins.append(plugin)
-        self.plugin_layout.addWidget(plugin)
+        return plugin
+
+    def has_plugin(self, plugin_class):
+        """插件是否已添加（包括尚未创建的标签页）"""
+        return (any(p.__class__ is plugin_class for p in self.plugins)
+                or any(slot.plugin_class is plugin_class for slot in self.slots))
+
+    def index_of(self, plugin_class):
+        """插件在插件区域中的位置（纵向排列的序号或标签页序号），未添加时返回 -1"""
+        if self.mode == 'tabs':
+            for index, slot in enumerate(self.slots):
+                if slot.plugin_class is plugin_class:
+                    return index
+            return -1
+        for plugin in self.plugins:
+            if plugin.__class__ is plugin_class:
+                return self.plugin_layout.indexOf(plugin)
+        return -1
+
+    def cycle_plugin(self, plugin_class):
+        """创建并销毁一次插件实例（泄漏检测用），不加入布局或标签页，两种模式下都会真正创建"""
+        self._teardown(self._create_plugin(plugin_class))
 
     def remove_plugin(self, plugin_class):
         plugins_to_remove = [p for p in self.plugins if p.__class__ == plugin_class]
         for plugin in plugins_to_remove:
-            self.plugins.remove(plugin)
-            self.plugin_layout.removeWidget(plugin)
-            plugin.setParent(None)  # 确保完全断开父子关系
-            plugin.deleteLater()
\ No newline at end of file
+            self._teardown(plugin)
+        for slot in [s for s in self.slots if s.plugin_class == plugin_class]:
+            slot.widget = None
+            index = self.slots.index(slot)
+            self.slots.remove(slot)
+            self.tab_widget.removeTab(index)
+            slot.page.deleteLater()
+
+    def _teardown(self, plugin):
+        """销毁插件实例，插件可实现 plugin_unload() 停止线程、定时器等"""
+        self._call_hook(plugin, 'plugin_unload')
+        task_scheduler.cancel_owner(getattr(plugin, 'plugin_name', ''))
+        self.plugins.remove(plugin)
+        widget_bindings.unbind(plugin)
+        # 控件真正销毁后记录 RSS 变化
+        rss_before = process_rss()
+        plugin_name = getattr(plugin, 'plugin_name', plugin.__class__.__name__)
+        plugin.destroyed.connect(
+            lambda *args: memory_tracker.record(plugin_name, 'unload', process_rss() - rss_before))
+        parent = plugin.parentWidget()
+        if parent is not None and parent.layout() is not None:
+            parent.layout().removeWidget(plugin)
+        plugin.setParent(None)  # 确保完全断开父子关系
+        plugin.deleteLater()
+
+    def _call_hook(self, plugin, hook):
+        if hasattr(plugin, hook):
+            try:
+                getattr(plugin, hook)()
+            except Exception as e:
+                print(f"插件 {plugin.__class__.__name__} {hook} 失败: {str(e)}")
+
+    def _save_plugin_config(self, plugins):
+        """保存插件控件的配置，同时更新内存中的配置以便重建时恢复"""
+        saved_data = {}
+        for plugin in plugins:
+            saved_data = self.main_window._process_widgets(plugin, save_data=saved_data)
+        if saved_data:
+            self.main_window.config_manager.save_all(saved_data)
+            self.main_window._saved_data.update(saved_data)
+        return saved_data
+
+    def _on_tab_changed(self, index):
+        previous = self._current_slot
+        slot = self.slots[index] if 0 <= index < len(self.slots) else None
+        if previous is slot:
+            return
+        if previous is not None and previous.widget is not None:
+            previous.last_shown = time.monotonic()
+            self._call_hook(previous.widget, 'plugin_suspend')
+        self._current_slot = slot
+        if slot is None:
+            return
+        slot.last_shown = time.monotonic()
+        if slot.widget is None:
+            slot.widget = self._create_plugin(slot.plugin_class)
+            slot.page.layout().addWidget(slot.widget)
+            if self.main_window._saved_data:
+                self.main_window._process_widgets(slot.widget, load_data=self.main_window._saved_data)
+        else:
+            self._call_hook(slot.widget, 'plugin_resume')
+
+    def _unload_idle(self):
+        """卸载长时间未查看的插件控件，释放内存"""
+        deadline = time.monotonic() - self.idle_minutes * 60
+        for slot in self.slots:
+            if slot is self._current_slot or slot.widget is None or slot.last_shown > deadline:
+                continue
+            self._save_plugin_config([slot.widget])
+            self._teardown(slot.widget)
+            slot.widget = None
+            print(f"卸载空闲插件: {slot.plugin_class.__name__}")
+
+    def reload_plugin(self, plugin_manager, plugin_name, update=None):
+        """热重载插件，其他插件不受影响
+        保存该插件控件的配置并销毁实例，重新导入模块后在原位置重建控件并恢复配置
+        Args:
+            update: 销毁实例后、重新导入前调用，如解压更新包，返回 False 时用原来的类重建控件
+        Returns:
+            list: 新的 QWidget 类名，失败返回 None
+        """
+        if not plugin_manager.can_hot_reload(plugin_name):
+            return None
+        if self.mode == 'tabs':
+            positions = [(index, slot.plugin_class) for index, slot in enumerate(self.slots)
+                         if getattr(slot.plugin_class, 'plugin_name', None) == plugin_name]
+            live = [p for p in self.plugins if getattr(p, 'plugin_name', None) == plugin_name]
+        else:
+            live = [p for p in self.plugins if getattr(p, 'plugin_name', None) == plugin_name]
+            positions = sorted(((self.plugin_layout.indexOf(p), p.__class__) for p in live), key=lambda item: item[0])
+        saved_data = self._save_plugin_config(live)
+
+        for _, plugin_class in positions:
+            self.remove_plugin(plugin_class)
+            self._signature_cache.pop(plugin_class, None)
+        # 立即执行 deleteLater，旧实例真正销毁后再更新文件
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        if update is not None and not update():
+            # 旧模块还没有清除，按原来的类恢复
+            for index, plugin_class in positions:
+                plugin = self.add_plugin(plugin_class, index)
+                if plugin is not None:
+                    self.main_window._process_widgets(plugin, load_data=saved_data)
+            return None
+        widgets = plugin_manager.reload_plugin(plugin_name)
+        if widgets is None:
+            return None
+
+        for index, old_class in positions:
+            plugin_class = plugin_manager.get_plugin(old_class.__name__)
+            if plugin_class is None:
+                continue
+            plugin = self.add_plugin(plugin_class, index)
+            if plugin is not None:
+                self.main_window._process_widgets(plugin, load_data=saved_data)
+        return widgets
@@ -0,0 +1,36 @@
+from PySide2.QtWidgets import (QDialog, QHeaderView, QLabel, QTableWidget,
+                               QTableWidgetItem, QVBoxLayout)
+
+from utils.tracer import tracer
+
+
+class StartupDialog(QDialog):
+    """启动性能对话框，按耗时倒序显示启动各阶段"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("启动性能")
+        self.resize(600, 400)
+
+        layout = QVBoxLayout(self)
+        summary = f"启动总耗时: {tracer.total_ms():.1f} ms"
+        if tracer.trace_file:
+            summary += f"    追踪文件: {tracer.trace_file}"
+        layout.addWidget(QLabel(summary))
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(4)
+        self.table.setHorizontalHeaderLabels(["阶段", "类别", "耗时(ms)", "线程"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self._fill_stages()
+
+    def _fill_stages(self):
+        stages = tracer.slowest()
+        self.table.setRowCount(len(stages))
+        for row, stage in enumerate(stages):
+            self.table.setItem(row, 0, QTableWidgetItem(stage['name']))
+            self.table.setItem(row, 1, QTableWidgetItem(stage['cat']))
+            self.table.setItem(row, 2, QTableWidgetItem(f"{stage['duration_ms']:.1f}"))
+            self.table.setItem(row, 3, QTableWidgetItem(stage['thread']))
@@ -0,0 +1,70 @@
+from PySide2.QtCore import QTimer
+from PySide2.QtWidgets import (QDialog, QHeaderView, QLabel, QPushButton,
+                               QTableWidget, QTableWidgetItem, QVBoxLayout)
+
+from utils.signal_coalescer import coalescer_stats
+from utils.task_scheduler import task_scheduler
+
+
+class TaskPanel(QDialog):
+    """任务面板，列出排队中和运行中的任务"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("任务")
+        self.resize(600, 300)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget()
+        self.table.setColumnCount(5)
+        self.table.setHorizontalHeaderLabels(["任务", "插件", "优先级", "状态", "进度"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        layout.addWidget(self.table)
+
+        self.cancel_button = QPushButton("取消选中任务")
+        self.cancel_button.clicked.connect(self.cancel_selected)
+        layout.addWidget(self.cancel_button)
+
+        # 信号合并计数
+        self.coalesce_label = QLabel()
+        layout.addWidget(self.coalesce_label)
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.refresh_stats)
+        self.stats_timer.start(1000)
+        self.refresh_stats()
+
+        task_scheduler.task_added.connect(self.refresh)
+        task_scheduler.task_changed.connect(self.refresh)
+        task_scheduler.task_removed.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self, *args):
+        tasks = task_scheduler.active_tasks()
+        self.task_ids = [task.task_id for task in tasks]
+        self.table.setRowCount(len(tasks))
+        for row, task in enumerate(tasks):
+            self.table.setItem(row, 0, QTableWidgetItem(task.name))
+            self.table.setItem(row, 1, QTableWidgetItem(task.owner))
+            self.table.setItem(row, 2, QTableWidgetItem(str(task.priority)))
+            self.table.setItem(row, 3, QTableWidgetItem(task.state))
+            self.table.setItem(row, 4, QTableWidgetItem(task.progress_text))
+
+    def refresh_stats(self):
+        stats = coalescer_stats()
+        self.coalesce_label.setText(
+            f"信号合并: 接收 {stats['received']}，刷新 {stats['delivered']}，"
+            f"丢弃 {stats['dropped']}，合并 {stats['merged']}")
+
+    def cancel_selected(self):
+        selected_rows = set(item.row() for item in self.table.selectedItems())
+        for row in selected_rows:
+            task_scheduler.cancel(self.task_ids[row])
+
+    def done(self, result):
+        # 关闭按钮和 Esc 都经过 done()
+        self.stats_timer.stop()
+        task_scheduler.task_added.disconnect(self.refresh)
+        task_scheduler.task_changed.disconnect(self.refresh)
+        task_scheduler.task_removed.disconnect(self.refresh)
+        super().done(result)
@@ -2,18 +2,24 @@ import json
 import shutil
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from packaging import version
-from PySide2.QtCore import QThread, Signal
+from PySide2.QtCore import (QCoreApplication, QEvent, QObject, Qt, QThread,
+                            Signal)
 from PySide2.QtWidgets import (QApplication, QDialog, QHeaderView,
                                QInputDialog, QMessageBox, QProgressBar,
                                QPushButton, QTableWidget, QTableWidgetItem,
                                QVBoxLayout)
 
-from constants.config import PIP_SOURCE, PLUGIN_DIR, PLUGIN_UPDATE_CACHE_DIR
+from constants.config import (PIP_SOURCE, PLUGIN_DIR, PLUGIN_UPDATE_CACHE_DIR,
+                              UPDATE_CHECK_TIMEOUT, UPDATE_CHECK_WORKERS)
 from constants.messages import *
+from utils.install import apply_plugin_update
 from utils.logger_manager import logger_manager
+from utils.memory_profiler import format_size, memory_tracker
 from utils.requests import download_file, get_json
 
 
@@ -60,11 +66,79 @@ def install_package(package_name, version=""):
     except subprocess.CalledProcessError as e:
         logger_manager.logger.error(f"安装包时发生错误: {e}")
 
+class UpdateChecker(QObject):
+    """并发检查插件更新
+
+    在线程池中请求各插件的 update_url（共享 keep-alive 会话），每个结果到达后发出 result 信号。
+    cancel() 取消尚未开始的请求，已经发出的请求完成后丢弃结果。
+    工作线程的结果经排队连接转到创建检查器的线程（GUI 线程），在那里检查是否已取消后再发出 result / finished，
+    cancel() 返回后不会再有信号到达对话框。
+    检查器应以对话框为父对象创建，由 GUI 线程持有；所有请求结束后自行 deleteLater()。
+    """
+    result = Signal(str, object)  # 插件名, 在线信息（失败为空字典）
+    finished = Signal()
+    _worker_result = Signal(str, object)
+    _worker_finished = Signal()
+
+    def __init__(self, jobs, max_workers=UPDATE_CHECK_WORKERS, timeout=UPDATE_CHECK_TIMEOUT, parent=None):
+        super().__init__(parent)
+        self.jobs = jobs  # [(插件名, update_url)]
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._futures = []
+        self._cancelled = False
+        self._remaining = len(jobs)
+        self._lock = threading.Lock()
+        self._worker_result.connect(self._deliver_result, Qt.QueuedConnection)
+        self._worker_finished.connect(self._deliver_finished, Qt.QueuedConnection)
+
+    def start(self):
+        if not self.jobs:
+            self.finished.emit()
+            self.deleteLater()
+            return
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='update_check')
+        self._futures = [executor.submit(self._check, name, url) for name, url in self.jobs]
+        executor.shutdown(wait=False)
+
+    def _check(self, name, url):
+        try:
+            if self._cancelled:
+                return
+            online_info = get_json(url, use_cache=True, timeout=self.timeout)
+            self._worker_result.emit(name, online_info)
+        finally:
+            with self._lock:
+                self._remaining -= 1
+                done = self._remaining == 0
+            if done:
+                self._worker_finished.emit()
+
+    def _deliver_result(self, name, online_info):
+        # 与 cancel() 在同一线程，取消后到达的结果直接丢弃
+        if not self._cancelled:
+            self.result.emit(name, online_info)
+
+    def _deliver_finished(self):
+        if not self._cancelled:
+            self.finished.emit()
+        # 工作线程都已结束，不再引用检查器
+        self.deleteLater()
+
+    def cancel(self):
+        """取消检查，需在创建检查器的线程（GUI 线程）调用"""
+        # Python 3.8 的 shutdown 不支持 cancel_futures，逐个取消排队中的任务
+        self._cancelled = True
+        for future in self._futures:
+            future.cancel()
+
+
 class VersionDialog(QDialog):
     def __init__(self, plugin_manager, parent=None):
         super().__init__(parent)
         self.plugin_manager = plugin_manager
         self.window = parent
+        self.update_checker = None
         self.setWindowTitle("插件版本信息")
         self.resize(600, 400)
 
@@ -72,8 +146,9 @@ class VersionDialog(QDialog):
         
         # 创建表格
         self.table = QTableWidget()
-        self.table.setColumnCount(5)  # 增加状态和更新地址列
-        self.table.setHorizontalHeaderLabels(["插件名称", "当前版本", "最新版本", "状态", "描述"])
+        self.table.setColumnCount(7)  # 增加状态和更新地址列
+        self.table.setHorizontalHeaderLabels(["插件名称", "当前版本", "最新版本", "状态", "描述",
+                                              "Python内存", "RSS变化(加载/创建/卸载)"])
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         
         # 添加检查按钮
@@ -85,6 +160,15 @@ class VersionDialog(QDialog):
         self.update_button.clicked.connect(self.update_selected_plugins)
         self.update_button.setEnabled(False)
 
+        # 添加内存统计按钮
+        self.memory_button = QPushButton("刷新内存统计")
+        self.memory_button.clicked.connect(self._fill_memory_info)
+
+        # 添加泄漏检测按钮
+        self.leak_button = QPushButton("泄漏检测")
+        self.leak_button.clicked.connect(self.leak_check_selected_plugins)
+        self.leak_button.setEnabled(False)
+
         # 添加卸载按钮
         # self.uninstall_button = QPushButton("卸载选中插件")
         # self.uninstall_button.clicked.connect(self.uninstall_selected_plugins)
@@ -98,6 +182,8 @@ class VersionDialog(QDialog):
         layout.addWidget(self.table)
         layout.addWidget(self.check_button)
         layout.addWidget(self.update_button)
+        layout.addWidget(self.memory_button)
+        layout.addWidget(self.leak_button)
         # layout.addWidget(self.uninstall_button)  # 添加卸载按钮
         
         # 允许选择行
@@ -109,48 +195,109 @@ class VersionDialog(QDialog):
         self._fill_plugin_info()
         
     def _fill_plugin_info(self):
-        plugins = self.plugin_manager.get_plugin_info_list()
-        self.table.setRowCount(len(plugins))
+        registry = self.plugin_manager.registry
+        records = registry.rows()
+        self._generation = registry.generation
+        self.table.setRowCount(len(records))
         
-        for row, plugin in enumerate(plugins):
-            self.table.setItem(row, 0, QTableWidgetItem(plugin.get('name', '')))
+        for row, record in enumerate(records):
+            plugin = record.info
+            # 行与插件的对应关系保存在名称列，不依赖列表顺序
+            name_item = QTableWidgetItem(plugin.get('name', record.alias))
+            name_item.setData(Qt.UserRole, record.name)
+            self.table.setItem(row, 0, name_item)
             self.table.setItem(row, 1, QTableWidgetItem(plugin.get('version', '')))
             self.table.setItem(row, 2, QTableWidgetItem('-'))
             self.table.setItem(row, 3, QTableWidgetItem('-'))
             self.table.setItem(row, 4, QTableWidgetItem(plugin.get('description', '')))
-    
+        self._fill_memory_info()
+
+    def _fill_memory_info(self):
+        """填充内存统计列，Python 内存需要开启 tracemalloc"""
+        names = [self.table.item(row, 0).data(Qt.UserRole) for row in range(self.table.rowCount())]
+        usage = memory_tracker.python_usage({name: self.plugin_manager.plugin_path(name) for name in names})
+        for row, name in enumerate(names):
+            python_text = format_size(usage[name]) if name in usage else '未开启'
+            self.table.setItem(row, 5, QTableWidgetItem(python_text))
+            rss = memory_tracker.rss.get(name, {})
+            rss_text = ' / '.join(format_size(rss[stage]) if stage in rss else '-'
+                                  for stage in ('load', 'construct', 'unload'))
+            self.table.setItem(row, 6, QTableWidgetItem(rss_text))
+
+    def _plugin_info(self, row):
+        """根据表格行获取插件信息"""
+        item = self.table.item(row, 0)
+        record = self.plugin_manager.registry.get(item.data(Qt.UserRole)) if item else None
+        return record.info if record else {}
+
+    def _refresh_if_changed(self):
+        """插件注册表变化后重新填充表格"""
+        if self._generation != self.plugin_manager.registry.generation:
+            self._fill_plugin_info()
+
     def check_updates(self):
-        """检查插件更新"""
-        plugins = self.plugin_manager.get_plugin_info_list()
-        for row, plugin in enumerate(plugins):
-            try:
-                if 'update_url' not in plugin:
-                    self._update_status(row, '-', '未配置更新地址')
-                    continue
-                    
-                # 获取在线版本信息
-                response_json = get_json(plugin['update_url'], timeout=5)
-                if not response_json:
-                    self._update_status(row, '-', '检查失败')
-                    continue
-                    
-                online_info = response_json
-                if not self._validate_online_info(online_info):
-                    self._update_status(row, '-', WARNING_MESSAGE_INVALID_UPDATE_INFO)
-                    continue
-                
-                # 更新版本信息
-                current_version = plugin.get('version', '0')
-                latest_version = online_info.get('version', '0')
-                self.table.setItem(row, 2, QTableWidgetItem(latest_version))
-                if version.parse(latest_version) > version.parse(current_version):    
-                    self.table.setItem(row, 3, QTableWidgetItem(WARNING_MESSAGE_NEW_VERSION_AVAILABLE))
-                else:
-                    self.table.setItem(row, 3, QTableWidgetItem(WARNING_MESSAGE_ALREADY_LATEST_VERSION))
-            except Exception as e:
-                logger_manager.logger.error(f"检查插件更新时发生错误: {e}")
+        """在后台并发检查插件更新，结果到达后逐行填充"""
+        self._refresh_if_changed()
+        if self.update_checker is not None:
+            return
+        jobs = []
+        for row in range(self.table.rowCount()):
+            plugin = self._plugin_info(row)
+            if 'update_url' not in plugin:
+                self._update_status(row, '-', '未配置更新地址')
+                continue
+            self.table.setItem(row, 3, QTableWidgetItem('检查中...'))
+            jobs.append((self.table.item(row, 0).data(Qt.UserRole), plugin['update_url']))
+        self.check_button.setEnabled(False)
+        self.update_checker = UpdateChecker(jobs, parent=self)
+        self.update_checker.result.connect(self._on_update_result)
+        self.update_checker.finished.connect(self._on_update_check_finished)
+        self.update_checker.start()
+
+    def _on_update_check_finished(self):
+        self.update_checker = None
+        self.check_button.setEnabled(True)
+
+    def _row_of(self, plugin_name):
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 0).data(Qt.UserRole) == plugin_name:
+                return row
+        return None
+
+    def _on_update_result(self, plugin_name, online_info):
+        """填充一个插件的检查结果"""
+        row = self._row_of(plugin_name)
+        if row is None:
+            return
+        plugin = self._plugin_info(row)
+        try:
+            if not online_info:
                 self._update_status(row, '-', '检查失败')
-    
+                return
+
+            if not self._validate_online_info(online_info):
+                self._update_status(row, '-', WARNING_MESSAGE_INVALID_UPDATE_INFO)
+                return
+
+            # 更新版本信息
+            current_version = plugin.get('version', '0')
+            latest_version = online_info.get('version', '0')
+            self.table.setItem(row, 2, QTableWidgetItem(latest_version))
+            if version.parse(latest_version) > version.parse(current_version):
+                self.table.setItem(row, 3, QTableWidgetItem(WARNING_MESSAGE_NEW_VERSION_AVAILABLE))
+            else:
+                self.table.setItem(row, 3, QTableWidgetItem(WARNING_MESSAGE_ALREADY_LATEST_VERSION))
+        except Exception as e:
+            logger_manager.logger.error(f"检查插件更新时发生错误: {e}")
+            self._update_status(row, '-', '检查失败')
+
+    def done(self, result):
+        """关闭对话框时取消未完成的更新检查"""
+        if self.update_checker is not None:
+            self.update_checker.cancel()
+            self.update_checker = None
+        super().done(result)
+
     def _update_status(self, row, status, message):
         self.table.setItem(row, 3, QTableWidgetItem(status))
         self.table.setItem(row, 4, QTableWidgetItem(message))
@@ -163,16 +310,16 @@ class VersionDialog(QDialog):
     def _handle_selection(self):
         """处理选择变化"""
         self.update_button.setEnabled(len(self.table.selectedItems()) > 0)
+        self.leak_button.setEnabled(len(self.table.selectedItems()) > 0)
         # self.uninstall_button.setEnabled(len(self.table.selectedItems()) > 0)  # 更新卸载按钮状态
 
     def update_selected_plugins(self):
         """更新选中的插件"""
         selected_rows = set(item.row() for item in self.table.selectedItems())
-        plugins = self.plugin_manager.get_plugin_info_list()
         
         updates = []
         for row in selected_rows:
-            plugin_info = plugins[row]
+            plugin_info = self._plugin_info(row)
             status_item = self.table.item(row, 3)
             if status_item and status_item.text() == WARNING_MESSAGE_NEW_VERSION_AVAILABLE:
                 updates.append(plugin_info)
@@ -189,6 +336,61 @@ class VersionDialog(QDialog):
         if reply == QMessageBox.StandardButton.Yes:
             self._perform_updates(updates)
 
+    def leak_check_selected_plugins(self):
+        """反复开关选中插件的控件，比较前后的 Python 内存分配"""
+        plugin_area = getattr(self.window, 'plugin_area', None)
+        if plugin_area is None:
+            return
+        selected_rows = set(item.row() for item in self.table.selectedItems())
+        # 检测会重建控件，先保存配置，结束后重新加载
+        self.window.save_config()
+        reports = []
+        for row in sorted(selected_rows):
+            plugin_name = self.table.item(row, 0).data(Qt.UserRole)
+            record = self.plugin_manager.registry.get(plugin_name)
+            if record is None:
+                continue
+            classes = [self.plugin_manager.get_plugin(name) for name in record.widgets]
+            classes = [cls for cls in classes if cls is not None]
+            if not classes:
+                reports.append(f"{plugin_name}: 没有可创建的控件")
+                continue
+
+            # 已启用的插件先移除，检测期间不与检测创建的实例同时存在，结束后放回原来的位置
+            enabled = [(plugin_area.index_of(cls), cls) for cls in classes if plugin_area.has_plugin(cls)]
+            for _, cls in enabled:
+                plugin_area.remove_plugin(cls)
+            self._flush_deleted()
+
+            def cycle():
+                # 直接创建控件（标签页模式下 add_plugin 不会立即创建）
+                for cls in classes:
+                    plugin_area.cycle_plugin(cls)
+                    self._flush_deleted()
+
+            try:
+                total, top = memory_tracker.leak_check(self.plugin_manager.plugin_path(plugin_name), cycle)
+            except Exception as e:
+                logger_manager.logger.error(f"插件 {plugin_name} 泄漏检测失败: {e}")
+                reports.append(f"{plugin_name}: 检测失败 {e}")
+                continue
+            finally:
+                for index, cls in sorted(enabled, key=lambda item: item[0]):
+                    plugin_area.add_plugin(cls, index)
+            lines = [f"{plugin_name}: 增长 {format_size(total)}"]
+            lines += [f"    {location}  {format_size(size)}  {count:+d} 个对象" for location, size, count in top]
+            reports.append('\n'.join(lines))
+            logger_manager.logger.info('\n'.join(lines))
+        self.window.load_config()
+        self._fill_memory_info()
+        if reports:
+            QMessageBox.information(self, '泄漏检测', '\n\n'.join(reports))
+
+    def _flush_deleted(self):
+        """立即执行 deleteLater，使控件在统计前真正销毁"""
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        QApplication.processEvents()
+
     def _perform_updates(self, plugins_to_update, install_plugins=False):
         """执行更新操作"""
         root_dir = Path(__file__).resolve().parent.parent
@@ -212,7 +414,7 @@ class VersionDialog(QDialog):
                 if install_plugins:
                     update_info = plugin
                 else:
-                    update_info = get_json(plugin['update_url'], timeout=5)
+                    update_info = get_json(plugin['update_url'], use_cache=True, timeout=5)
                 # 下载新版本
                 download_url = update_info['download_url']
                 plugin_name = update_info['plugin_name']
@@ -229,8 +431,14 @@ class VersionDialog(QDialog):
             # 更新进度条
             progress_bar.setValue(index + 1)
 
+        # 能热更新的插件立即生效，其余写入更新信息待重启后安装
+        json_write["install_plugins"] = self._hot_reload_plugins(json_write["install_plugins"])
         # 写入更新信息到配置文件
         self._write_update_info(json_write)
+        if not json_write["install_plugins"]:
+            self._fill_plugin_info()
+            QMessageBox.information(self, '提示', '插件已更新，无需重启')
+            return
         
         if json_write:  # 检查 json_write 是否不为空
             reply = QMessageBox.question(self, '提示', 
@@ -241,6 +449,32 @@ class VersionDialog(QDialog):
                 self._restart_app()
                 
 
+    def _hot_reload_plugins(self, install_plugins):
+        """热更新已下载的插件
+        Args:
+            install_plugins: [{插件名: 更新包路径}]
+        Returns:
+            list: 无法热更新、需要重启安装的插件
+        """
+        if not install_plugins or not hasattr(self.window, 'hot_reload_plugin'):
+            return install_plugins
+        reply = QMessageBox.question(self, '提示',
+                                     '是否立即热更新插件（无需重启程序）？\npyd 插件仍需重启后生效。',
+                                     QMessageBox.StandardButton.Yes |
+                                     QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return install_plugins
+        pending = []
+        for plugin in install_plugins:
+            plugin_name, file_path = list(plugin.items())[0]
+            # 先销毁旧的插件实例再解压，避免实例仍在使用插件目录中的文件
+            if (self.plugin_manager.can_hot_reload(plugin_name)
+                    and self.window.hot_reload_plugin(
+                        plugin_name, lambda name=plugin_name, path=file_path: apply_plugin_update(name, path))):
+                continue
+            pending.append(plugin)
+        return pending
+
     def _write_update_info(self, json_write):
         """写入更新信息到配置文件"""
         logger_manager.logger.debug(f"写入更新信息: {PLUGIN_UPDATE_CACHE_DIR}/update_info.json")
@@ -315,7 +549,6 @@ class VersionDialog(QDialog):
     def uninstall_selected_plugins(self):
         """卸载选中的插件"""
         selected_rows = set(item.row() for item in self.table.selectedItems())
-        plugins = self.plugin_manager.get_plugin_info_list()
         
         if not selected_rows:
             QMessageBox.information(self, "提示", "没有选中需要卸载的插件")
@@ -328,7 +561,7 @@ class VersionDialog(QDialog):
         
         if reply == QMessageBox.StandardButton.Yes:
             for row in selected_rows:
-                plugin_info = plugins[row]
+                plugin_info = self._plugin_info(row)
                 self._perform_uninstall(plugin_info)  # 执行卸载逻辑
 
     def _perform_uninstall(self, plugin_info):
@@ -0,0 +1,307 @@
+# 控件配置绑定
+# 控件在创建后（插件添加时）绑定一次，预先算好配置键和处理函数，
+# 保存和读取配置时只遍历已绑定的控件，不再每次递归整个控件树
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PySide2.QtWidgets import (QCheckBox, QComboBox, QLineEdit, QRadioButton,
+                               QSpinBox, QWidget)
+
+
+class ConfigHandler:
+    """配置处理类
+
+    处理函数签名为 handler(widget, load_data, save_data, name)：
+    load_data 不为 None 时从中读取 name 的值设置到控件，否则把控件的值写入 save_data[name]。
+    插件可以用 ConfigHandler.register() 为自定义控件类型注册处理函数。
+    """
+    _handlers: Dict[type, Tuple[Callable, Optional[str], Optional[Callable]]] = {}
+    _type_cache: Dict[type, Tuple[Optional[Callable], Optional[str], Optional[Callable]]] = {}
+
+    @classmethod
+    def register(cls, widget_type: type, handler: Callable, signal: Optional[str] = None,
+                 default: Optional[Callable] = None):
+        """注册控件类型的处理函数，子类优先使用最接近的类型的处理函数
+        Args:
+            signal: 值变化时发出的信号名，用于自动保存
+            default: default(widget) 返回配置中没有该键时设置的值，用于比较是否需要修改
+        """
+        cls._handlers[widget_type] = (handler, signal, default)
+        cls._type_cache.clear()
+
+    @classmethod
+    def lookup(cls, widget_type: type) -> Tuple[Optional[Callable], Optional[str], Optional[Callable]]:
+        """按继承顺序查找处理函数、变化信号和默认值，结果按类型缓存"""
+        try:
+            return cls._type_cache[widget_type]
+        except KeyError:
+            pass
+        result = (None, None, None)
+        for base in widget_type.__mro__:
+            if base in cls._handlers:
+                result = cls._handlers[base]
+                break
+        cls._type_cache[widget_type] = result
+        return result
+
+    @classmethod
+    def handler_for(cls, widget_type: type) -> Optional[Callable]:
+        return cls.lookup(widget_type)[0]
+
+    @staticmethod
+    def process_widget(widget: QWidget, load_data: Optional[Dict] = None, save_data: Optional[Dict] = None, widget_name: str = '') -> Dict:
+        handler = ConfigHandler.handler_for(type(widget))
+        if handler is not None:
+            return handler(widget, load_data, save_data, widget_name)
+        return save_data or {}
+
+    @staticmethod
+    def _handle_line_edit(widget: QLineEdit, load_data: Optional[Dict], save_data: Optional[Dict], name: str) -> Dict:
+        if load_data is not None:
+            widget.setText(str(load_data.get(name, '')))
+        elif save_data is not None:
+            save_data[name] = widget.text()
+        return save_data or {}
+
+    @staticmethod
+    def _handle_checkbox(widget: QCheckBox, load_data: Optional[Dict], save_data: Optional[Dict], name: str) -> Dict:
+        if load_data is not None:
+            widget.setChecked(load_data.get(name, False))
+        elif save_data is not None:
+            save_data[name] = widget.isChecked()
+        return save_data or {}
+
+    @staticmethod
+    def _handle_radio(widget: QRadioButton, load_data: Optional[Dict], save_data: Optional[Dict], name: str) -> Dict:
+        if load_data is not None:
+            widget.setChecked(load_data.get(name, False))
+        elif save_data is not None:
+            save_data[name] = widget.isChecked()
+        return save_data or {}
+
+    @staticmethod
+    def _handle_combobox(widget: QComboBox, load_data: Optional[Dict], save_data: Optional[Dict], name: str) -> Dict:
+        if load_data is not None:
+            index = load_data.get(name, 0)
+            widget.setCurrentIndex(index)
+        elif save_data is not None:
+            save_data[name] = widget.currentIndex()
+        return save_data or {}
+
+    @staticmethod
+    def _handle_spinbox(widget: QSpinBox, load_data: Optional[Dict], save_data: Optional[Dict], name: str) -> Dict:
+        if load_data is not None:
+            widget.setValue(load_data.get(name, widget.minimum()))
+        elif save_data is not None:
+            save_data[name] = widget.value()
+        return save_data or {}
+
+
+ConfigHandler.register(QLineEdit, ConfigHandler._handle_line_edit, 'textChanged', lambda widget: '')
+ConfigHandler.register(QCheckBox, ConfigHandler._handle_checkbox, 'toggled', lambda widget: False)
+ConfigHandler.register(QRadioButton, ConfigHandler._handle_radio, 'toggled', lambda widget: False)
+ConfigHandler.register(QComboBox, ConfigHandler._handle_combobox, 'currentIndexChanged', lambda widget: 0)
+ConfigHandler.register(QSpinBox, ConfigHandler._handle_spinbox, 'valueChanged', lambda widget: widget.minimum())
+
+_MISSING = object()
+
+
+def _same_value(current, target):
+    # 配置读回的值可能是文本（如 QLineEdit 中的数字）
+    return current == target or str(current) == str(target)
+
+
+def _load_key(key):
+    """配置文件读回的键：configparser 会把节内的键转成小写"""
+    if '.' in key:
+        section, name = key.split('.', 1)
+        return f"{section}.{name.lower()}"
+    return key.lower()
+
+
+@dataclass
+class WidgetBinding:
+    key: str  # 保存时使用的键，插件控件为 插件名.控件名
+    load_key: str  # 从配置文件读回时的键
+    widget: QWidget
+    handler: Callable
+    default: Optional[Callable] = None
+
+
+class WidgetBindings:
+    """已绑定配置的控件，按根控件（主窗口或插件实例）分组
+
+    on_changed: 已绑定的控件值被用户修改时调用，读取配置时不调用
+    """
+    def __init__(self):
+        self._groups: Dict[int, List[WidgetBinding]] = {}
+        self._roots: Dict[int, QWidget] = {}
+        self.on_changed: Optional[Callable] = None
+        self._loading = False
+
+    def bind_tree(self, root: QWidget, stop_at_plugins: bool = False) -> int:
+        """遍历一次 root 的控件树，绑定有 objectName 且有处理函数的控件
+        Args:
+            root: 主窗口或插件实例，已绑定时重新绑定
+            stop_at_plugins: 遇到插件实例时不进入（插件在添加时单独绑定）
+        Returns:
+            int: 绑定的控件数
+        """
+        bindings = []
+        # (控件, 所属插件名)，插件名取自最近的带 plugin_name 的祖先
+        stack = [(root, '')]
+        while stack:
+            widget, plugin_name = stack.pop()
+            self._bind_widget(bindings, widget, plugin_name)
+            child_plugin = getattr(widget, 'plugin_name', plugin_name)
+            for child in reversed(widget.children()):
+                if not child.isWidgetType():
+                    continue
+                if stop_at_plugins and hasattr(child, 'plugin_name'):
+                    continue
+                stack.append((child, child_plugin))
+        self._groups[id(root)] = bindings
+        self._roots[id(root)] = root
+        return len(bindings)
+
+    def bind(self, root: QWidget, widget: QWidget, key: Optional[str] = None):
+        """单独绑定插件创建后动态添加的控件
+        Args:
+            root: 所属的插件实例
+            key: 配置键，默认为 插件名.objectName
+        """
+        bindings = self._groups.setdefault(id(root), [])
+        self._roots[id(root)] = root
+        if key is None:
+            plugin_name = getattr(root, 'plugin_name', '')
+            self._bind_widget(bindings, widget, plugin_name)
+        else:
+            self._add_binding(bindings, widget, key)
+
+    def _bind_widget(self, bindings, widget, plugin_name):
+        widget_name = widget.objectName()
+        # qt_ 开头的是 Qt 内部子控件（如 QSpinBox 的输入框）
+        if not widget_name or widget_name.startswith('qt_'):
+            return
+        self._add_binding(bindings, widget, f"{plugin_name}.{widget_name}" if plugin_name else widget_name)
+
+    def _add_binding(self, bindings, widget, key):
+        handler, signal, default = ConfigHandler.lookup(type(widget))
+        if handler is None:
+            return
+        bindings.append(WidgetBinding(key, _load_key(key), widget, handler, default))
+        if signal:
+            getattr(widget, signal).connect(self._on_widget_changed)
+
+    def _on_widget_changed(self, *args):
+        if not self._loading and self.on_changed is not None:
+            self.on_changed()
+
+    def unbind(self, root: QWidget):
+        self._groups.pop(id(root), None)
+        self._roots.pop(id(root), None)
+
+    def is_bound(self, root: QWidget) -> bool:
+        return id(root) in self._groups
+
+    def process(self, roots: Optional[List[QWidget]] = None, load_data: Optional[Dict] = None,
+                save_data: Optional[Dict] = None) -> Dict:
+        """读取或保存已绑定控件的配置
+        Args:
+            roots: 只处理这些根控件的绑定，None 为全部
+        """
+        if save_data is None:
+            save_data = {}
+        if roots is None:
+            groups = list(self._groups.values())
+        else:
+            groups = [self._groups.get(id(root), []) for root in roots]
+        self._loading = load_data is not None
+        try:
+            for bindings in groups:
+                self._process_group(bindings, load_data, save_data)
+        finally:
+            self._loading = False
+        return save_data
+
+    def apply(self, load_data: Dict, roots: Optional[List[QWidget]] = None,
+              reset_missing: bool = True) -> Dict[QWidget, List[str]]:
+        """读取配置，只修改值与配置不同的控件
+
+        根控件实现了 plugin_config_applied(keys) 时，修改期间屏蔽控件信号，
+        全部修改完成后调用一次 plugin_config_applied，参数为修改过的配置键；
+        没有实现时控件照常发出信号。
+        Args:
+            reset_missing: 配置中没有的键是否恢复默认值，False 时保持不变
+        Returns:
+            dict: {根控件: 修改过的配置键}
+        """
+        if roots is None:
+            roots = list(self._roots.values())
+        changed = {}
+        self._loading = True
+        try:
+            for root in roots:
+                bindings = self._groups.get(id(root), [])
+                pending = []
+                for binding in bindings:
+                    name = self._load_name(binding, load_data)
+                    target = load_data.get(name, _MISSING)
+                    if target is _MISSING:
+                        if not reset_missing:
+                            continue
+                        if binding.default is not None:
+                            target = binding.default(binding.widget)
+                    current = {}
+                    try:
+                        binding.handler(binding.widget, None, current, name)
+                    except RuntimeError:
+                        continue
+                    if target is not _MISSING and _same_value(current.get(name, _MISSING), target):
+                        continue
+                    pending.append(binding)
+                if not pending:
+                    continue
+                hook = getattr(root, 'plugin_config_applied', None)
+                blocked = [binding.widget.blockSignals(True) for binding in pending] if hook else []
+                try:
+                    self._process_group(pending, load_data, None)
+                finally:
+                    for binding, was_blocked in zip(pending, blocked):
+                        binding.widget.blockSignals(was_blocked)
+                keys = [binding.key for binding in pending]
+                changed[root] = keys
+                if hook:
+                    try:
+                        hook(keys)
+                    except Exception as e:
+                        print(f"插件 {root.__class__.__name__} plugin_config_applied 失败: {str(e)}")
+        finally:
+            self._loading = False
+        return changed
+
+    @staticmethod
+    def _load_name(binding, load_data):
+        if load_data is None:
+            return binding.key
+        if binding.key in load_data:
+            # 内存中刚保存的配置使用原始大小写
+            return binding.key
+        return binding.load_key
+
+    def _process_group(self, bindings, load_data, save_data):
+        dead = []
+        for binding in bindings:
+            name = self._load_name(binding, load_data)
+            try:
+                binding.handler(binding.widget, load_data, save_data, name)
+            except RuntimeError:
+                # 控件已被销毁
+                dead.append(binding)
+        for binding in dead:
+            if binding in bindings:
+                bindings.remove(binding)
+
+
+# 全局单例
+widget_bindings = WidgetBindings()
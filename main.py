@@ -1,25 +1,40 @@
+import multiprocessing
 import os
 import sys
 
 from gui.main_window import MainWindow
 from PySide2.QtWidgets import QApplication
 
-from utils.config import ConfigManager
+from utils.async_loop import install_asyncio
+from utils.config import create_config_manager
 from utils.install import install_plugin_update
+from utils.memory_profiler import memory_tracker
+from utils.tracer import tracer
 
 os.environ['QT_QPA_PLATFORM_PLUGIN_PATH'] = os.path.join(os.path.dirname(__file__), 'Lib', 'site-packages', 'PySide2', 'plugins')
 
 def main():
     logs_dir = os.path.join(os.path.dirname(__file__), 'logs')
     os.makedirs(logs_dir, exist_ok=True)  # 如果文件夹已存在，不会报错
-    app = QApplication(sys.argv)
-    config_manager = ConfigManager()
-    window = MainWindow(config_manager)
+    with tracer.span('QApplication'):
+        app = QApplication(sys.argv)
+    # asyncio 事件循环与 Qt 事件循环在同一线程中交替运行
+    async_bridge = install_asyncio()
+    with tracer.span('加载配置'):
+        config_manager = create_config_manager()
+    # 开启后可在插件管理中查看各插件的 Python 内存
+    if config_manager.get('debug', 'tracemalloc', 'false').lower() == 'true':
+        memory_tracker.start()
+    with tracer.span('创建主窗口'):
+        window = MainWindow(config_manager)
     window.show()
     
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    async_bridge.close()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     try:
         msg = install_plugin_update()
         if msg:
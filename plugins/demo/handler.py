@@ -1,5 +1,7 @@
-from .worker import demoWorker
+from .worker import demo_task
 from PySide2.QtCore import QObject, Signal
+from utils.signal_coalescer import SignalCoalescer
+from utils.task_scheduler import task_scheduler
 
 class demoHandler(QObject):
     update_status_signal = Signal(str)
@@ -7,23 +9,31 @@ class demoHandler(QObject):
     def __init__(self, ui):
         super().__init__()
         self.ui = ui
-        self.worker = demoWorker()
-        self.worker.finished.connect(self.on_task_finished)
-        self.worker.progress.connect(self.update_progress)
+        # 任务的所属插件，插件卸载时由 task_scheduler.cancel_owner() 取消
+        self.owner = getattr(ui, 'plugin_name', 'demo')
+        self.task = None
+        # 进度更新经合并器按帧刷新，避免高频更新堵塞事件队列
+        self.coalescer = SignalCoalescer(self)
 
         self.ui.button_start.clicked.connect(self.start_task)
         self.ui.button_stop.clicked.connect(self.stop_task)  # 停止按钮
 
     def start_task(self):
+        if self.task is not None:
+            return
         self.update_status_signal.emit("Status: Running...")
-        self.worker._running = True
-        self.worker.start()  # 启动工作线程
+        self.task = task_scheduler.submit(
+            demo_task, name="演示任务", owner=self.owner,
+            on_progress=self.coalescer.latest(self.update_progress), on_finished=self.on_task_finished)
+        self.task.signals.cancelled.connect(self.on_task_finished)
 
     def stop_task(self):
-        self.worker.stop()  # 停止工作线程
+        if self.task is not None:
+            task_scheduler.cancel(self.task.task_id)  # 任务检查取消令牌后结束
         self.update_status_signal.emit("Status: Stopped")
 
-    def on_task_finished(self):
+    def on_task_finished(self, *args):
+        self.task = None
         self.update_status_signal.emit("Status: Finished")
 
     def update_progress(self, status):
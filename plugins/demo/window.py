@@ -1,4 +1,5 @@
 from PySide2.QtWidgets import QLabel, QPushButton, QVBoxLayout, QWidget
+from utils.task_scheduler import task_scheduler
 from .handler import demoHandler
 
 
@@ -12,4 +13,8 @@ class demo(QWidget):
         layout.addWidget(self.button_start)
         layout.addWidget(self.button_stop)
         layout.addWidget(self.status_label)
-        self.handler = demoHandler(self)
\ No newline at end of file
+        self.handler = demoHandler(self)
+
+    def plugin_unload(self):
+        """插件关闭或热更新前调用，取消插件提交的任务"""
+        task_scheduler.cancel_owner(self.handler.owner)
\ No newline at end of file
@@ -1,26 +1,16 @@
-import time
-
-from PySide2.QtCore import QThread, Signal
 from utils.logger_manager import logger_manager
 
+logger = logger_manager.get_logger(__name__)  # 插件的日志记录器 app_logger.demo，可显示到主窗口的日志框
 
-class demoWorker(QThread):
-    finished = Signal()  # 用于发射任务完成信号
-    progress = Signal(str)  # 用于更新进度信息
-    
-    def __init__(self):
-        super().__init__()
-        self._running = False  # 线程运行标志
-        self.logger = logger_manager.logger # 全局可用的日志记录器 可显示到主窗口的日志框
-
-    def run(self):
-        while self._running:
-            # 模拟耗时操作
-            self.logger.info("开始任务")
-            time.sleep(1)  # 每秒执行一次
-            self.progress.emit("Working...")  # 更新进度
-        self.logger.info("任务完成")
-        self.finished.emit()  # 任务完成后发出信号
 
-    def stop(self):
-        self._running = False  # 停止线程
\ No newline at end of file
+def demo_task(ctx):
+    """演示任务，每秒报告一次进度，直到被取消
+    在任务调度器的线程池中运行，ctx 见 utils.task_scheduler.TaskContext
+    """
+    while not ctx.token.is_cancelled():
+        # 模拟耗时操作
+        logger.info("开始任务")
+        if ctx.token.wait(1):  # 每秒执行一次，取消时立即结束
+            break
+        ctx.progress("Working...")  # 更新进度
+    logger.info("任务完成")
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+# 从任意目录运行 pytest 时都能导入项目模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app_logger(monkeypatch):
+    """不写日志文件的 app_logger，日志由 caplog 捕获"""
+    import logging
+
+    from utils.logger_manager import LOGGER_NAME, logger_manager
+    monkeypatch.setattr(logger_manager, '_logger', logging.getLogger(LOGGER_NAME))
+    return logger_manager.logger
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    """无界面的 QApplication，未安装 PySide2 时跳过"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    QtWidgets = pytest.importorskip('PySide2.QtWidgets')
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def wait_until(qapp):
+    """运行 Qt 事件循环直到 predicate() 为真或超时，返回 predicate() 的结果"""
+    from PySide2.QtCore import QEventLoop, QTimer
+
+    def wait(predicate, timeout=5.0):
+        if predicate():
+            return True
+        loop = QEventLoop()
+        poll = QTimer()
+        poll.timeout.connect(lambda: predicate() and loop.quit())
+        poll.start(5)
+        QTimer.singleShot(int(timeout * 1000), loop.quit)
+        loop.exec_()
+        poll.stop()
+        return predicate()
+    return wait
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('PySide2')
+
+from PySide2.QtCore import QObject, Signal  # noqa: E402
+
+from utils import async_loop  # noqa: E402
+
+
+class Emitter(QObject):
+    fired = Signal(int)
+
+
+@pytest.fixture
+def bridge(qapp):
+    bridge = async_loop.install_asyncio()
+    yield bridge
+    bridge.close()
+    async_loop._bridge = None
+
+
+def _run(wait_until, coro, timeout=10.0):
+    task = async_loop.run_coroutine(coro)
+    assert wait_until(task.done, timeout), "协程没有在超时前完成"
+    return task.result()
+
+
+def test_uses_qt_selector(bridge):
+    assert isinstance(bridge.selector, async_loop.QtSelector)
+
+
+def test_tcp_echo_round_trip(bridge, wait_until):
+    async def handle(reader, writer):
+        while True:
+            data = await reader.read(100)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+        writer.close()
+
+    async def client(port, i):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        replies = []
+        for n in range(5):
+            message = f'{i}-{n}'.encode()
+            writer.write(message)
+            await writer.drain()
+            replies.append(await reader.readexactly(len(message)))
+        writer.close()
+        return replies
+
+    async def main():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await asyncio.gather(*(client(port, i) for i in range(50)))
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    results = _run(wait_until, main())
+    assert results == [[f'{i}-{n}'.encode() for n in range(5)] for i in range(50)]
+
+
+def test_idle_loop_does_not_poll(bridge, wait_until):
+    steps = []
+    original = bridge._step
+    bridge._step = lambda: (steps.append(1), original())
+    bridge._timer.timeout.disconnect()
+    bridge._timer.timeout.connect(bridge._step)
+    # 让已排队的回调执行完
+    _run(wait_until, asyncio.sleep(0))
+    steps.clear()
+    wait_until(lambda: False, timeout=0.3)
+    assert len(steps) <= 1
+
+
+def test_call_soon_threadsafe_wakes_idle_loop(bridge, wait_until):
+    loop = bridge.loop
+    future = loop.create_future()
+    started = time.monotonic()
+    threading.Timer(0.1, lambda: loop.call_soon_threadsafe(future.set_result, 'woken')).start()
+    assert wait_until(future.done, 2.0)
+    assert future.result() == 'woken'
+    assert time.monotonic() - started < 0.5
+
+
+def test_timer_callback_fires_on_time(bridge, wait_until):
+    async def sleeper():
+        started = time.monotonic()
+        await asyncio.sleep(0.2)
+        return time.monotonic() - started
+
+    elapsed = _run(wait_until, sleeper())
+    assert 0.19 <= elapsed < 0.4
+
+
+def test_wait_signal_from_worker_thread(bridge, wait_until):
+    emitter = Emitter()
+    threading.Timer(0.05, lambda: emitter.fired.emit(7)).start()
+    assert _run(wait_until, async_loop.wait_signal(emitter.fired, timeout=2)) == 7
+
+
+def test_wait_signal_timeout_disconnects(bridge, wait_until):
+    emitter = Emitter()
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await async_loop.wait_signal(emitter.fired, timeout=0.05)
+        return True
+
+    assert _run(wait_until, main())
+    # 处理函数已断开，之后的信号不会设置已完成的 future
+    emitter.fired.emit(1)
+
+
+def test_wait_signal_cancel(bridge, wait_until):
+    emitter = Emitter()
+    task = async_loop.run_coroutine(async_loop.wait_signal(emitter.fired))
+    wait_until(lambda: False, timeout=0.05)
+    task.cancel()
+    assert wait_until(task.done, 2.0)
+    assert task.cancelled()
+    emitter.fired.emit(1)
+    wait_until(lambda: False, timeout=0.05)
+
+
+def test_task_created_while_idle_runs(bridge, wait_until):
+    # 等事件循环空闲（没有定时器）后再从 Qt 侧创建任务
+    wait_until(lambda: False, timeout=0.05)
+    assert not bridge._timer.isActive()
+    assert _run(wait_until, asyncio.sleep(0, 'done'), timeout=1.0) == 'done'
@@ -0,0 +1,130 @@
+import configparser
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from utils.config import ConfigManager
+
+
+class ConfigManagerTest(unittest.TestCase):
+    """脏节增量生成、原子写入和合并的自动保存"""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.config_file = os.path.join(self.tmp.name, 'config.ini')
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            f.write("[DEFAULT]\nversion = 1.0\n\n[window]\nwidth = 1400\n\n[log]\nfile_level = info\n\n")
+
+    def _open(self, autosave_delay=None):
+        manager = ConfigManager(self.config_file, autosave_delay=autosave_delay)
+        self.addCleanup(manager.close)
+        return manager
+
+    def _read(self):
+        with open(self.config_file, encoding='utf-8') as f:
+            return f.read()
+
+    def _parse(self):
+        parser = configparser.ConfigParser()
+        parser.read(self.config_file, encoding='utf-8')
+        return parser
+
+    def test_output_matches_configparser(self):
+        manager = self._open()
+        manager.set('window', 'height', 800)
+        manager.set('plugins', 'demo', 'true')
+        manager.save()
+        expected = configparser.ConfigParser()
+        expected.read_dict({'DEFAULT': {'version': '1.0'}, 'window': {'width': '1400', 'height': '800'},
+                            'log': {'file_level': 'info'}, 'plugins': {'demo': 'true'}})
+        self.assertEqual(self._parse(), expected)
+        self.assertNotIn('version', dict(manager.items('window')))
+
+    def test_only_dirty_sections_are_regenerated(self):
+        manager = self._open()
+        manager.set('window', 'height', 800)
+        manager.save()
+        # 没有修改的节沿用上次写入的文本
+        manager._section_text['window'] = '[window]\nwidth = cached\n\n'
+        manager.set('log', 'file_level', 'debug')
+        manager.save()
+        parser = self._parse()
+        self.assertEqual(parser.get('window', 'width'), 'cached')
+        self.assertEqual(parser.get('log', 'file_level'), 'debug')
+
+    def test_unchanged_value_does_not_write(self):
+        manager = self._open()
+        manager.set('window', 'width', 1400)
+        manager.update({'window.width': 1400, 'log.file_level': 'info'})
+        with mock.patch.object(manager, '_commit') as commit:
+            manager.save()
+        self.assertEqual(manager._dirty, set())
+        # 只写入 update 创建的 window_ui 节
+        commit.assert_called_once()
+        with mock.patch.object(manager, '_commit') as commit:
+            manager.set('log', 'file_level', 'info')
+            manager.save()
+        commit.assert_not_called()
+
+    def test_remove_marks_section_dirty(self):
+        manager = self._open()
+        manager.remove('log', 'file_level')
+        manager.remove('log', 'missing')
+        manager.save()
+        self.assertFalse(self._parse().has_option('log', 'file_level'))
+
+    def test_failed_replace_keeps_original_file(self):
+        original = self._read()
+        manager = self._open()
+        manager.set('window', 'width', 1)
+        with mock.patch('utils.config.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                manager.save()
+        self.assertEqual(self._read(), original)
+        # 失败后所有节重新生成，下次保存写入完整的修改
+        manager.save()
+        self.assertEqual(self._parse().get('window', 'width'), '1')
+        self.assertFalse(os.path.exists(self.config_file + '.tmp'))
+
+    def test_failed_write_keeps_original_file(self):
+        original = self._read()
+        manager = self._open()
+        manager.set('log', 'file_level', 'debug')
+        with mock.patch('utils.config.os.fsync', side_effect=OSError('io error')):
+            with self.assertRaises(OSError):
+                manager.save()
+        self.assertEqual(self._read(), original)
+
+    def test_autosave_merges_changes(self):
+        manager = self._open(autosave_delay=0.1)
+        with mock.patch.object(ConfigManager, '_commit', autospec=True,
+                               side_effect=ConfigManager._commit) as commit:
+            for width in range(10):
+                manager.set('window', 'width', width)
+            self.assertEqual(self._parse().get('window', 'width'), '1400')
+            deadline = time.monotonic() + 2
+            while commit.call_count == 0 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            time.sleep(0.15)
+        self.assertEqual(commit.call_count, 1)
+        self.assertEqual(self._parse().get('window', 'width'), '9')
+
+    def test_close_saves_pending_changes(self):
+        manager = ConfigManager(self.config_file, autosave_delay=60)
+        manager.set('window', 'width', 1)
+        manager.close()
+        self.assertEqual(self._parse().get('window', 'width'), '1')
+
+    def test_missing_file_creates_default(self):
+        os.remove(self.config_file)
+        manager = self._open()
+        parser = self._parse()
+        self.assertEqual(parser.get('window', 'width'), '1400')
+        self.assertIn('created_at', parser.defaults())
+        self.assertEqual(manager.items('window_ui'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from utils.config_sqlite import SqliteConfigManager
+
+
+class SqliteConfigKeyCaseTest(unittest.TestCase):
+    """从 INI 导入后，键与 configparser 一样不区分大小写"""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.ini_file = os.path.join(self.tmp.name, 'config.ini')
+        self.db_file = os.path.join(self.tmp.name, 'config.db')
+        with open(self.ini_file, 'w', encoding='utf-8') as f:
+            f.write("[plugins]\nMyPlugin = true\nOtherPlugin = false\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _open(self):
+        return SqliteConfigManager(self.db_file, ini_file=self.ini_file, autosave_delay=None)
+
+    def test_migrated_keys_round_trip(self):
+        manager = self._open()
+        try:
+            self.assertEqual(manager.get('plugins', 'MyPlugin', 'false'), 'true')
+            self.assertEqual(manager.get('plugins', 'myplugin', 'false'), 'true')
+            self.assertEqual(sorted(manager.items('plugins')), [('myplugin', 'true'), ('otherplugin', 'false')])
+
+            manager.set('plugins', 'OtherPlugin', True)
+            manager.remove('plugins', 'MYPLUGIN')
+            manager.save()
+        finally:
+            manager.close()
+
+        manager = self._open()
+        try:
+            self.assertEqual(manager.items('plugins'), [('otherplugin', 'true')])
+            self.assertEqual(manager.get('plugins', 'OtherPlugin'), 'true')
+            self.assertIsNone(manager.get('plugins', 'MyPlugin'))
+        finally:
+            manager.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+try:
+    import requests  # noqa: F401
+except ImportError:
+    raise unittest.SkipTest('需要 requests')
+
+from utils import requests as http
+from utils.logger_manager import LOGGER_NAME, logger_manager
+
+
+class MetadataHandler(BaseHTTPRequestHandler):
+    """返回带 ETag 的 JSON，If-None-Match 匹配时返回 304"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        body = json.dumps(server.payload).encode()
+        etag = f'"{server.version}"'
+        if server.etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if server.etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), MetadataHandler)
+        self.server.daemon_threads = True
+        self.server.requests = []
+        self.server.payload = {'version': '1.0'}
+        self.server.version = 1
+        self.server.etag = True
+        self.server.status = 200
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/plugin.json'
+        # 独立的会话和缓存，日志不写文件
+        for target, name, value in ((http, '_session', None), (http, 'http_cache', self._cache()),
+                                    (logger_manager, '_logger', logging.getLogger(LOGGER_NAME))):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: http._session is not None and http._session.close())
+
+    def _cache(self, ttl=0, offline_ttl=3600, max_mb=20):
+        return http.HttpCache(os.path.join(self.tmp.name, 'http'), ttl, offline_ttl, max_mb)
+
+    def _get(self):
+        return http.get_json(self.url, use_cache=True, timeout=5)
+
+    def test_revalidates_with_etag(self):
+        self.assertEqual(self._get(), {'version': '1.0'})
+        self.assertNotIn('If-None-Match', self.server.requests[0])
+        checked = http.http_cache.get(self.url)['checked']
+        time.sleep(0.01)
+        self.assertEqual(self._get(), {'version': '1.0'})
+        self.assertEqual(self.server.requests[1].get('If-None-Match'), '"1"')
+        # 304 只更新确认时间
+        entry = http.http_cache.get(self.url)
+        self.assertGreater(entry['checked'], checked)
+        self.assertEqual(json.loads(entry['body']), {'version': '1.0'})
+
+    def test_changed_content_replaces_entry(self):
+        self._get()
+        self.server.version = 2
+        self.server.payload = {'version': '2.0'}
+        self.assertEqual(self._get(), {'version': '2.0'})
+        self.assertEqual(http.http_cache.get(self.url)['etag'], '"2"')
+
+    def test_fresh_entry_skips_request(self):
+        with mock.patch.object(http.http_cache, 'ttl', 60):
+            self._get()
+            self.assertEqual(self._get(), {'version': '1.0'})
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_no_validator_and_no_ttl_is_not_cached(self):
+        self.server.etag = False
+        self._get()
+        self.assertIsNone(http.http_cache.get(self.url))
+
+    def test_server_error_falls_back_to_cache(self):
+        self._get()
+        self.server.etag = False
+        self.server.status = 500
+        self.assertEqual(self._get(), {'version': '1.0'})
+        with mock.patch.object(http.http_cache, 'offline_ttl', 0):
+            self.assertEqual(self._get(), {})
+
+    def test_unreachable_server_falls_back_to_cache(self):
+        self._get()
+        self.server.shutdown()
+        self.server.server_close()
+        http._session.close()
+        self.assertEqual(self._get(), {'version': '1.0'})
+
+
+class HttpCacheEvictionTest(unittest.TestCase):
+    """总大小超出上限时按最近使用时间删除"""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.directory = os.path.join(self.tmp.name, 'http')
+
+    def _put(self, cache, url, stamp):
+        cache.put(url, {'etag': None, 'last_modified': None, 'checked': 0, 'body': 'x' * 300})
+        os.utime(cache._path(url), (stamp, stamp))
+
+    def _urls(self, cache, urls):
+        return [url for url in urls if cache.get(url) is not None]
+
+    def test_evicts_least_recently_used(self):
+        probe = http.HttpCache(self.directory, max_mb=0)
+        self._put(probe, 'http://a/0', 0)
+        size = os.path.getsize(probe._path('http://a/0'))
+        probe.clear()
+        # 最多放下 3 个条目
+        cache = http.HttpCache(self.directory, max_mb=(size * 3 + size // 2) / (1024 * 1024))
+        urls = [f'http://a/{i}' for i in range(4)]
+        now = time.time()
+        for i, url in enumerate(urls[:3]):
+            self._put(cache, url, now - 100 + i)
+        # 读取最旧的条目，它变为最近使用
+        cache.get(urls[0])
+        self._put(cache, urls[3], now)
+        self.assertEqual(self._urls(cache, urls), [urls[0], urls[2], urls[3]])
+        self.assertLessEqual(cache._total, cache.max_bytes)
+
+    def test_existing_files_are_counted(self):
+        cache = http.HttpCache(self.directory, max_mb=0)
+        now = time.time()
+        for i in range(5):
+            self._put(cache, f'http://b/{i}', now - 100 + i)
+        size = os.path.getsize(cache._path('http://b/0'))
+        # 新的实例第一次写入时扫描目录
+        cache = http.HttpCache(self.directory, max_mb=(size * 2 + size // 2) / (1024 * 1024))
+        self._put(cache, 'http://b/new', now)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         sorted(os.path.basename(cache._path(url)) for url in ('http://b/4', 'http://b/new')))
+        self.assertEqual(cache._total, sum(cache._sizes.values()))
+
+    def test_rewrite_updates_total(self):
+        cache = http.HttpCache(self.directory)
+        cache.put('http://c/0', {'body': 'x' * 100})
+        total = cache._total
+        cache.put('http://c/0', {'body': 'x' * 10})
+        self.assertEqual(cache._total, total - 90)
+        cache.clear()
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
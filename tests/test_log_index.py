@@ -0,0 +1,179 @@
+import gzip
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from utils.log_files import compress_file
+from utils.log_index import LogIndex, match_line, query_terms
+
+LEVELS = ('INFO', 'DEBUG', 'WARNING', 'ERROR')
+MESSAGES = ('plugin demo loaded', 'request failed: timeout', 'connection reset by peer',
+            '保存配置失败', 'update_check finished in 12 ms', 'worker_thread started')
+QUERIES = [
+    {'text': 'failed'},
+    {'text': 'fail'},  # 前缀
+    {'text': 'ailed'},  # 后缀
+    {'text': 'onnectio'},  # 包含
+    {'text': 'update_check finished'},
+    {'text': '配置'},
+    {'text': '12'},  # 纯数字不索引，扫描
+    {'level': 'ERROR'},
+    {'text': 'demo', 'level': 'INFO'},
+    {'start': '10:01', 'end': '10:02'},
+    {'text': 'reset', 'level': 'WARNING', 'start': '10:00', 'end': '10:03'},
+    {'text': 'missing'},
+]
+
+
+def _line(i):
+    return f"10:{i // 60 % 60:02d}:{i % 60:02d} - {LEVELS[i % 4]} - {MESSAGES[i % len(MESSAGES)]} #{i}\n"
+
+
+class LogIndexTest(unittest.TestCase):
+    """索引查询结果与逐行扫描一致，覆盖普通文件和 .gz 归档"""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log_file = os.path.join(self.tmp.name, 'app.log')
+        self.index_dir = os.path.join(self.tmp.name, 'index')
+        self.next_line = 0
+
+    def _append(self, count):
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            for _ in range(count):
+                f.write(_line(self.next_line))
+                self.next_line += 1
+
+    def _rotate(self, compress=True, age=100):
+        archive = f"{self.log_file}.{self.next_line:08d}"
+        os.replace(self.log_file, archive)
+        stamp = time.time() - age
+        os.utime(archive, (stamp, stamp))
+        return compress_file(archive, 'gzip') if compress else archive
+
+    def _expected(self, index, text='', level=None, start=None, end=None):
+        results = []
+        for path in index.log_files():
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rb') as f:
+                data = f.read()
+            offset = 0
+            for raw in data.split(b'\n')[:-1]:
+                line = raw.decode('utf-8')
+                if match_line(line, text, level, start, end):
+                    results.append((path, offset, line))
+                offset += len(raw) + 1
+        return results
+
+    def _assert_queries(self, index):
+        for query in QUERIES:
+            with self.subTest(**query):
+                self.assertEqual(index.search(**query, limit=10 ** 6), self._expected(index, **query))
+
+    def test_query_terms(self):
+        self.assertEqual(query_terms('fail'), [('fail', 'infix')])
+        self.assertEqual(query_terms('request fail'), [('request', 'suffix'), ('fail', 'prefix')])
+        self.assertEqual(query_terms(' request '), [('request', 'exact')])
+        self.assertEqual(query_terms('保存配置'), [('保存', 'exact'), ('存配', 'exact'), ('配置', 'exact')])
+
+    def test_plain_file(self):
+        self._append(300)
+        index = LogIndex(self.log_file, self.index_dir)
+        index.update()
+        self.assertEqual(len(index.segments), 1)
+        self._assert_queries(index)
+
+    def test_unindexed_tail_is_scanned(self):
+        self._append(300)
+        index = LogIndex(self.log_file, self.index_dir)
+        index.update()
+        indexed = next(iter(index.segments.values())).indexed
+        self._append(50)
+        self._assert_queries(index)
+        index.update()
+        self.assertGreater(next(iter(index.segments.values())).indexed, indexed)
+        self._assert_queries(index)
+
+    def test_rotated_gz_keeps_index(self):
+        self._append(300)
+        index = LogIndex(self.log_file, self.index_dir)
+        index.update()
+        segment = next(iter(index.segments.values()))
+        indexed = segment.indexed
+        archive = self._rotate()
+        self.assertTrue(archive.endswith('.gz'))
+        self._append(200)
+        index.update()
+        # 归档按开头字节识别为同一段，只标记为已归档，不重新索引
+        self.assertIn(segment, index.segments.values())
+        self.assertTrue(segment.sealed)
+        self.assertEqual(segment.indexed, indexed)
+        self.assertEqual(len(index.segments), 2)
+        self._assert_queries(index)
+
+    def test_gz_indexed_from_scratch(self):
+        self._append(300)
+        self._rotate()
+        self._append(300)
+        self._rotate(age=50)
+        self._append(100)
+        index = LogIndex(self.log_file, self.index_dir)
+        index.update()
+        self.assertEqual(sum(segment.sealed for segment in index.segments.values()), 2)
+        self._assert_queries(index)
+        # 新的实例从磁盘读取索引
+        self._assert_queries(LogIndex(self.log_file, self.index_dir))
+
+    def test_limit_returns_newest(self):
+        self._append(300)
+        self._rotate()
+        self._append(300)
+        index = LogIndex(self.log_file, self.index_dir)
+        index.update()
+        expected = self._expected(index, 'failed')
+        self.assertEqual(index.search('failed', limit=5), expected[-5:])
+        self.assertEqual(index.search('failed', limit=60), expected[-60:])
+
+    def test_incremental_batches_compact(self):
+        index = LogIndex(self.log_file, self.index_dir)
+        with mock.patch('utils.log_index.LOG_INDEX_COMPACT_BATCHES', 3):
+            for _ in range(7):
+                self._append(40)
+                index.update()
+        segment = next(iter(index.segments.values()))
+        self.assertGreaterEqual(segment.generation, 2)
+        posts = [name for name in os.listdir(self.index_dir) if name.endswith('.post')]
+        self.assertEqual(posts, [os.path.basename(segment.post_path)])
+        self._assert_queries(index)
+        self._assert_queries(LogIndex(self.log_file, self.index_dir))
+
+    def test_truncated_terms_record_is_dropped(self):
+        self._append(300)
+        index = LogIndex(self.log_file, self.index_dir)
+        index.update()
+        segment = next(iter(index.segments.values()))
+        with open(segment.terms_path, 'ab') as f:
+            f.write(b'\x80\x05garbage')
+        reloaded = LogIndex(self.log_file, self.index_dir)
+        self._assert_queries(reloaded)
+        reloaded.update()
+        self._assert_queries(reloaded)
+
+    def test_removed_file_index_is_deleted(self):
+        self._append(300)
+        archive = self._rotate(compress=False)
+        self._append(300)
+        index = LogIndex(self.log_file, self.index_dir)
+        index.update()
+        self.assertEqual(len(index.segments), 2)
+        os.remove(archive)
+        index.update()
+        self.assertEqual(len(index.segments), 1)
+        keys = {name.split('.', 1)[0] for name in os.listdir(self.index_dir)}
+        self.assertEqual(keys, set(index.segments))
+
+
+if __name__ == '__main__':
+    unittest.main()
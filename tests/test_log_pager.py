@@ -0,0 +1,120 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from utils.log_files import compress_file
+from utils.log_pager import LogPager
+
+
+class Token:
+    def __init__(self, cancelled=False):
+        self.cancelled = cancelled
+
+    def is_cancelled(self):
+        return self.cancelled
+
+
+def _make_lines(count, seed=1):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        seconds = i // 3
+        lines.append(f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d} - INFO - "
+                     f"message {i} " + 'x' * rng.randrange(0, 120))
+        if i % 50 == 7:
+            # 异常堆栈等没有时间前缀的续行
+            lines.append("Traceback (most recent call last):")
+            lines.append(f"  ValueError: 错误 {i}")
+    return lines
+
+
+class LogPagerTest(unittest.TestCase):
+    """稀疏行索引、按行读取和按时间定位，普通文件和 .gz 文件结果一致"""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch('utils.log_pager.BLOCK_SIZE', 1024)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.lines = _make_lines(3000)
+
+    def _write(self, name, lines, compress=False):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(''.join(line + '\n' for line in lines))
+        return compress_file(path, 'gzip') if compress else path
+
+    def _open(self, path):
+        pager = LogPager(path)
+        self.addCleanup(pager.close)
+        return pager
+
+    def _expected_time(self, target):
+        if len(target) == 5:
+            target += ':00'
+        for number, line in enumerate(self.lines):
+            if line[:8] >= target and line[2:3] == ':':
+                return number
+        return None
+
+    def _check_pager(self, pager):
+        progress = []
+        self.assertFalse(pager.build_index(progress=lambda done, total: progress.append((done, total))))
+        self.assertEqual(pager.line_count, len(self.lines))
+        self.assertGreater(len(pager.offsets), 10)
+        self.assertEqual(progress[-1], (pager.size, pager.size))
+        self.assertEqual(pager.lines(0, 5), self.lines[:5])
+        for first in (0, 1, 499, 1024, len(self.lines) - 3):
+            self.assertEqual(pager.lines(first, 40), self.lines[first:first + 40])
+        self.assertEqual(pager.lines(len(self.lines) + 10, 5), [])
+        for target in ('00:00', '00:05:30', '00:12', '00:16:39', '00:16:40', '23:00'):
+            with self.subTest(target=target):
+                self.assertEqual(pager.find_time(target), self._expected_time(target))
+
+    def test_plain_file(self):
+        self._check_pager(self._open(self._write('app.log', self.lines)))
+
+    def test_gz_file(self):
+        path = self._write('app.log.1', self.lines, compress=True)
+        self.assertTrue(path.endswith('.gz'))
+        pager = self._open(path)
+        self._check_pager(pager)
+        pager.close()
+        self.assertIsNone(pager._temp)
+        # 关闭后再次读取时重新解压
+        self.assertEqual(pager.lines(10, 3), self.lines[10:13])
+
+    def test_incremental_and_partial_line(self):
+        path = self._write('app.log', self.lines[:1000])
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('00:59:59 - INFO - partial')
+        pager = self._open(path)
+        pager.build_index()
+        self.assertEqual(pager.line_count, 1000)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(' line\n' + ''.join(line + '\n' for line in self.lines[1000:]))
+        pager.build_index()
+        self.assertEqual(pager.line_count, len(self.lines) + 1)
+        self.assertEqual(pager.lines(1000, 2), ['00:59:59 - INFO - partial line', self.lines[1000]])
+
+    def test_truncation_is_reported(self):
+        path = self._write('app.log', self.lines)
+        pager = self._open(path)
+        pager.build_index()
+        self._write('app.log', self.lines[:10])
+        self.assertTrue(pager.build_index())
+        self.assertEqual(pager.lines(0, 5), [])
+        pager.reset()
+        pager.build_index()
+        self.assertEqual(pager.line_count, 10)
+
+    def test_cancel_stops_indexing(self):
+        pager = self._open(self._write('app.log', self.lines))
+        self.assertFalse(pager.build_index(Token(cancelled=True)))
+        self.assertEqual(pager.line_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import importlib.util
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+from utils.memory_profiler import PluginMemoryTracker
+
+_PLUGIN_SOURCE = """
+LEAKED = []
+
+
+def leak():
+    LEAKED.append([0] * 10000)
+
+
+def noop():
+    data = [0] * 10000
+    return len(data)
+"""
+
+
+class LeakCheckTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.plugin_path = os.path.join(self.tmp.name, 'demo_plugin')
+        os.makedirs(self.plugin_path)
+        path = os.path.join(self.plugin_path, '__init__.py')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(_PLUGIN_SOURCE)
+        spec = importlib.util.spec_from_file_location('leak_check_demo_plugin', path)
+        self.module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.module)
+        self.tracker = PluginMemoryTracker()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def tearDown(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.tmp.cleanup()
+
+    def test_reports_growth_of_leaking_cycle(self):
+        total, top = self.tracker.leak_check(self.plugin_path, self.module.leak, cycles=3)
+        self.assertGreater(total, 3 * 10000 * 8 * 0.9)
+        self.assertTrue(top)
+        self.assertIn('demo_plugin', top[0][0])
+
+    def test_no_growth_for_clean_cycle(self):
+        total, top = self.tracker.leak_check(self.plugin_path, self.module.noop, cycles=3)
+        self.assertLess(total, 10000)
+
+    def test_stops_tracing_it_started(self):
+        self.tracker.leak_check(self.plugin_path, self.module.noop)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_keeps_tracing_started_elsewhere(self):
+        tracemalloc.start()
+        self.tracker.leak_check(self.plugin_path, self.module.noop)
+        self.assertTrue(tracemalloc.is_tracing())
+
+    def test_stops_tracing_when_cycle_fails(self):
+        def cycle():
+            raise ValueError('boom')
+        with self.assertRaises(ValueError):
+            self.tracker.leak_check(self.plugin_path, cycle)
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+if __name__ == '__main__':
+    unittest.main()
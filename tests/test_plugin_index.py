@@ -0,0 +1,94 @@
+import os
+import tempfile
+import time
+import unittest
+
+from utils.plugin_index import PluginIndex
+
+
+class PluginIndexTest(unittest.TestCase):
+    """指纹命中、touch 后按哈希命中、内容变化后失效"""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.plugin_dir = os.path.join(self.tmp.name, 'plugins', 'demo')
+        os.makedirs(os.path.join(self.plugin_dir, '__pycache__'))
+        self._write('__init__.py', "PLUGIN_INFO = {'name': 'Demo'}\n")
+        self._write('window.py', "class demo: pass\n")
+        self.index_file = os.path.join(self.tmp.name, 'cache', 'plugin_index.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, text):
+        with open(os.path.join(self.plugin_dir, name), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def _touch(self, name, offset=10):
+        path = os.path.join(self.plugin_dir, name)
+        stamp = time.time() + offset
+        os.utime(path, (stamp, stamp))
+
+    def _indexed(self):
+        index = PluginIndex(self.index_file)
+        index.update('demo', 'package', self.plugin_dir, {'name': 'Demo'}, 'Demo', ['demo'])
+        index.save()
+        return PluginIndex(self.index_file)
+
+    def test_saved_entry_hits(self):
+        entry = self._indexed().lookup('demo', 'package', self.plugin_dir)
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry['widgets'], ['demo'])
+        self.assertEqual(entry['alias'], 'Demo')
+
+    def test_kind_mismatch_misses(self):
+        self.assertIsNone(self._indexed().lookup('demo', 'pyd', self.plugin_dir))
+
+    def test_touch_without_change_hits_and_refreshes_fingerprint(self):
+        index = self._indexed()
+        self._touch('window.py')
+        entry = index.lookup('demo', 'package', self.plugin_dir)
+        self.assertIsNotNone(entry)
+        index.save()
+        # 刷新后的指纹写回索引，下次直接按 mtime / 大小命中
+        reloaded = PluginIndex(self.index_file)
+        self.assertEqual(reloaded.entries['demo']['mtime'], entry['mtime'])
+
+    def test_content_change_invalidates(self):
+        index = self._indexed()
+        self._write('window.py', "class demo: value = 1\n")
+        self._touch('window.py')
+        self.assertIsNone(index.lookup('demo', 'package', self.plugin_dir))
+
+    def test_same_size_change_invalidates(self):
+        index = self._indexed()
+        self._write('window.py', "class dema: pass\n")
+        self._touch('window.py')
+        self.assertIsNone(index.lookup('demo', 'package', self.plugin_dir))
+
+    def test_added_file_invalidates(self):
+        index = self._indexed()
+        self._write('worker.py', "")
+        self._touch('worker.py')
+        self.assertIsNone(index.lookup('demo', 'package', self.plugin_dir))
+
+    def test_bytecode_is_ignored(self):
+        index = self._indexed()
+        with open(os.path.join(self.plugin_dir, '__pycache__', 'window.cpython.pyc'), 'wb') as f:
+            f.write(b'\0' * 100)
+        self.assertIsNotNone(index.lookup('demo', 'package', self.plugin_dir))
+
+    def test_prune_removes_missing_plugins(self):
+        index = self._indexed()
+        index.prune(set())
+        index.save()
+        self.assertEqual(PluginIndex(self.index_file).entries, {})
+
+    def test_other_version_is_discarded(self):
+        self._indexed()
+        with open(self.index_file, 'w', encoding='utf-8') as f:
+            f.write('{"version": 0, "plugins": {"demo": {}}}')
+        self.assertEqual(PluginIndex(self.index_file).entries, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from utils.plugin_registry import PluginRegistry
+
+
+class PluginRegistryTest(unittest.TestCase):
+    """generation 在登记、变更、删除时递增，行号缓存随之失效"""
+    def _register(self, registry, name, alias=None, widgets=None):
+        return registry.register(name, 'package', name, alias or name.title(), {}, widgets or [f'{name}Widget'])
+
+    def test_generation_counts_changes(self):
+        registry = PluginRegistry()
+        self.assertEqual(registry.generation, 0)
+        self._register(registry, 'a')
+        self._register(registry, 'b')
+        self.assertEqual(registry.generation, 2)
+        rows = registry.rows()
+        self.assertIs(registry.rows(), rows)
+        registry.set_classes('a', {'aWidget': object})
+        self.assertEqual(registry.generation, 2)
+        self.assertIs(registry.rows(), rows)
+        registry.remove('a')
+        self.assertEqual(registry.generation, 3)
+        self.assertEqual(registry.names(), ['b'])
+        registry.remove('missing')
+        self.assertEqual(registry.generation, 3)
+
+    def test_update_keeps_row_and_reindexes(self):
+        registry = PluginRegistry()
+        self._register(registry, 'a')
+        self._register(registry, 'b')
+        registry.set_classes('a', {'aWidget': object, 'oldWidget': object})
+        generation = registry.generation
+        record = self._register(registry, 'a', alias='Renamed', widgets=['aWidget', 'newWidget'])
+        self.assertEqual(registry.generation, generation + 1)
+        self.assertEqual(registry.names(), ['a', 'b'])
+        self.assertIsNone(registry.by_alias('A'))
+        self.assertIs(registry.by_alias('Renamed'), record)
+        self.assertIs(registry.by_widget('newWidget'), record)
+        self.assertEqual(record.classes, {'aWidget': object})
+        self.assertEqual(registry.widget_names(), ['aWidget', 'newWidget', 'bWidget'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+pytest.importorskip('PySide2')
+
+from utils.process_worker import ProcessWorker  # noqa: E402
+
+
+class CrashingWorker(ProcessWorker):
+    @staticmethod
+    def job(ctx):
+        ctx.progress('started')
+        os._exit(3)
+
+
+class SquareWorker(ProcessWorker):
+    @staticmethod
+    def job(ctx, value):
+        return value * value
+
+
+def _run(worker):
+    events = []
+    worker.progress.connect(lambda msg: events.append(('progress', msg)))
+    worker.result.connect(lambda value: events.append(('result', value)))
+    worker.error.connect(lambda message: events.append(('error', message)))
+    worker.finished.connect(lambda: events.append(('finished',)))
+    # 在当前线程运行，信号直接调用
+    worker.run()
+    return events
+
+
+def test_result_is_delivered(qapp, app_logger):
+    assert _run(SquareWorker(7)) == [('result', 49), ('finished',)]
+
+
+def test_exit_without_result_reports_exitcode(qapp, app_logger):
+    events = _run(CrashingWorker())
+    assert events[0] == ('progress', 'started')
+    assert events[-1] == ('finished',)
+    errors = [event[1] for event in events if event[0] == 'error']
+    assert len(errors) == 1 and '3' in errors[0]
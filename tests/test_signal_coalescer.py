@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+pytest.importorskip('PySide2')
+
+import shiboken2  # noqa: E402
+from PySide2.QtCore import QObject  # noqa: E402
+
+from utils.signal_coalescer import SignalCoalescer  # noqa: E402
+
+
+class Receiver(QObject):
+    def __init__(self):
+        super().__init__()
+        self.values = []
+
+    def update(self, value):
+        self.values.append(value)
+
+
+def test_timer_runs_only_while_updates_are_pending(qapp, wait_until):
+    coalescer = SignalCoalescer()
+    receiver = Receiver()
+    slot = coalescer.latest(receiver.update)
+    assert not coalescer._timer.isActive()
+
+    worker = threading.Thread(target=lambda: [slot(i) for i in range(1000)])
+    worker.start()
+    worker.join()
+    assert wait_until(lambda: receiver.values and receiver.values[-1] == 999, 2)
+    assert len(receiver.values) < 1000
+    wait_until(lambda: False, 0.05)
+    assert not coalescer._timer.isActive()
+    assert not coalescer._scheduled
+
+
+def test_batch_delivers_every_value(qapp, wait_until):
+    coalescer = SignalCoalescer()
+    batches = []
+    slot = coalescer.batch(batches.append)
+    for i in range(10):
+        slot(i)
+    assert wait_until(lambda: batches, 2)
+    assert batches == [list(range(10))]
+
+
+def test_deleted_receiver_is_removed(qapp, app_logger):
+    coalescer = SignalCoalescer()
+    receiver = Receiver()
+    slot = coalescer.latest(receiver.update)
+    shiboken2.delete(receiver)
+    slot(1)
+    coalescer.flush()
+    assert coalescer.stats() == []
+
+
+def test_slot_errors_are_raised_after_other_slots(qapp, app_logger, caplog):
+    coalescer = SignalCoalescer()
+    delivered = []
+
+    def broken(value):
+        raise ValueError(value)
+
+    coalescer.latest(broken)(1)
+    coalescer.latest(delivered.append)(2)
+    with pytest.raises(ValueError):
+        coalescer.flush()
+    assert delivered == [2]
+    assert len(coalescer.stats()) == 2
+    assert 'ValueError(1)' in caplog.text
@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('PySide2')
+pytest.importorskip('requests')
+
+import shiboken2  # noqa: E402
+from PySide2.QtCore import QObject  # noqa: E402
+
+from gui.version_dialog import UpdateChecker  # noqa: E402
+from utils import requests as http  # noqa: E402
+
+LATENCY = 0.3
+ENDPOINTS = 4
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        with self.server.lock:
+            self.server.requests += 1
+        etag = f'"{self.path}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps({'name': self.path.strip('/'), 'version': '1.0'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def isolated_http(tmp_path, monkeypatch):
+    # 独立的连接池和缓存；ttl 为 0 时每次都向服务器确认
+    monkeypatch.setattr(http, '_session', None)
+    monkeypatch.setattr(http, 'http_cache', http.HttpCache(str(tmp_path), ttl=0))
+    yield
+    if http._session is not None:
+        http._session.close()
+
+
+def _jobs(server):
+    port = server.server_address[1]
+    return [(f'plugin{i}', f'http://127.0.0.1:{port}/plugin{i}') for i in range(ENDPOINTS)]
+
+
+def _run_checker(qapp, wait_until, jobs):
+    owner = QObject()
+    checker = UpdateChecker(jobs, parent=owner)
+    results = {}
+    finished = []
+    checker.result.connect(lambda name, info: results.__setitem__(name, info))
+    checker.finished.connect(lambda: finished.append(time.monotonic()))
+    started = time.monotonic()
+    checker.start()
+    assert wait_until(lambda: finished, 10)
+    return results, finished[0] - started
+
+
+def test_concurrent_checks_take_one_latency(qapp, wait_until, server, isolated_http):
+    results, elapsed = _run_checker(qapp, wait_until, _jobs(server))
+    assert results == {f'plugin{i}': {'name': f'plugin{i}', 'version': '1.0'} for i in range(ENDPOINTS)}
+    assert elapsed < LATENCY * 2
+
+
+def test_connections_are_reused(qapp, wait_until, server, isolated_http):
+    jobs = _jobs(server)
+    _run_checker(qapp, wait_until, jobs)
+    connections = server.connections
+    assert connections <= ENDPOINTS
+    # 第二轮用 ETag 确认（304），使用连接池中的连接
+    results, elapsed = _run_checker(qapp, wait_until, jobs)
+    assert len(results) == ENDPOINTS
+    assert server.requests == 2 * ENDPOINTS
+    assert server.connections == connections
+    assert elapsed < LATENCY * 2
+
+
+def test_cancel_drops_late_results(qapp, wait_until, server, isolated_http):
+    owner = QObject()
+    checker = UpdateChecker(_jobs(server), parent=owner)
+    delivered = []
+    checker.result.connect(lambda *args: delivered.append(args))
+    checker.finished.connect(lambda: delivered.append('finished'))
+    checker.start()
+    wait_until(lambda: False, LATENCY / 3)
+    checker.cancel()
+    # 已发出的请求仍会完成，结果到达后被丢弃，检查器随后自行删除
+    assert wait_until(lambda: not shiboken2.isValid(checker), 10)
+    assert server.requests == ENDPOINTS
+    assert delivered == []
+
+
+def test_checker_deletes_itself_when_done(qapp, wait_until, server, isolated_http):
+    owner = QObject()
+    checker = UpdateChecker(_jobs(server), parent=owner)
+    checker.start()
+    assert wait_until(lambda: not shiboken2.isValid(checker), 10)
+    assert owner.children() == []
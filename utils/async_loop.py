@@ -0,0 +1,248 @@
+# asyncio 与 Qt 事件循环集成
+# 在 GUI 线程中穿插运行一个 asyncio 事件循环，插件可以直接编写 async def 处理函数
+import asyncio
+import functools
+import math
+import selectors
+
+from PySide2.QtCore import QObject, QSocketNotifier, QTimer
+
+from constants.config import ASYNC_POLL_INTERVAL
+from utils.logger_manager import logger_manager
+
+MAX_ITERATIONS = 100  # 每轮最多运行的 asyncio 循环次数，一直有就绪回调时也让出界面
+
+_bridge = None
+
+
+class QtSelector(selectors.BaseSelector):
+    """由 Qt 通知 IO 就绪的选择器
+
+    注册的每个文件描述符对应 QSocketNotifier，可读 / 可写时调用 on_ready 唤醒事件循环；
+    包括事件循环自身的唤醒管道，call_soon_threadsafe 也能唤醒。
+    stepping 为 True 时 select() 不阻塞：没有 IO 事件且事件循环准备等待时，
+    记录等待时间（下一个定时回调，None 为没有）并停止事件循环，把线程交还给 Qt。
+    """
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._notifiers = {}  # {(fd, 事件): QSocketNotifier}
+        self.on_ready = None
+        self.on_idle = None
+        self.stepping = False
+        self.budget = 0
+        self.next_timeout = None
+
+    def register(self, fileobj, events, data=None):
+        key = self._selector.register(fileobj, events, data)
+        self._update_notifiers(key.fd, events)
+        return key
+
+    def unregister(self, fileobj):
+        key = self._selector.unregister(fileobj)
+        self._update_notifiers(key.fd, 0)
+        return key
+
+    def modify(self, fileobj, events, data=None):
+        key = self._selector.modify(fileobj, events, data)
+        self._update_notifiers(key.fd, events)
+        return key
+
+    def _update_notifiers(self, fd, events):
+        for event, kind in ((selectors.EVENT_READ, QSocketNotifier.Read),
+                            (selectors.EVENT_WRITE, QSocketNotifier.Write)):
+            notifier = self._notifiers.get((fd, event))
+            if events & event:
+                if notifier is None:
+                    notifier = self._notifiers[(fd, event)] = QSocketNotifier(fd, kind)
+                    notifier.activated.connect(self._on_activated)
+            elif notifier is not None:
+                del self._notifiers[(fd, event)]
+                notifier.setEnabled(False)
+                notifier.deleteLater()
+
+    def _on_activated(self, *args):
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def select(self, timeout=None):
+        if not self.stepping:
+            return self._selector.select(timeout)
+        ready = self._selector.select(0)
+        idle = not ready and (timeout is None or timeout > 0)
+        self.budget -= 1
+        if idle or self.budget <= 0:
+            # 没有事可做或本轮次数用完，本次循环结束后交还给 Qt
+            self.next_timeout = timeout if idle else 0
+            self.on_idle()
+        return ready
+
+    def get_key(self, fileobj):
+        return self._selector.get_key(fileobj)
+
+    def get_map(self):
+        return self._selector.get_map()
+
+    def close(self):
+        for notifier in self._notifiers.values():
+            notifier.setEnabled(False)
+            notifier.deleteLater()
+        self._notifiers.clear()
+        self._selector.close()
+
+
+class QtEventLoop(asyncio.SelectorEventLoop):
+    """使用 QtSelector 的事件循环
+
+    在循环外（如 Qt 槽中创建任务、取消任务）安排回调时，通过选择器的 on_ready 唤醒，
+    否则空闲的循环要等到下一次 IO 事件才会执行这些回调。
+    """
+    def call_soon(self, callback, *args, context=None):
+        handle = super().call_soon(callback, *args, context=context)
+        self._notify()
+        return handle
+
+    def call_at(self, when, callback, *args, context=None):
+        handle = super().call_at(when, callback, *args, context=context)
+        self._notify()
+        return handle
+
+    def _notify(self):
+        on_ready = self._selector.on_ready
+        if on_ready is not None and not self.is_running():
+            on_ready()
+
+
+class QtAsyncioBridge(QObject):
+    """在 Qt 事件循环中运行的 asyncio 事件循环
+
+    事件循环使用 QtSelector：IO 就绪（含跨线程唤醒）时由 QSocketNotifier 触发，
+    循环外安排的回调立即触发，定时回调由单次 QTimer 在到期时触发，空闲时不占用 GUI 线程。
+    每次触发运行 asyncio 循环直到没有就绪的回调和 IO 事件（最多 MAX_ITERATIONS 次）。
+
+    传入不使用 QtSelector 的事件循环（如 Windows 的 ProactorEventLoop）时无法得知 IO 就绪，
+    退回按 interval_ms 轮询：每次运行一轮循环（IO 超时为 0）。
+    """
+    def __init__(self, loop=None, interval_ms=ASYNC_POLL_INTERVAL):
+        super().__init__()
+        if loop is None:
+            self.selector = QtSelector()
+            loop = QtEventLoop(self.selector)
+            self.selector.on_ready = self._wake
+            self.selector.on_idle = loop.stop
+        else:
+            self.selector = None
+        self.loop = loop
+        self.interval_ms = interval_ms
+        asyncio.set_event_loop(self.loop)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._step)
+
+    def start(self):
+        self._timer.start(0)
+
+    def _wake(self):
+        self._timer.start(0)
+
+    def _step(self):
+        loop = self.loop
+        # 协程中打开模态对话框等嵌套的 Qt 事件循环时，asyncio 循环仍在运行，由外层继续
+        if loop.is_closed() or loop.is_running():
+            return
+        if self.selector is None:
+            loop.call_soon(loop.stop)
+            loop.run_forever()
+            self._timer.start(self.interval_ms)
+            return
+        self.selector.budget = MAX_ITERATIONS
+        self.selector.stepping = True
+        try:
+            loop.run_forever()
+        finally:
+            self.selector.stepping = False
+        timeout = self.selector.next_timeout
+        if timeout is not None:
+            # 等到最近的定时回调；没有定时回调时只由 IO 就绪唤醒
+            self._timer.start(math.ceil(timeout * 1000))
+
+    def close(self):
+        """取消所有未完成的协程并关闭事件循环，程序退出时调用"""
+        self._timer.stop()
+        loop = self.loop
+        if loop.is_closed():
+            return
+        tasks = [task for task in asyncio.all_tasks(loop) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def install_asyncio(interval_ms=ASYNC_POLL_INTERVAL):
+    """创建并启动全局 asyncio 事件循环，需在 QApplication 创建之后调用"""
+    global _bridge
+    if _bridge is None:
+        _bridge = QtAsyncioBridge(interval_ms=interval_ms)
+        _bridge.start()
+    return _bridge
+
+
+def get_loop():
+    """获取与 Qt 集成的事件循环"""
+    return _bridge.loop if _bridge is not None else asyncio.get_event_loop()
+
+
+def _log_task_exception(task):
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger_manager.logger.error(f"协程 {task.get_name()} 异常: {exc!r}")
+
+
+def run_coroutine(coro):
+    """在集成的事件循环中运行协程，异常写入日志
+    Returns:
+        asyncio.Task
+    """
+    task = get_loop().create_task(coro)
+    task.add_done_callback(_log_task_exception)
+    return task
+
+
+def async_slot(fn):
+    """把 async def 函数包装成可以连接到 Qt 信号的槽
+
+    示例:
+        button.clicked.connect(async_slot(self.on_click))
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return run_coroutine(fn(*args, **kwargs))
+    return wrapper
+
+
+async def wait_signal(signal, timeout=None):
+    """等待 Qt 信号触发，返回信号参数（单个参数直接返回，多个参数返回元组）
+    Args:
+        signal: 绑定的信号，如 worker.finished
+        timeout: 超时秒数，超时抛出 asyncio.TimeoutError
+    """
+    loop = get_loop()
+    future = loop.create_future()
+
+    def _set_result(args):
+        if not future.done():
+            future.set_result(args[0] if len(args) == 1 else (args or None))
+
+    def handler(*args):
+        # 信号可能在其他线程触发
+        loop.call_soon_threadsafe(_set_result, args)
+
+    signal.connect(handler)
+    try:
+        return await asyncio.wait_for(future, timeout)
+    finally:
+        signal.disconnect(handler)
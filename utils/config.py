@@ -1,17 +1,60 @@
 import configparser
+import io
 import os
+import threading
+import time
 from datetime import datetime
 
+from constants.config import (CONFIG_AUTOSAVE_DELAY, CONFIG_BACKEND,
+                              CONFIG_DB_FILE)
+from utils.logger_manager import logger_manager
+
+
+def split_key(full_key):
+    """扁平键拆分为 (节, 键)，没有点号的键属于 window_ui"""
+    if '.' in full_key:
+        section, key = full_key.split('.', 1)
+        return section, key
+    return 'window_ui', full_key
+
+
+def create_config_manager(config_file='utils/config.ini', backend=CONFIG_BACKEND, db_file=CONFIG_DB_FILE):
+    """按 backend 创建配置管理器，已有 SQLite 配置库时总是使用 SQLite
+    Args:
+        backend: 'ini' 或 'sqlite'，首次使用 sqlite 时自动从 config_file 导入
+    """
+    if backend == 'sqlite' or os.path.exists(db_file):
+        from utils.config_sqlite import SqliteConfigManager
+        return SqliteConfigManager(db_file, ini_file=config_file)
+    return ConfigManager(config_file)
+
+
 class ConfigManager:
-    def __init__(self, config_file='utils/config.ini'):
+    """INI 配置
+
+    修改过的节记为脏，修改后 autosave_delay 秒内的所有修改由后台线程合并为一次写入，
+    只重新生成脏节的文本，写入临时文件并 fsync 后替换原文件，写入中途崩溃不会损坏配置。
+    """
+    def __init__(self, config_file='utils/config.ini', autosave_delay=CONFIG_AUTOSAVE_DELAY):
         self.config_file = config_file
         self.config = configparser.ConfigParser()
-        
+        self._init_autosave(autosave_delay)
+        self._dirty = set()  # 需要重新生成文本的节，DEFAULT 也在其中
+        self._section_text = {}  # 节名: 上次写入的文本
+
         if not os.path.exists(self.config_file):
             self.create_default_config()
         else:
             self.config.read(self.config_file, encoding='utf-8')
 
+    def _init_autosave(self, autosave_delay):
+        self.autosave_delay = autosave_delay
+        self._cond = threading.Condition(threading.RLock())
+        self._write_lock = threading.Lock()  # 保证快照和写入的顺序一致
+        self._deadline = None  # 自动保存的时间点
+        self._closed = False
+        self._thread = None
+
     def load_all(self) -> dict:
         """加载所有配置到扁平字典"""
         result = {}
@@ -29,26 +72,22 @@ class ConfigManager:
                 
         return result
 
+    def update(self, data: dict):
+        """把扁平字典写入配置，只有值变化的节会被标记，稍后自动保存"""
+        with self._cond:
+            # 确保必要的section存在
+            if 'window_ui' not in self.config:
+                self.config.add_section('window_ui')
+                self._mark_dirty('window_ui')
+
+            # 整理数据到sections，没有点号的键放入window_ui
+            for full_key, value in data.items():
+                self.set(*split_key(full_key), value)
+
     def save_all(self, data: dict):
         """保存扁平字典到配置文件"""
-        # 确保必要的section存在
-        if 'window_ui' not in self.config:
-            self.config.add_section('window_ui')
-        
-        # 整理数据到sections
-        for full_key, value in data.items():
-            if '.' in full_key:
-                section, key = full_key.split('.', 1)
-                if section not in self.config:
-                    self.config.add_section(section)
-                self.config.set(section, key, str(value))
-            else:
-                # 没有点号的键放入window_ui
-                self.config.set('window_ui', full_key, str(value))
-        
-        # 保存到文件
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            self.config.write(f)
+        self.update(data)
+        self.save()
 
     def _parse_value(self, value: str):
         """智能解析配置值的类型"""
@@ -90,19 +129,151 @@ class ConfigManager:
             'title': "应用程序"
         }
         self.config['window_ui'] = {}
+        self._dirty.update(['DEFAULT', 'window', 'window_ui'])
         self.save()
 
     def get(self, section, key, fallback=None):
         return self.config.get(section, key, fallback=fallback)
 
-    def set(self, section, key, value):
+    def get_value(self, section, key, fallback=None):
+        """读取并解析类型后的值"""
+        value = self.config.get(section, key, fallback=None)
+        return fallback if value is None else self._parse_value(value)
+
+    def has_section(self, section):
+        return self.config.has_section(section)
+
+    def items(self, section):
+        """节内的 (键, 文本值)，不含从 DEFAULT 继承的键，节不存在时为空"""
         if not self.config.has_section(section):
-            self.config.add_section(section)
-        self.config.set(section, key, str(value))
+            return []
+        own = self._own_items(section)
+        return [(key, value) for key, value in self.config.items(section) if key in own]
+
+    def set(self, section, key, value):
+        value = str(value)
+        with self._cond:
+            if not self.config.has_section(section):
+                self.config.add_section(section)
+            elif self.config.get(section, key, raw=True, fallback=None) == value:
+                return
+            self.config.set(section, key, value)
+            self._mark_dirty(section)
+
+    def remove(self, section, key):
+        with self._cond:
+            if self.config.has_section(section) and self.config.remove_option(section, key):
+                self._mark_dirty(section)
+
+    def _mark_dirty(self, section):
+        """标记节已修改，在 autosave_delay 秒后自动保存（期间的修改一起写入）"""
+        self._dirty.add(section)
+        self._schedule_autosave()
+
+    def _schedule_autosave(self):
+        if self.autosave_delay is not None:
+            self.save_later(self.autosave_delay)
+
+    def save_later(self, delay=0):
+        """在 delay 秒内由后台线程保存，已安排的更早的保存不会推迟"""
+        with self._cond:
+            if self._closed:
+                return
+            deadline = time.monotonic() + delay
+            if self._deadline is None or deadline < self._deadline:
+                self._deadline = deadline
+                self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._autosave_loop, name='config-autosave', daemon=True)
+                self._thread.start()
+
+    def _autosave_loop(self):
+        while True:
+            with self._cond:
+                while self._deadline is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                delay = self._deadline - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+            try:
+                self.save()
+            except Exception as e:
+                logger_manager.logger.error(f"自动保存配置失败: {e}")
+
+    def _own_items(self, section):
+        """节内自己的键值（不含从 DEFAULT 继承的）
+
+        公开接口读取的节包含 DEFAULT 的键，与 DEFAULT 相同的值视为继承，读回时结果不变。
+        """
+        defaults = self.config.defaults()
+        return {key: value for key, value in self.config.items(section, raw=True)
+                if key not in defaults or value != defaults[key]}
+
+    def _serialize(self):
+        """生成配置文件文本，只重新生成修改过的节"""
+        sections = ['DEFAULT'] if self.config.defaults() else []
+        sections += self.config.sections()
+        texts = {}
+        for name in sections:
+            text = self._section_text.get(name)
+            if text is None or name in self._dirty:
+                # 单独写出只有这一节的 ConfigParser，与 ConfigParser.write 的输出一致
+                items = dict(self.config.defaults()) if name == 'DEFAULT' else self._own_items(name)
+                section_parser = configparser.ConfigParser(interpolation=None)
+                section_parser.read_dict({name: items})
+                buffer = io.StringIO()
+                section_parser.write(buffer)
+                text = buffer.getvalue()
+            texts[name] = text
+        self._section_text = texts
+        self._dirty.clear()
+        return ''.join(texts.values())
 
     def save(self):
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            self.config.write(f)
+        """立即保存修改，没有修改时不写文件"""
+        with self._write_lock:
+            with self._cond:
+                self._deadline = None
+                if not self._has_changes():
+                    return
+                snapshot = self._snapshot()
+            try:
+                self._commit(snapshot)
+            except Exception:
+                with self._cond:
+                    self._restore(snapshot)
+                raise
+
+    def _has_changes(self):
+        return bool(self._dirty) or not os.path.exists(self.config_file)
+
+    def _snapshot(self):
+        return self._serialize()
+
+    def _commit(self, text):
+        # 写入临时文件后替换，写入中途崩溃时原文件不受影响
+        tmp_path = self.config_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.config_file)
+
+    def _restore(self, text):
+        # 写入失败，下次保存时重新写入所有节
+        self._dirty.update(self._section_text)
+
+    def close(self):
+        """保存未写入的修改并停止自动保存线程"""
+        self.save()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
 
     def get_flask_port(self):
         return self.config.getint('Flask', 'port', fallback=5000)
\ No newline at end of file
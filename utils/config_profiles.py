@@ -0,0 +1,56 @@
+# 配置方案
+# 每个方案是一个 JSON 文件，保存所有已绑定控件的值（键与 load_all() 相同），可以在配置菜单中切换
+import json
+import os
+
+from constants.config import CONFIG_PROFILE_DIR
+
+_INVALID_CHARS = set('\\/:*?"<>|')
+
+
+class ConfigProfiles:
+    def __init__(self, directory=CONFIG_PROFILE_DIR):
+        self.directory = directory
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    @staticmethod
+    def is_valid_name(name):
+        return bool(name) and name == name.strip() and not (set(name) & _INVALID_CHARS)
+
+    def names(self):
+        """所有方案名，按名称排序"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(os.path.splitext(item)[0] for item in os.listdir(self.directory) if item.endswith('.json'))
+
+    def load(self, name):
+        """读取方案，不存在或格式不对时返回空字典"""
+        try:
+            with open(self._path(name), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            print(f"读取配置方案 {name} 失败: {str(e)}")
+            return {}
+
+    def save(self, name, data):
+        if not self.is_valid_name(name):
+            raise ValueError(f"方案名不能为空或包含 {''.join(sorted(_INVALID_CHARS))}")
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(name)
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_file, path)
+
+    def delete(self, name):
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+
+# 全局单例
+config_profiles = ConfigProfiles()
@@ -0,0 +1,274 @@
+# SQLite 配置存储
+# 每个节（插件名、window、window_ui 等）是一个命名空间，值按类型保存，读取时不再逐个猜测类型；
+# 命名空间在第一次访问时才读取，未启用的插件的配置不会被加载；修改在一个事务中批量写入
+import configparser
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from datetime import datetime
+
+from constants.config import CONFIG_AUTOSAVE_DELAY, CONFIG_DB_FILE
+from utils.config import ConfigManager, split_key
+
+_MISSING = object()
+_DELETED = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS config (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _encode(value):
+    """Returns: tuple: (类型, 存储的值)"""
+    if isinstance(value, bool):
+        return 'bool', int(value)
+    if isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+        return 'int', value
+    if isinstance(value, float):
+        return 'float', value
+    if isinstance(value, str):
+        return 'str', value
+    return 'json', json.dumps(value, ensure_ascii=False)
+
+
+def _decode(kind, stored):
+    if kind == 'bool':
+        return bool(stored)
+    if kind == 'json':
+        return json.loads(stored)
+    return stored
+
+
+def _option(key):
+    """键不区分大小写，与 configparser 的 optionxform 相同"""
+    return key.lower()
+
+
+def _to_text(value):
+    """get() 返回与 INI 相同的文本形式"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+class ConfigView(MutableMapping):
+    """load_all() 的结果，按键访问时才读取所在的命名空间
+
+    写入只保存在视图中（用于插件重建时恢复），不会写入配置。
+    """
+    def __init__(self, manager):
+        self._manager = manager
+        self._overrides = {}
+
+    def __getitem__(self, full_key):
+        value = self._overrides.get(full_key, _MISSING)
+        if value is _MISSING:
+            value = self._manager.get_value(*split_key(full_key), _MISSING)
+        if value is _MISSING or value is _DELETED:
+            raise KeyError(full_key)
+        return value
+
+    def __setitem__(self, full_key, value):
+        self._overrides[full_key] = value
+
+    def __delitem__(self, full_key):
+        self[full_key]
+        self._overrides[full_key] = _DELETED
+
+    def __iter__(self):
+        # 遍历会读取所有命名空间
+        keys = dict.fromkeys(self._manager.full_keys())
+        keys.update(self._overrides)
+        return (key for key in keys if key in self)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __bool__(self):
+        return any(value is not _DELETED for value in self._overrides.values()) or not self._manager.is_empty()
+
+
+class SqliteConfigManager(ConfigManager):
+    """SQLite（WAL）配置，接口与 ConfigManager 相同
+
+    修改先写入内存并记录为待保存，autosave_delay 秒内的修改由后台线程在一个事务中写入。
+    get() 返回文本（与 INI 一致），get_value() 返回保存时的类型。
+    键与 INI 一样不区分大小写，统一保存为小写。
+    """
+    def __init__(self, db_file=CONFIG_DB_FILE, ini_file='utils/config.ini', autosave_delay=CONFIG_AUTOSAVE_DELAY):
+        self.config_file = db_file
+        self._init_autosave(autosave_delay)
+        self._namespaces = {}  # 已读取的命名空间: {键: 值}
+        self._pending = {}  # 待保存的修改 (命名空间, 键): 值，删除为 _DELETED
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+        if self._meta('migrated_from') is None:
+            self._migrate(ini_file)
+
+    def _meta(self, key):
+        with self._db_lock:
+            row = self._db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _migrate(self, ini_file):
+        """首次使用时导入 INI 配置，只执行一次，INI 文件保留不动"""
+        if not os.path.exists(ini_file):
+            self.create_default_config()
+            ini_file = ''
+        else:
+            # DEFAULT 作为普通的节导入，不再被其他节继承
+            parser = configparser.ConfigParser(default_section='')
+            parser.read(ini_file, encoding='utf-8')
+            with self._cond:
+                for section in parser.sections():
+                    for key, value in parser.items(section, raw=True):
+                        self.set(section, key, self._parse_value(value))
+            self.save()
+        with self._db_lock:
+            self._db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', ('migrated_from', ini_file))
+        print(f"配置已导入 {self.config_file}")
+
+    def _namespace(self, namespace):
+        """命名空间的值，第一次访问时从数据库读取，调用方持有 self._cond"""
+        values = self._namespaces.get(namespace)
+        if values is None:
+            with self._db_lock:
+                rows = self._db.execute('SELECT key, type, value FROM config WHERE namespace = ?',
+                                        (namespace,)).fetchall()
+            values = self._namespaces[namespace] = {}
+            for key, kind, stored in rows:
+                option = _option(key)
+                if option != key:
+                    # 旧版本按原始大小写保存的键，改为小写保存
+                    self._pending[(namespace, key)] = _DELETED
+                    self._pending[(namespace, option)] = _decode(kind, stored)
+                    self._schedule_autosave()
+                values[option] = _decode(kind, stored)
+        return values
+
+    def namespaces(self):
+        with self._db_lock:
+            stored = [row[0] for row in self._db.execute('SELECT DISTINCT namespace FROM config')]
+        with self._cond:
+            return list(dict.fromkeys(stored + [name for name, values in self._namespaces.items() if values]))
+
+    def full_keys(self):
+        """所有键的扁平形式（读取全部命名空间）"""
+        keys = []
+        for namespace in self.namespaces():
+            for key, _ in self.items(namespace):
+                keys.append(key if namespace == 'window_ui' else f"{namespace}.{key}")
+        return keys
+
+    def is_empty(self):
+        with self._cond:
+            if any(self._namespaces.values()):
+                return False
+        with self._db_lock:
+            return self._db.execute('SELECT 1 FROM config LIMIT 1').fetchone() is None
+
+    def load_all(self):
+        """按需读取的扁平配置，键的格式与 INI 的 load_all() 相同"""
+        return ConfigView(self)
+
+    def update(self, data: dict):
+        with self._cond:
+            for full_key, value in data.items():
+                self.set(*split_key(full_key), value)
+
+    def get(self, section, key, fallback=None):
+        value = self.get_value(section, key, _MISSING)
+        return fallback if value is _MISSING else _to_text(value)
+
+    def get_value(self, section, key, fallback=None):
+        with self._cond:
+            return self._namespace(section).get(_option(key), fallback)
+
+    def has_section(self, section):
+        with self._cond:
+            return bool(self._namespace(section))
+
+    def items(self, section):
+        with self._cond:
+            return [(key, _to_text(value)) for key, value in self._namespace(section).items()]
+
+    def set(self, section, key, value):
+        key = _option(key)
+        with self._cond:
+            values = self._namespace(section)
+            current = values.get(key, _MISSING)
+            if current is not _MISSING and type(current) is type(value) and current == value:
+                return
+            values[key] = value
+            self._pending[(section, key)] = value
+            self._schedule_autosave()
+
+    def remove(self, section, key):
+        key = _option(key)
+        with self._cond:
+            values = self._namespace(section)
+            if key in values:
+                del values[key]
+                self._pending[(section, key)] = _DELETED
+                self._schedule_autosave()
+
+    def create_default_config(self):
+        """创建默认配置"""
+        self.update({
+            'DEFAULT.version': '1.0',
+            'DEFAULT.created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'window.width': 1400,
+            'window.height': 800,
+            'window.title': "应用程序",
+        })
+        self.save()
+
+    def _has_changes(self):
+        return bool(self._pending)
+
+    def _snapshot(self):
+        changes, self._pending = self._pending, {}
+        return changes
+
+    def _commit(self, changes):
+        upserts = [(namespace, key) + _encode(value) for (namespace, key), value in changes.items()
+                   if value is not _DELETED]
+        deletes = [key for key, value in changes.items() if value is _DELETED]
+        with self._db_lock:
+            self._db.execute('BEGIN')
+            try:
+                self._db.executemany('INSERT OR REPLACE INTO config (namespace, key, type, value) VALUES (?, ?, ?, ?)',
+                                     upserts)
+                self._db.executemany('DELETE FROM config WHERE namespace = ? AND key = ?', deletes)
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def _restore(self, changes):
+        # 写入失败，之后的修改优先
+        for key, value in changes.items():
+            self._pending.setdefault(key, value)
+
+    def close(self):
+        super().close()
+        with self._db_lock:
+            self._db.close()
+
+    def get_flask_port(self):
+        return int(self.get('Flask', 'port', 5000))
@@ -45,6 +45,10 @@ def _apply_pending_updates(plugin_name, file_path):
         traceback.print_exc()
         return False
 
+def apply_plugin_update(plugin_name, file_path):
+    """立即解压插件更新包，用于热更新"""
+    return _apply_pending_updates(plugin_name, file_path)
+
 def install_plugin_update():
     """安装插件更新包"""
     retstr = ""
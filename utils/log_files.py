@@ -0,0 +1,224 @@
+# 日志文件
+# 压缩轮转：日志写满后改名为带时间戳的归档文件，由后台线程压缩并按总大小和天数清理
+# 读取：列出当前日志和全部归档（含旧的 .1 ~ .5 备份），透明读取压缩文件
+import glob
+import gzip
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from logging.handlers import BaseRotatingHandler
+
+from constants.config import (LOG_COMPRESSION, LOG_MAX_BYTES,
+                              LOG_RETENTION_DAYS, LOG_RETENTION_MB)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+
+
+def is_compressed(path):
+    return path.endswith(COMPRESSED_SUFFIXES)
+
+
+def log_files(log_file):
+    """当前日志和所有归档，按从旧到新排序
+
+    改名和压缩都保留修改时间，按修改时间排序即为写入顺序，当前日志总在最后。
+    """
+    paths = [path for path in glob.glob(glob.escape(log_file) + '.*')
+             if os.path.isfile(path) and not path.endswith('.tmp')
+             and (zstandard is not None or not path.endswith('.zst'))]
+    paths.sort(key=lambda path: os.path.getmtime(path))
+    if os.path.isfile(log_file):
+        paths.append(log_file)
+    return paths
+
+
+def _open_compressed(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+def read_head(path, size):
+    """读取文件（解压后）开头 size 个字节"""
+    if is_compressed(path):
+        with _open_compressed(path) as f:
+            return f.read(size)
+    with open(path, 'rb') as f:
+        return f.read(size)
+
+
+def decompress_to_temp(path):
+    """把压缩文件分块解压到临时文件（关闭后自动删除），内存占用与文件大小无关
+    临时文件放在日志所在目录（系统临时目录可能是内存文件系统）。
+    Returns:
+        file: 定位在开头的临时文件
+    """
+    tmp = tempfile.TemporaryFile(prefix='log-', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with _open_compressed(path) as src:
+            shutil.copyfileobj(src, tmp, 1024 * 1024)
+    except BaseException:
+        tmp.close()
+        raise
+    tmp.seek(0)
+    return tmp
+
+
+def map_file(f):
+    """只读映射已打开的文件，空文件返回 None"""
+    if os.fstat(f.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@contextmanager
+def open_segment(path):
+    """只读打开日志文件，得到支持 find / rfind / 切片的缓冲区，空文件得到 None
+
+    普通文件使用内存映射，压缩文件解压到临时文件后映射。
+    映射只在 with 块内持有，避免 Windows 上轮转改名失败。
+    """
+    with (decompress_to_temp(path) if is_compressed(path) else open(path, 'rb')) as f:
+        mm = map_file(f)
+        if mm is None:
+            yield None
+            return
+        try:
+            yield mm
+        finally:
+            mm.close()
+
+
+def compress_file(path, compression=LOG_COMPRESSION):
+    """压缩文件并删除原文件，写入临时文件后改名，保留修改时间
+    Returns:
+        str: 压缩后的路径
+    """
+    if compression == 'zstd' and zstandard is not None:
+        target = path + '.zst'
+    else:
+        target = path + '.gz'
+    tmp_path = target + '.tmp'
+    stat = os.stat(path)
+    with open(path, 'rb') as src, open(tmp_path, 'wb') as raw:
+        if target.endswith('.zst'):
+            with zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=False) as dst:
+                while True:
+                    chunk = src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+        else:
+            with gzip.GzipFile(filename=os.path.basename(path), mode='wb', fileobj=raw, mtime=stat.st_mtime) as dst:
+                while True:
+                    chunk = src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+    os.utime(tmp_path, (stat.st_atime, stat.st_mtime))
+    os.replace(tmp_path, target)
+    os.remove(path)
+    return target
+
+
+class CompressingRotatingFileHandler(BaseRotatingHandler):
+    """按大小轮转的文件处理器
+
+    轮转时只把当前文件改名为 app.log.YYYYmmdd-HHMMSS 并重新打开，
+    压缩和清理交给后台线程，写日志的线程不会等待。
+    归档按总大小（retention_mb）和天数（retention_days）清理，0 为不限制。
+    """
+    def __init__(self, filename, max_bytes=LOG_MAX_BYTES, compression=LOG_COMPRESSION,
+                 retention_mb=LOG_RETENTION_MB, retention_days=LOG_RETENTION_DAYS, encoding='utf-8'):
+        super().__init__(filename, 'a', encoding=encoding, delay=False)
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.retention_bytes = retention_mb * 1024 * 1024
+        self.retention_days = retention_days
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='log-compress')
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        # 上次退出时未压缩完的归档
+        for path in log_files(self.baseFilename)[:-1]:
+            if not is_compressed(path) and not path[len(self.baseFilename) + 1:].isdigit():
+                self._submit(path)
+        self._executor.submit(self._apply_retention)
+
+    def shouldRollover(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        if self.max_bytes <= 0:
+            return False
+        return self.stream.tell() >= self.max_bytes
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        archive = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S')}"
+        candidate, index = archive, 1
+        while any(os.path.exists(candidate + suffix) for suffix in ('',) + COMPRESSED_SUFFIXES):
+            candidate = f"{archive}-{index}"
+            index += 1
+        try:
+            os.rename(self.baseFilename, candidate)
+        except OSError:
+            # 文件被占用（如正在被读取），继续写当前文件，下次再轮转
+            self.stream = self._open()
+            return
+        self.stream = self._open()
+        self._submit(candidate)
+
+    def _submit(self, path):
+        with self._pending_lock:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+        self._executor.submit(self._compress, path)
+
+    def _compress(self, path):
+        try:
+            if self.compression != 'none':
+                compress_file(path, self.compression)
+        except Exception as e:
+            print(f"压缩日志失败: {path} {e}")
+        finally:
+            with self._pending_lock:
+                self._pending.discard(path)
+        self._apply_retention()
+
+    def _apply_retention(self):
+        """删除超过天数或超出总大小的最旧归档"""
+        try:
+            archives = log_files(self.baseFilename)[:-1]
+            now = time.time()
+            sizes = {path: os.path.getsize(path) for path in archives}
+            total = sum(sizes.values())
+            for path in archives:
+                expired = self.retention_days and now - os.path.getmtime(path) > self.retention_days * 86400
+                oversize = self.retention_bytes and total > self.retention_bytes
+                if not (expired or oversize):
+                    break
+                with self._pending_lock:
+                    if path in self._pending:
+                        # 归档从旧到新排列，不越过压缩中的文件删除更新的归档；压缩完成后会再次清理
+                        break
+                os.remove(path)
+                total -= sizes[path]
+        except OSError as e:
+            print(f"清理日志失败: {e}")
+
+    def close(self):
+        super().close()
+        # 等待后台压缩完成
+        self._executor.shutdown(wait=True)
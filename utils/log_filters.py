@@ -0,0 +1,160 @@
+# 日志限流
+# 合并同一 logger 连续重复的日志，并按 logger 做令牌桶限速，被抑制的条数定期汇报
+import logging
+import threading
+import time
+
+from constants.config import LOG_DEDUP, LOG_RATE_BURST, LOG_RATE_LIMIT, LOG_REPORT_INTERVAL
+
+
+class LogThrottleFilter(logging.Filter):
+    """重复合并和限速过滤器，挂在队列处理器上，在入队前丢弃被抑制的日志
+
+    - 同一 logger 连续出现相同级别、相同内容的日志只保留第一条，
+      内容变化或到达汇报间隔时输出 "上一条消息重复 N 次"
+    - 每个 logger 一个令牌桶，每秒补充 rate 个，最多积攒 burst 个，用完后丢弃并计数
+    汇报日志通过 emit 重新交给处理器，带有 log_report 标记，不再经过本过滤器。
+    有日志被抑制时启动一个定时器，之后没有新日志也会在汇报间隔后汇报；close() 取消定时器并汇报剩余的计数。
+    """
+    def __init__(self, emit, dedup=LOG_DEDUP, rate=LOG_RATE_LIMIT, burst=LOG_RATE_BURST,
+                 rates=None, report_interval=LOG_REPORT_INTERVAL):
+        super().__init__()
+        self.emit = emit
+        self._lock = threading.Lock()
+        self._last = {}  # {logger 名: [(级别, 消息), 重复次数]}
+        self._buckets = {}  # {logger 名: [令牌数, 上次补充时间, 限速]}
+        self._dropped = {}  # {logger 名: 限速丢弃数}
+        self._last_report = time.monotonic()
+        self._timer = None  # 汇报被抑制条数的定时器
+        self._closed = False
+        self.configure(dedup, rate, burst, rates, report_interval)
+
+    def configure(self, dedup=LOG_DEDUP, rate=LOG_RATE_LIMIT, burst=LOG_RATE_BURST,
+                  rates=None, report_interval=LOG_REPORT_INTERVAL):
+        """
+        Args:
+            dedup: 是否合并连续重复的日志
+            rate: 每个 logger 每秒允许的日志数，0 为不限速
+            burst: 令牌桶容量
+            rates: 单独设置的限速 {logger 名: 每秒日志数}，logger 名不区分大小写
+            report_interval: 汇报被抑制条数的间隔（秒）
+        """
+        with self._lock:
+            self.dedup = dedup
+            self.rate = rate
+            self.burst = burst
+            self.rates = {name.lower(): rate for name, rate in (rates or {}).items()}
+            self.report_interval = report_interval
+            self._buckets.clear()
+
+    def filter(self, record):
+        if getattr(record, 'log_report', False):
+            return True
+        reports = []
+        with self._lock:
+            now = time.monotonic()
+            allowed = self._check(record, now, reports)
+            if now - self._last_report >= self.report_interval:
+                self._collect(reports)
+                self._last_report = now
+            elif not allowed:
+                self._schedule_report(now)
+        # 汇报先于当前日志入队，保证顺序
+        for report in reports:
+            self.emit(report)
+        return allowed
+
+    def _check(self, record, now, reports):
+        name = record.name
+        key = None
+        if self.dedup and not record.exc_info:
+            message = record.getMessage()
+            record.msg, record.args = message, None
+            key = (record.levelno, message)
+            last = self._last.get(name)
+            if last is not None and last[0] == key:
+                last[1] += 1
+                return False
+
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            # 每个 logger 只在创建令牌桶时查找一次限速
+            rate = self.rates.get(name.lower(), self.rate)
+            bucket = self._buckets[name] = [max(self.burst, rate), now, rate]
+        rate = bucket[2]
+        if rate > 0:
+            burst = max(self.burst, rate)
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                self._dropped[name] = self._dropped.get(name, 0) + 1
+                return False
+            bucket[0] = tokens - 1
+
+        if key is not None:
+            last = self._last.get(name)
+            if last is not None and last[1]:
+                reports.append(self._repeat_record(name, last))
+            self._last[name] = [key, 0]
+        return True
+
+    def _schedule_report(self, now):
+        """在汇报间隔到达时汇报，调用方持有锁"""
+        if self._timer is not None or self._closed:
+            return
+        delay = max(0.0, self.report_interval - (now - self._last_report))
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def _collect(self, reports):
+        """收集所有待汇报的重复和丢弃计数，调用方持有锁"""
+        for name, last in self._last.items():
+            if last[1]:
+                reports.append(self._repeat_record(name, last))
+                last[1] = 0
+        for name, count in self._dropped.items():
+            reports.append(self._make_record(
+                name, logging.WARNING, f"日志过多，已限速丢弃 {count} 条"))
+        self._dropped.clear()
+
+    def _repeat_record(self, name, last):
+        (level, message), count = last
+        if len(message) > 100:
+            message = message[:100] + '...'
+        return self._make_record(name, level, f"上一条消息重复 {count} 次: {message}")
+
+    @staticmethod
+    def _make_record(name, level, msg):
+        record = logging.getLogger(name).makeRecord(name, level, __file__, 0, msg, None, None)
+        record.log_report = True
+        return record
+
+    def flush(self):
+        """立即汇报所有被抑制的日志"""
+        reports = []
+        with self._lock:
+            if self._closed:
+                return
+            self._collect(reports)
+            self._last_report = time.monotonic()
+        for report in reports:
+            self.emit(report)
+
+    def close(self):
+        """取消定时器并汇报剩余的计数，之后不再汇报，程序退出时调用"""
+        reports = []
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._collect(reports)
+        for report in reports:
+            self.emit(report)
@@ -0,0 +1,480 @@
+# 日志全文索引
+# 为 logs/app.log 及其轮转备份维护增量的磁盘倒排索引：词、日志级别、分钟时间桶 -> 行偏移
+# 文件按开头若干字节（解压后）的哈希识别，轮转改名、压缩后索引仍然有效，每次只索引新追加的字节
+import hashlib
+import os
+import pickle
+import re
+import threading
+from array import array
+
+from constants.config import (LOG_FILE_PATH, LOG_INDEX_COMPACT_BATCHES,
+                              LOG_INDEX_DIR, LOG_SEARCH_LIMIT)
+from utils.log_files import is_compressed, log_files, open_segment, read_head
+
+FINGERPRINT_SIZE = 1024  # 用于识别文件的开头字节数，小于该大小的文件直接扫描
+
+# 小写英文单词（纯数字不索引，避免词表膨胀）和连续汉字
+_TOKEN_RE = re.compile(r'[a-z_][a-z0-9_]+|[\u4e00-\u9fff]+')
+_PREFIX_RE = re.compile(rb'^(\d\d:\d\d):\d\d - ([A-Z]+) - ')
+_WORD_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789_')
+_LEVEL_TERM = 'level:'
+_TIME_TERM = 'time:'
+
+
+def tokenize(text):
+    """建索引时的分词，英文按单词，汉字按相邻两字"""
+    terms = set()
+    for word in _TOKEN_RE.findall(text.lower()):
+        if word[0] < '\u4e00':
+            terms.add(word)
+        elif len(word) == 1:
+            terms.add(word)
+        else:
+            terms.update(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def query_terms(text):
+    """关键字对应的索引词，与 match_line 一样按子串匹配
+
+    关键字两端的单词可能只是日志中较长单词的一部分（如 'fail' 之于 'failed'），
+    按前缀、后缀或包含匹配词表；两侧都是分隔符的单词和两个以上的连续汉字按整词匹配。
+    Returns:
+        list: [(词, 匹配方式)]，匹配方式为 'exact' / 'prefix' / 'suffix' / 'infix'
+    """
+    text = text.lower()
+    terms = []
+    for match in _TOKEN_RE.finditer(text):
+        word = match.group()
+        if word[0] >= '\u4e00':
+            if len(word) == 1:
+                terms.append((word, 'infix'))
+            else:
+                terms.extend((word[i:i + 2], 'exact') for i in range(len(word) - 1))
+            continue
+        left = match.start() > 0 and text[match.start() - 1] not in _WORD_CHARS
+        right = match.end() < len(text) and text[match.end()] not in _WORD_CHARS
+        if left and right:
+            terms.append((word, 'exact'))
+        elif left:
+            terms.append((word, 'prefix'))
+        elif right:
+            terms.append((word, 'suffix'))
+        else:
+            terms.append((word, 'infix'))
+    return list(dict.fromkeys(terms))
+
+
+def parse_prefix(line):
+    """解析日志行开头的时间和级别
+    Returns:
+        tuple: ('HH:MM', 'LEVEL')，续行（如异常堆栈）返回 (None, None)
+    """
+    if isinstance(line, str):
+        line = line[:32].encode('utf-8', 'replace')
+    match = _PREFIX_RE.match(line)
+    if not match:
+        return None, None
+    return match.group(1).decode(), match.group(2).decode()
+
+
+def match_line(line, text='', level=None, start=None, end=None):
+    """判断一行日志是否满足查询条件
+    Args:
+        line: 日志行
+        text: 关键字，忽略大小写
+        level: 日志级别，如 'ERROR'
+        start / end: 'HH:MM' 时间范围（含）
+    """
+    if text and text.lower() not in line.lower():
+        return False
+    if level or start or end:
+        minute, line_level = parse_prefix(line)
+        if level and line_level != level:
+            return False
+        if start and (minute is None or minute < start):
+            return False
+        if end and (minute is None or minute > end):
+            return False
+    return True
+
+
+def _minutes(start, end):
+    """'HH:MM' 时间范围内的所有分钟"""
+    start_h, start_m = map(int, (start or '00:00').split(':'))
+    end_h, end_m = map(int, (end or '23:59').split(':'))
+    return [f"{minute // 60:02d}:{minute % 60:02d}"
+            for minute in range(start_h * 60 + start_m, end_h * 60 + end_m + 1)]
+
+
+def fingerprint(path):
+    """文件开头字节的哈希，文件不足 FINGERPRINT_SIZE 时返回 None"""
+    head = read_head(path, FINGERPRINT_SIZE)
+    if len(head) < FINGERPRINT_SIZE:
+        return None
+    return hashlib.sha1(head).hexdigest()
+
+
+def _read_line(mm, offset):
+    end = mm.find(b'\n', offset)
+    if end < 0:
+        end = len(mm)
+    return mm[offset:end].decode('utf-8', 'replace').rstrip('\r')
+
+
+class LogSegment:
+    """一个日志文件的索引
+
+    .post 文件是追加写入的 uint64 行偏移；.terms 是追加写入的记录，每次增量索引追加一条
+    (已索引字节数, 偏移数, 已归档, 代数, {词: [起始位置, 数量]})，读取时依次合并。
+    增量写入 LOG_INDEX_COMPACT_BATCHES 次或文件归档后整理：每个词的偏移在新一代的 .post 中连续存放，
+    .terms 只保留一条记录。查询时只读取用到的词。
+    """
+    def __init__(self, index_dir, key):
+        self.key = key
+        self.index_dir = index_dir
+        self.terms_path = os.path.join(index_dir, f'{key}.terms')
+        self._reset()
+        if os.path.exists(self.terms_path):
+            self._load()
+        self._remove_stale_posts()
+
+    def _reset(self):
+        self.indexed = 0  # 已索引的字节数
+        self.post_count = 0  # .post 中的偏移数
+        self.sealed = False  # 文件已压缩归档，不会再增长
+        self.generation = 0  # .post 的代数，整理后加一
+        self.batches = 0  # .terms 中的记录数
+        self.terms = {}  # {词: [起始位置, 数量, ...]}
+
+    @property
+    def post_path(self):
+        return os.path.join(self.index_dir, f'{self.key}.{self.generation}.post')
+
+    def _load(self):
+        size = os.path.getsize(self.terms_path)
+        good = 0
+        with open(self.terms_path, 'rb') as f:
+            while f.tell() < size:
+                try:
+                    self.indexed, self.post_count, self.sealed, self.generation, delta = pickle.load(f)
+                except Exception:
+                    # 上次写入中断或旧版本的格式
+                    break
+                for term, ranges in delta.items():
+                    self.terms.setdefault(term, []).extend(ranges)
+                self.batches += 1
+                good = f.tell()
+        if good == 0:
+            self._reset()
+            return
+        if good < size:
+            with open(self.terms_path, 'r+b') as f:
+                f.truncate(good)
+        post_size = os.path.getsize(self.post_path) if os.path.exists(self.post_path) else 0
+        if post_size < self.post_count * 8:
+            # .post 不完整，重新建立
+            self._reset()
+        elif post_size > self.post_count * 8:
+            # 偏移已写入但记录没有写入，丢弃多出的部分
+            with open(self.post_path, 'r+b') as f:
+                f.truncate(self.post_count * 8)
+
+    def _remove_stale_posts(self):
+        """删除整理或重新建立后遗留的其他代的 .post"""
+        if not os.path.isdir(self.index_dir):
+            return
+        current = os.path.basename(self.post_path)
+        for name in os.listdir(self.index_dir):
+            if name.startswith(f'{self.key}.') and name.endswith('.post') and name != current:
+                try:
+                    os.remove(os.path.join(self.index_dir, name))
+                except OSError:
+                    pass
+
+    def index(self, mm, token=None, seal=False):
+        """索引 mm 中 self.indexed 之后的完整行
+        Args:
+            seal: 文件已归档，索引完成后不再检查
+        """
+        limit = mm.rfind(b'\n') + 1
+        if limit <= self.indexed:
+            if seal and not self.sealed:
+                self.sealed = True
+                self._append({})
+            return False
+        postings = {}
+        pos = self.indexed
+        while pos < limit:
+            if token is not None and token.is_cancelled():
+                break
+            end = mm.find(b'\n', pos, limit)
+            line = mm[pos:end]
+            terms = tokenize(line.decode('utf-8', 'replace'))
+            minute, level = parse_prefix(line)
+            if level:
+                terms.add(_LEVEL_TERM + level)
+                terms.add(_TIME_TERM + minute)
+            for term in terms:
+                offsets = postings.get(term)
+                if offsets is None:
+                    offsets = postings[term] = array('Q')
+                offsets.append(pos)
+            pos = end + 1
+        if pos == self.indexed:
+            return False
+        self.sealed = seal and pos == limit
+
+        if self.post_count == 0:
+            # 重新建立时清除残留
+            self.terms = {}
+            self.batches = 0
+        delta = {}
+        with open(self.post_path, 'ab' if self.post_count else 'wb') as f:
+            for term, offsets in postings.items():
+                delta[term] = [self.post_count, len(offsets)]
+                self.terms.setdefault(term, []).extend(delta[term])
+                offsets.tofile(f)
+                self.post_count += len(offsets)
+        self.indexed = pos
+        self._append(delta)
+        return True
+
+    def _append(self, delta):
+        """追加一条记录，只写入本次新增的词的范围"""
+        with open(self.terms_path, 'ab' if self.batches else 'wb') as f:
+            pickle.dump((self.indexed, self.post_count, self.sealed, self.generation, delta), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        self.batches += 1
+        if self.batches > 1 and (self.sealed or self.batches >= LOG_INDEX_COMPACT_BATCHES):
+            self._compact()
+
+    def _compact(self):
+        """把每个词的偏移连续写入新一代的 .post，.terms 改写为一条记录"""
+        old_post = self.post_path
+        generation = self.generation + 1
+        post_path = os.path.join(self.index_dir, f'{self.key}.{generation}.post')
+        terms = {}
+        count = 0
+        with open(old_post, 'rb') as src, open(post_path, 'wb') as dst:
+            for term in self.terms:
+                offsets = self.postings(term, src)
+                offsets.tofile(dst)
+                terms[term] = [count, len(offsets)]
+                count += len(offsets)
+        # .terms 替换后才使用新的 .post，中断时旧的记录和 .post 仍然有效
+        tmp_path = self.terms_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((self.indexed, count, self.sealed, generation, terms), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.terms_path)
+        self.generation, self.post_count, self.terms, self.batches = generation, count, terms, 1
+        try:
+            os.remove(old_post)
+        except OSError:
+            pass
+
+    def matching_terms(self, term, mode):
+        """词表中按匹配方式与 term 匹配的词"""
+        if mode == 'exact':
+            return [term]
+        if mode == 'prefix':
+            return [item for item in self.terms if item.startswith(term) and ':' not in item]
+        if mode == 'suffix':
+            return [item for item in self.terms if item.endswith(term) and ':' not in item]
+        return [item for item in self.terms if term in item and ':' not in item]
+
+    def count(self, term):
+        ranges = self.terms.get(term, ())
+        return sum(ranges[1::2])
+
+    def postings(self, term, post_file):
+        """读取词的全部行偏移（升序）"""
+        offsets = array('Q')
+        ranges = self.terms.get(term, ())
+        for i in range(0, len(ranges), 2):
+            post_file.seek(ranges[i] * 8)
+            offsets.fromfile(post_file, ranges[i + 1])
+        return offsets
+
+
+class LogIndex:
+    """日志文件的增量倒排索引"""
+    def __init__(self, log_file=LOG_FILE_PATH, index_dir=LOG_INDEX_DIR):
+        self.log_file = log_file
+        self.index_dir = index_dir
+        self.segments = {}  # {指纹: LogSegment}
+        self._lock = threading.Lock()
+
+    def log_files(self):
+        """当前日志和所有归档，按从旧到新排序"""
+        return log_files(self.log_file)
+
+    def _segment(self, key):
+        segment = self.segments.get(key)
+        if segment is None:
+            segment = self.segments[key] = LogSegment(self.index_dir, key)
+        return segment
+
+    def update(self, token=None, progress=None):
+        """索引所有日志文件新追加的内容，删除已不存在的文件的索引
+        Args:
+            token: 取消令牌
+            progress: 进度回调 progress(msg)
+        """
+        with self._lock:
+            os.makedirs(self.index_dir, exist_ok=True)
+            keys = set()
+            for path in self.log_files():
+                if token is not None and token.is_cancelled():
+                    return
+                try:
+                    key = fingerprint(path)
+                    if key is None:
+                        continue
+                    keys.add(key)
+                    segment = self._segment(key)
+                    compressed = is_compressed(path)
+                    if segment.sealed or (not compressed and os.path.getsize(path) <= segment.indexed):
+                        continue
+                    if progress:
+                        progress(f"索引 {os.path.basename(path)}")
+                    with open_segment(path) as mm:
+                        if mm is not None:
+                            segment.index(mm, token, seal=compressed)
+                except OSError:
+                    # 文件正在轮转
+                    continue
+            if token is not None and token.is_cancelled():
+                return
+            for name in os.listdir(self.index_dir):
+                key = name.split('.', 1)[0]
+                if key not in keys:
+                    self.segments.pop(key, None)
+                    try:
+                        os.remove(os.path.join(self.index_dir, name))
+                    except OSError:
+                        pass
+
+    def search(self, text='', level=None, start=None, end=None, limit=LOG_SEARCH_LIMIT):
+        """查询日志
+        Args:
+            text: 关键字，忽略大小写
+            level: 日志级别
+            start / end: 'HH:MM' 时间范围（含）
+            limit: 最多返回的条数，优先返回最新的
+        Returns:
+            list: [(文件路径, 行偏移, 行内容)]，按时间先后排序
+        """
+        text = text.strip()
+        level = level.upper() if level else None
+        results = []
+        with self._lock:
+            for path in reversed(self.log_files()):
+                if len(results) >= limit:
+                    break
+                try:
+                    key = fingerprint(path)
+                    segment = self.segments.get(key) if key else None
+                    if segment is None and key and os.path.exists(os.path.join(self.index_dir, f'{key}.terms')):
+                        segment = self._segment(key)
+                    found = self._search_file(path, segment, text, level, start, end, limit - len(results))
+                except OSError:
+                    continue
+                # 从新到旧收集，最后整体反转
+                results.extend((path, offset, line) for offset, line in reversed(found))
+        results.reverse()
+        return results
+
+    def _candidates(self, segment, text, level, start, end):
+        """根据索引得到候选行偏移
+        Returns:
+            set: 候选偏移；None 表示查询条件中没有可用索引的词，需要扫描
+        """
+        groups = [segment.matching_terms(term, mode) for term, mode in query_terms(text)]
+        if level:
+            groups.append([_LEVEL_TERM + level])
+        if start or end:
+            groups.append([_TIME_TERM + minute for minute in _minutes(start, end)])
+        if not groups:
+            return None
+        sizes = [sum(segment.count(term) for term in group) for group in groups]
+        if min(sizes) == 0:
+            return set()
+        candidates = None
+        with open(segment.post_path, 'rb') as post_file:
+            order = sorted(range(len(groups)), key=sizes.__getitem__)
+            smallest = sizes[order[0]]
+            for i in order:
+                # 远大于最小集合的条件留到逐行校验，避免读取大量偏移
+                if candidates is not None and sizes[i] > smallest * 16:
+                    break
+                offsets = set()
+                for term in groups[i]:
+                    offsets.update(segment.postings(term, post_file))
+                candidates = offsets if candidates is None else candidates & offsets
+        return candidates
+
+    def _search_file(self, path, segment, text, level, start, end, limit):
+        """在单个文件中查询，返回 [(偏移, 行)]，按偏移升序"""
+        indexed = segment.indexed if segment else 0
+        candidates = self._candidates(segment, text, level, start, end) if indexed else None
+        if candidates is not None and not candidates and segment.sealed:
+            # 已归档且索引中没有匹配，不用打开（解压）文件
+            return []
+        with open_segment(path) as mm:
+            if mm is None:
+                return []
+            found = []
+            # 未索引的尾部（或没有索引的小文件）直接扫描
+            if indexed < len(mm):
+                found = self._scan(mm, indexed, text, level, start, end, limit)
+            if indexed == 0 or len(found) >= limit:
+                found.sort()
+                return found[-limit:]
+            if candidates is None:
+                found.extend(self._scan(mm, 0, text, level, start, end, limit - len(found), stop=indexed))
+                found.sort()
+                return found[-limit:]
+            for offset in sorted(candidates, reverse=True):
+                if len(found) >= limit:
+                    break
+                line = _read_line(mm, offset)
+                if match_line(line, text, level, start, end):
+                    found.append((offset, line))
+        found.sort()
+        return found
+
+    def _scan(self, mm, pos, text, level, start, end, limit, stop=None):
+        """顺序扫描 [pos, stop) 范围内的行"""
+        stop = len(mm) if stop is None else stop
+        found = []
+        needle = text.encode('utf-8') if text else None
+        if needle and needle.lower() == needle.upper():
+            # 无大小写区别的关键字（数字、汉字）直接用 find 定位
+            while pos < stop:
+                hit = mm.find(needle, pos, stop)
+                if hit < 0:
+                    break
+                line_start = mm.rfind(b'\n', 0, hit) + 1
+                line_end = mm.find(b'\n', hit, stop)
+                line_end = stop if line_end < 0 else line_end
+                line = mm[line_start:line_end].decode('utf-8', 'replace').rstrip('\r')
+                if match_line(line, text, level, start, end):
+                    found.append((line_start, line))
+                pos = line_end + 1
+            return found[-limit:]
+        while pos < stop:
+            line_end = mm.find(b'\n', pos, stop)
+            if line_end < 0:
+                line_end = stop
+            line = mm[pos:line_end].decode('utf-8', 'replace').rstrip('\r')
+            if match_line(line, text, level, start, end):
+                found.append((pos, line))
+            pos = line_end + 1
+        return found[-limit:]
+
+
+# 全局单例
+log_index = LogIndex()
@@ -0,0 +1,164 @@
+# 大日志文件分页读取
+# 后台建立稀疏的行偏移索引（每 64 KB 一条），按行号读取可见的若干行，内存占用与文件大小基本无关
+# 压缩文件解压到临时文件后映射，不读入内存
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from contextlib import contextmanager
+
+from utils.log_files import (decompress_to_temp, is_compressed, map_file,
+                             open_segment)
+
+BLOCK_SIZE = 64 * 1024  # 稀疏索引的间隔（字节）
+_TIME_RE = re.compile(rb'^\d\d:\d\d:\d\d')
+
+
+class LogPager:
+    """日志文件分页器
+
+    offsets[i] 是第 i 个块开头的字节偏移，line_numbers[i] 是该位置的行号，
+    读取第 n 行时先二分找到所在的块，再在块内向后查找换行。
+    文件只在每次操作内映射，不长期占用（Windows 上长期打开会导致日志无法轮转）；
+    压缩文件只解压一次，临时文件在 reset() / close() 时删除。
+    """
+    def __init__(self, path):
+        self.path = path
+        self.compressed = is_compressed(path)
+        self._temp = None  # 压缩文件解压后的临时文件
+        self._data = None  # 临时文件的映射
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空索引，文件被轮转或截断后调用"""
+        with self._lock:
+            self._release()
+            self.offsets = array('Q', [0])
+            self.line_numbers = array('Q', [0])
+            self.indexed = 0  # 已索引的字节数（到完整行为止）
+            self.line_count = 0
+            self.size = 0
+
+    def close(self):
+        """删除压缩文件的临时文件"""
+        with self._lock:
+            self._release()
+
+    def _release(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        if self._temp is not None:
+            self._temp.close()
+            self._temp = None
+
+    @contextmanager
+    def _buffer(self):
+        if self.compressed:
+            if self._temp is None:
+                self._temp = decompress_to_temp(self.path)
+                self._data = map_file(self._temp)
+            yield self._data if self._data is not None else b''
+            return
+        with open_segment(self.path) as mm:
+            yield mm if mm is not None else b''
+
+    def build_index(self, token=None, progress=None):
+        """索引到文件当前末尾，可以多次调用，只处理新增的部分
+        Args:
+            token: 取消令牌
+            progress: 进度回调 progress(已索引字节数, 文件大小)
+        Returns:
+            bool: 文件是否比已索引的内容短（被轮转或截断）
+        """
+        while token is None or not token.is_cancelled():
+            with self._lock, self._buffer() as mm:
+                self.size = len(mm)
+                if self.size < self.indexed:
+                    return True
+                limit = mm.rfind(b'\n') + 1
+                if self.indexed >= limit:
+                    return False
+                pos = self.indexed
+                # 每次持锁处理有限的块，读取可见行时不用等待太久
+                for _ in range(64):
+                    if pos >= limit:
+                        break
+                    end = pos + BLOCK_SIZE
+                    end = limit if end >= limit else mm.find(b'\n', end - 1, limit) + 1
+                    self.line_count += mm[pos:end].count(b'\n')
+                    pos = end
+                    self.offsets.append(pos)
+                    self.line_numbers.append(self.line_count)
+                self.indexed = pos
+            if progress:
+                progress(self.indexed, self.size)
+        return False
+
+    def _line_offset(self, mm, line):
+        i = bisect_right(self.line_numbers, line) - 1
+        pos = self.offsets[i]
+        for _ in range(line - self.line_numbers[i]):
+            pos = mm.find(b'\n', pos) + 1
+        return pos
+
+    def lines(self, first, count):
+        """读取从第 first 行开始的 count 行（只包括已索引的行）"""
+        with self._lock, self._buffer() as mm:
+            if len(mm) < self.indexed:
+                return []
+            first = max(0, min(first, self.line_count))
+            count = min(count, self.line_count - first)
+            pos = self._line_offset(mm, first)
+            result = []
+            for _ in range(count):
+                end = mm.find(b'\n', pos)
+                result.append(mm[pos:end].decode('utf-8', 'replace').rstrip('\r'))
+                pos = end + 1
+            return result
+
+    def find_time(self, target):
+        """二分查找第一条时间不早于 target 的日志
+        Args:
+            target: 'HH:MM:SS' 或 'HH:MM'
+        Returns:
+            int: 行号，已索引的部分中没有时返回 None
+
+        按 %H:%M:%S 前缀比较，文件跨越午夜时结果不准确。
+        """
+        if len(target) == 5:
+            target += ':00'
+        target = target.encode()
+        with self._lock, self._buffer() as mm:
+            limit = self.indexed
+            if len(mm) < limit:
+                return None
+            lo, hi = 0, limit
+            while lo < hi:
+                mid = (lo + hi) // 2
+                line_start = mm.rfind(b'\n', 0, mid) + 1
+                time_text, line_pos = self._time_from(mm, line_start, limit)
+                if time_text is None or time_text >= target:
+                    hi = line_start
+                else:
+                    lo = mm.find(b'\n', line_pos, limit) + 1
+            if lo >= limit:
+                return None
+            i = bisect_right(self.offsets, lo) - 1
+            return self.line_numbers[i] + mm[self.offsets[i]:lo].count(b'\n')
+
+    @staticmethod
+    def _time_from(mm, pos, limit):
+        """从 pos 开始第一条带时间前缀的行，跳过异常堆栈等续行
+        Returns:
+            tuple: (时间, 行偏移)，没有时返回 (None, limit)
+        """
+        while pos < limit:
+            match = _TIME_RE.match(mm[pos:pos + 8])
+            if match:
+                return match.group(), pos
+            pos = mm.find(b'\n', pos, limit) + 1
+            if pos == 0:
+                break
+        return None, limit
@@ -0,0 +1,253 @@
+# 日志统计
+# 逐个日志文件解析为列式数组（时间戳、级别、插件、消息哈希），用 NumPy 向量化统计
+# 每个文件的解析结果按指纹缓存为 .npz，归档文件只解析一次
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from constants.config import LOG_FILE_PATH, LOG_STATS_DIR
+from utils.log_files import is_compressed, log_files, open_segment
+from utils.log_index import fingerprint
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+_LEVEL_CODES = {name.encode(): code for code, name in enumerate(LEVELS)}
+_LINE_RE = re.compile(rb'^(\d\d):(\d\d):(\d\d) - ([A-Z]+) - (?:\[([^\]]+)\] )?(.*)$')
+_NUMBER_RE = re.compile(rb'\d+')
+CACHE_VERSION = 1
+
+
+def _message_hash(message):
+    """消息模板的 64 位哈希，数字替换为 #，同一模板的消息归为一类"""
+    return int.from_bytes(hashlib.blake2b(message, digest_size=8).digest(), 'little')
+
+
+class SegmentColumns:
+    """单个日志文件的列式数据
+
+    ts: 时间戳（秒）；level: LEVELS 下标；plugin: plugins 下标（0 为主程序）；msg: 消息模板哈希
+    samples: {消息哈希: 模板文本}
+    """
+    def __init__(self, ts, level, plugin, msg, plugins, samples, size):
+        self.ts = ts
+        self.level = level
+        self.plugin = plugin
+        self.msg = msg
+        self.plugins = plugins
+        self.samples = samples
+        self.size = size  # 已解析的字节数
+
+    @classmethod
+    def parse(cls, buffer, mtime):
+        """解析日志内容
+        Args:
+            buffer: 日志内容（mmap 或 bytes）
+            mtime: 文件修改时间，用于推算日期（日志行只有时分秒）
+        """
+        seconds, levels, plugins, hashes = [], [], [], []
+        plugin_ids = {'': 0}
+        samples = {}
+        limit = buffer.rfind(b'\n') + 1
+        pos = 0
+        while pos < limit:
+            end = buffer.find(b'\n', pos, limit)
+            match = _LINE_RE.match(buffer[pos:end].rstrip(b'\r'))
+            pos = end + 1
+            if not match:
+                # 异常堆栈等续行
+                continue
+            hour, minute, second, level, plugin, message = match.groups()
+            code = _LEVEL_CODES.get(level)
+            if code is None:
+                continue
+            template = _NUMBER_RE.sub(b'#', message)
+            digest = _message_hash(template)
+            if digest not in samples:
+                samples[digest] = template.decode('utf-8', 'replace')
+            plugin = plugin.decode('utf-8', 'replace') if plugin else ''
+            plugin_id = plugin_ids.get(plugin)
+            if plugin_id is None:
+                plugin_id = plugin_ids[plugin] = len(plugin_ids)
+            seconds.append(int(hour) * 3600 + int(minute) * 60 + int(second))
+            levels.append(code)
+            plugins.append(plugin_id)
+            hashes.append(digest)
+
+        seconds = np.array(seconds, dtype=np.int64)
+        # 时间倒退超过半天视为跨过午夜，以文件修改时间所在日期作为最后一天
+        days = np.zeros(len(seconds), dtype=np.int64)
+        if len(seconds) > 1:
+            days[1:] = np.cumsum(np.diff(seconds) < -43200)
+        last_day = datetime.fromtimestamp(mtime).replace(hour=0, minute=0, second=0, microsecond=0)
+        first_day = last_day - timedelta(days=int(days[-1]) if len(days) else 0)
+        ts = int(first_day.timestamp()) + days * 86400 + seconds
+        return cls(ts,
+                   np.array(levels, dtype=np.uint8),
+                   np.array(plugins, dtype=np.int32),
+                   np.array(hashes, dtype=np.uint64),
+                   list(plugin_ids),
+                   samples,
+                   limit)
+
+    def save(self, path):
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, version=np.array(CACHE_VERSION), size=np.array(self.size),
+                 ts=self.ts, level=self.level, plugin=self.plugin, msg=self.msg,
+                 plugins=np.array(self.plugins, dtype=str),
+                 sample_keys=np.array(list(self.samples), dtype=np.uint64),
+                 sample_texts=np.array(list(self.samples.values()), dtype=str))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data['version']) != CACHE_VERSION:
+                return None
+            samples = dict(zip(data['sample_keys'].tolist(), data['sample_texts'].tolist()))
+            return cls(data['ts'], data['level'], data['plugin'], data['msg'],
+                       data['plugins'].tolist(), samples, int(data['size']))
+
+
+class LogStats:
+    """读取所有日志文件的列式数据并统计"""
+    def __init__(self, log_file=LOG_FILE_PATH, cache_dir=LOG_STATS_DIR):
+        self.log_file = log_file
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+
+    def _segment(self, path):
+        """读取单个文件的列式数据，优先使用缓存
+        Returns:
+            tuple: (指纹, SegmentColumns)
+        """
+        key = fingerprint(path)
+        cache_path = os.path.join(self.cache_dir, f'{key}.npz') if key else None
+        compressed = is_compressed(path)
+        if cache_path and os.path.exists(cache_path):
+            try:
+                columns = SegmentColumns.load(cache_path)
+            except Exception:
+                columns = None
+            # 归档文件不再变化；当前文件大小没变时缓存有效
+            if columns is not None and (compressed or columns.size == os.path.getsize(path)):
+                return key, columns
+        mtime = os.path.getmtime(path)
+        with open_segment(path) as buffer:
+            columns = SegmentColumns.parse(buffer if buffer is not None else b'', mtime)
+        if cache_path:
+            columns.save(cache_path)
+        return key, columns
+
+    def load(self, token=None, progress=None):
+        """合并所有日志文件的列
+        Returns:
+            dict: ts / level / plugin / msg 数组，plugins 插件名列表，samples 消息模板
+        """
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            paths = log_files(self.log_file)
+            keys = set()
+            parts = []
+            plugins = {'': 0}
+            samples = {}
+            for i, path in enumerate(paths):
+                if token is not None and token.is_cancelled():
+                    return None
+                if progress:
+                    progress(f"读取 {os.path.basename(path)} ({i + 1}/{len(paths)})")
+                try:
+                    key, columns = self._segment(path)
+                    keys.add(key)
+                except OSError:
+                    continue
+                # 各文件的插件编号映射到统一编号
+                mapping = np.array([plugins.setdefault(name, len(plugins)) for name in columns.plugins],
+                                   dtype=np.int32)
+                parts.append((columns.ts, columns.level, mapping[columns.plugin], columns.msg))
+                samples.update(columns.samples)
+            # 删除已不存在的文件的缓存
+            for name in os.listdir(self.cache_dir):
+                if name.split('.', 1)[0] not in keys:
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+        if parts:
+            ts, level, plugin, msg = (np.concatenate(column) for column in zip(*parts))
+        else:
+            ts, level, plugin, msg = (np.empty(0, dtype=dtype) for dtype in (np.int64, np.uint8, np.int32, np.uint64))
+        return {'ts': ts, 'level': level, 'plugin': plugin, 'msg': msg,
+                'plugins': list(plugins), 'samples': samples}
+
+
+def summarize(data, since=None, levels=('ERROR', 'WARNING'), top=50):
+    """统计
+    Args:
+        data: LogStats.load() 的结果
+        since: 只统计该时间戳之后的日志
+        levels: 参与统计的级别
+        top: 高频消息和繁忙分钟的条数
+    Returns:
+        dict:
+            per_plugin: [(插件, {级别: 数量})]，按总数降序
+            per_minute: [(分钟时间戳, 插件, 级别, 数量)]，取数量最多的 top 条，按时间排序
+            top_messages: [(数量, 级别, 插件, 消息模板)]
+            total: 参与统计的日志数
+    """
+    codes = np.array([LEVELS.index(name) for name in levels], dtype=np.uint8)
+    mask = np.isin(data['level'], codes)
+    if since is not None:
+        mask &= data['ts'] >= since
+    ts = data['ts'][mask]
+    level = data['level'][mask].astype(np.int64)
+    plugin = data['plugin'][mask].astype(np.int64)
+    msg = data['msg'][mask]
+    plugins = data['plugins']
+    n_levels = len(LEVELS)
+
+    # 插件 x 级别 计数
+    counts = np.bincount(plugin * n_levels + level, minlength=len(plugins) * n_levels).reshape(len(plugins), n_levels)
+    order = np.argsort(-counts.sum(axis=1), kind='stable')
+    per_plugin = [(plugins[i] or '主程序', {LEVELS[code]: int(counts[i, code]) for code in codes})
+                  for i in order if counts[i].sum()]
+
+    # 分钟 x 插件 x 级别 计数
+    per_minute = []
+    if len(ts):
+        minutes = ts // 60
+        keys = (minutes - minutes.min()) * (len(plugins) * n_levels) + plugin * n_levels + level
+        unique_keys, key_counts = np.unique(keys, return_counts=True)
+        busiest = np.argsort(-key_counts, kind='stable')[:top]
+        for i in sorted(busiest, key=lambda i: unique_keys[i]):
+            key = int(unique_keys[i])
+            minute, rest = divmod(key, len(plugins) * n_levels)
+            plugin_id, code = divmod(rest, n_levels)
+            per_minute.append(((int(minutes.min()) + minute) * 60, plugins[plugin_id] or '主程序',
+                               LEVELS[code], int(key_counts[i])))
+
+    # 高频消息（同一模板、级别、插件）
+    top_messages = []
+    if len(msg):
+        records = np.empty(len(msg), dtype=[('msg', np.uint64), ('plugin', np.int64), ('level', np.int64)])
+        records['msg'], records['plugin'], records['level'] = msg, plugin, level
+        unique_records, record_counts = np.unique(records, return_counts=True)
+        for i in np.argsort(-record_counts, kind='stable')[:top]:
+            record = unique_records[i]
+            top_messages.append((int(record_counts[i]), LEVELS[int(record['level'])],
+                                 plugins[int(record['plugin'])] or '主程序',
+                                 data['samples'].get(int(record['msg']), '')))
+    return {'per_plugin': per_plugin, 'per_minute': per_minute, 'top_messages': top_messages,
+            'total': int(mask.sum())}
+
+
+def since_hours(hours):
+    """最近 hours 小时的起始时间戳，hours 为 0 时返回 None（全部）"""
+    return time.time() - hours * 3600 if hours else None
+
+
+# 全局单例
+log_stats = LogStats()
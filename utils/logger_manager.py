@@ -1,23 +1,151 @@
+import atexit
+import json
 import logging
+import queue
 import sys
+import threading
+from datetime import datetime
 from typing import Optional
-from PySide2.QtCore import QObject, Signal
-from logging.handlers import RotatingFileHandler  # 导入RotatingFileHandler
-from constants.config import LOG_FILE_PATH
-class LogSignal(QObject):
-    """用于发送日志信号的QT对象"""
-    log_signal = Signal(str)
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler  # 导入RotatingFileHandler
+from constants.config import (LOG_COMPRESSION, LOG_DEDUP, LOG_FILE_PATH,
+                              LOG_JSONL_FILE_PATH, LOG_MAX_BYTES,
+                              LOG_QUEUE_OVERFLOW, LOG_QUEUE_SIZE,
+                              LOG_RATE_BURST, LOG_RATE_LIMIT,
+                              LOG_REPORT_INTERVAL, LOG_RETENTION_DAYS,
+                              LOG_RETENTION_MB, LOG_ROTATION)
+from utils.log_files import CompressingRotatingFileHandler
+from utils.log_filters import LogThrottleFilter
+
+OVERFLOW_POLICIES = ('block', 'drop-oldest', 'drop-debug')
+LOGGER_NAME = 'app_logger'
+PLUGIN_LOG_LEVELS = ('debug', 'info', 'warning', 'error')
+# LogRecord 自带的属性，其余属性来自 extra
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+    'message', 'asctime', 'plugin', 'plugin_prefix', 'duration'}
+
+
+def plugin_of(record):
+    """日志所属插件名，app_logger 本身返回空字符串"""
+    name = record.name
+    return name[len(LOGGER_NAME) + 1:] if name.startswith(LOGGER_NAME + '.') else ''
+
+
+class PluginFormatter(logging.Formatter):
+    """插件日志在消息前加上 [插件名]"""
+    def format(self, record):
+        record.plugin = plugin_of(record)
+        record.plugin_prefix = f"[{record.plugin}] " if record.plugin else ''
+        return super().format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON Lines 格式，extra 中的字段放入 extra，duration 单独列出"""
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'plugin': plugin_of(record),
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        duration = getattr(record, 'duration', None)
+        if duration is not None:
+            data['duration'] = duration
+        extra = {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+        if extra:
+            data['extra'] = extra
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SinkFilter(logging.Filter):
+    """输出端的级别过滤，单独设置过级别的插件按插件的级别过滤"""
+    def __init__(self, level, plugin_levels):
+        super().__init__()
+        self.level = level
+        self.plugin_levels = plugin_levels  # {logger 名: 级别}，与 LoggerManager 共用
+
+    def filter(self, record):
+        return record.levelno >= self.plugin_levels.get(record.name, self.level)
+
 
 class UIHandler(logging.Handler):
     def __init__(self, ui_component):
         super().__init__()
         self.ui_component = ui_component
-        self.log_signal = LogSignal()
-        self.log_signal.log_signal.connect(self.ui_component.write)
 
     def emit(self, record):
+        # LogFrame.write 只是把消息放入线程安全的队列，由界面定时批量取出，
+        # 不再为每行日志投递一个 Qt 事件
         log_entry = self.format(record)
-        self.log_signal.log_signal.emit(log_entry)
+        self.ui_component.write(log_entry)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """写入有界队列的日志处理器，调用方只做消息拼接和入队
+
+    队列满时按 overflow 处理：
+        block: 等待监听线程腾出空间
+        drop-oldest: 丢弃队列中最早的一条
+        drop-debug: 丢弃新来的 DEBUG 日志，其余级别等待
+    """
+    def __init__(self, log_queue, overflow=LOG_QUEUE_OVERFLOW):
+        super().__init__(log_queue)
+        if overflow not in OVERFLOW_POLICIES:
+            overflow = 'block'
+        self.overflow = overflow
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        # 只在调用方线程合并参数和异常信息，时间格式化等留给监听线程
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self.overflow == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if self.overflow == 'drop-debug':
+            if record.levelno <= logging.DEBUG:
+                self._count_dropped()
+                return
+            self.queue.put(record)
+            return
+        # drop-oldest
+        while True:
+            try:
+                self.queue.get_nowait()
+                self._count_dropped()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                continue
+
+    def _count_dropped(self):
+        with self._dropped_lock:
+            self.dropped += 1
+
+
+class BlockingQueueListener(QueueListener):
+    """停止时等待队列腾出空间再放入结束标记，有界队列满时也能正常退出"""
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
 
 class LoggerManager:
     _instance: Optional['LoggerManager'] = None
@@ -38,50 +166,170 @@ class LoggerManager:
             self.file_handler = None
             self.ui_handler = None
             self.console_handler = None
+            self.jsonl_handler = None
+            self.queue_handler = None
+            self.throttle = None
+            self.listener = None
+            self.plugin_levels = {}  # 单独设置级别的插件 {logger 名: 级别}
+            self.sink_filters = {}  # {输出端: SinkFilter}
     
-    def setup(self, ui_component=None):
-        """初始化日志系统"""
+    def setup(self, ui_component=None, queue_size=LOG_QUEUE_SIZE, overflow=LOG_QUEUE_OVERFLOW,
+              console_level='info', jsonl=False, rotation=LOG_ROTATION, compression=LOG_COMPRESSION,
+              retention_mb=LOG_RETENTION_MB, retention_days=LOG_RETENTION_DAYS):
+        """初始化日志系统
+
+        app_logger 上只挂一个队列处理器，文件、控制台、界面处理器由后台监听线程调用，
+        记录日志时不会等待磁盘写入和文件轮转。
+        各输出端的级别由 SinkFilter 控制，app_logger 的级别取所有输出端中最低的，
+        低于该级别的日志在调用处直接返回，不做任何格式化。
+        Args:
+            ui_component: 提供 write(msg) 的界面控件
+            queue_size: 日志队列容量，0 为不限制
+            overflow: 队列满时的策略，见 BoundedQueueHandler
+            console_level: 控制台日志级别
+            jsonl: 是否额外输出 JSON Lines 格式的结构化日志
+            rotation: 'size' 按大小轮转保留 5 个备份，'compress' 后台压缩归档，见 CompressingRotatingFileHandler
+            compression / retention_mb / retention_days: compress 轮转的压缩格式和保留策略
+        """
         if self._logger is not None:
             return self._logger
             
         self._ui_component = ui_component
-        self._logger = logging.getLogger('app_logger')
-        self._logger.setLevel(logging.DEBUG)
+        self._logger = logging.getLogger(LOGGER_NAME)
         
         # 文件处理器
-        self.file_handler = RotatingFileHandler(LOG_FILE_PATH, maxBytes=5*1024*1024, backupCount=5, encoding='utf-8')  # 设置最大文件大小为5MB，保留5个备份
-        self.file_handler.setLevel(logging.DEBUG)
+        if rotation == 'compress':
+            def file_handler(path):
+                return CompressingRotatingFileHandler(path, LOG_MAX_BYTES, compression, retention_mb, retention_days)
+        else:
+            def file_handler(path):
+                return RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=5, encoding='utf-8')  # 设置最大文件大小为5MB，保留5个备份
+        self.file_handler = file_handler(LOG_FILE_PATH)
+        self._add_sink_filter('file', self.file_handler, logging.INFO)
         
         # 控制台处理器
         self.console_handler = logging.StreamHandler(sys.stdout)
-        self.console_handler.setLevel(logging.DEBUG)
+        self._add_sink_filter('console', self.console_handler, _level_value(console_level))
         
         # 格式化器
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S')
+        formatter = PluginFormatter('%(asctime)s - %(levelname)s - %(plugin_prefix)s%(message)s', datefmt='%H:%M:%S')
         self.file_handler.setFormatter(formatter)
         self.console_handler.setFormatter(formatter)
-        
-        self._logger.addHandler(self.file_handler)
-        self._logger.addHandler(self.console_handler)
+        handlers = [self.file_handler, self.console_handler]
         
         # UI处理器
         if ui_component:
             self.ui_handler = UIHandler(ui_component)
             self.ui_handler.setFormatter(formatter)
-            self.ui_handler.setLevel(logging.INFO)  # 设置UI显示的最低日志级别为INFO
-            self._logger.addHandler(self.ui_handler)
+            self._add_sink_filter('ui', self.ui_handler, logging.INFO)  # 设置UI显示的最低日志级别为INFO
+            handlers.append(self.ui_handler)
+
+        # 结构化日志，级别与文件日志一致
+        if jsonl:
+            self.jsonl_handler = file_handler(LOG_JSONL_FILE_PATH)
+            self.jsonl_handler.setFormatter(JsonFormatter())
+            self._add_sink_filter('jsonl', self.jsonl_handler, logging.INFO)
+            handlers.append(self.jsonl_handler)
+        self._update_logger_level()
+
+        # 队列处理器和监听线程，respect_handler_level 使各处理器的级别设置仍然生效
+        self.queue_handler = BoundedQueueHandler(queue.Queue(max(0, int(queue_size))), overflow)
+        # 入队前合并重复日志并限速
+        self.throttle = LogThrottleFilter(self.queue_handler.handle)
+        self.queue_handler.addFilter(self.throttle)
+        self.listener = BlockingQueueListener(self.queue_handler.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self._logger.addHandler(self.queue_handler)
+        atexit.register(self.shutdown)
         return self._logger
+
+    def shutdown(self):
+        """写完队列中的日志并停止监听线程，程序退出时调用
+
+        之后的日志直接由各处理器同步写出，不会丢失。
+        """
+        if self.listener is None:
+            return
+        # 汇报被抑制的日志，之后没有新日志时也不会丢失计数
+        self.throttle.close()
+        listener = self.listener
+        self.listener = None
+        self._logger.removeHandler(self.queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            if handler is not self.ui_handler:
+                self._logger.addHandler(handler)
+        if self.queue_handler.dropped:
+            self._logger.warning(f"日志队列已满，丢弃 {self.queue_handler.dropped} 条日志")
+        for handler in listener.handlers:
+            handler.flush()
     
+    def _add_sink_filter(self, sink, handler, level):
+        sink_filter = SinkFilter(level, self.plugin_levels)
+        handler.addFilter(sink_filter)
+        self.sink_filters[sink] = sink_filter
+
+    def _set_sink_level(self, sink, level):
+        sink_filter = self.sink_filters.get(sink)
+        if sink_filter is not None:
+            sink_filter.level = _level_value(level)
+            self._update_logger_level()
+
+    def _update_logger_level(self):
+        """app_logger 的级别取输出端中最低的，单独设置级别的插件 logger 不受影响"""
+        if self._logger is not None and self.sink_filters:
+            self._logger.setLevel(min(sink_filter.level for sink_filter in self.sink_filters.values()))
+
     def set_file_level(self, level: str):
         """设置文件日志级别"""
-        if self.file_handler:  # 检查文件处理器是否存在
-            self.file_handler.setLevel(getattr(logging, level.upper(), logging.INFO))
+        self._set_sink_level('file', level)
+        self._set_sink_level('jsonl', level)
 
     def set_frame_level(self, level: str):
         """设置界面日志级别"""
-        if self.ui_handler:  # 检查UI处理器是否存在
-            # print(level)
-            self.ui_handler.setLevel(getattr(logging, level.upper(), logging.INFO))
+        self._set_sink_level('ui', level)
+
+    def set_console_level(self, level: str):
+        """设置控制台日志级别"""
+        self._set_sink_level('console', level)
+
+    def configure_throttle(self, dedup=LOG_DEDUP, rate=LOG_RATE_LIMIT, burst=LOG_RATE_BURST,
+                           plugin_rates=None, report_interval=LOG_REPORT_INTERVAL):
+        """设置重复合并和限速，见 LogThrottleFilter
+        Args:
+            plugin_rates: 单独设置的插件限速 {插件名（不区分大小写）: 每秒日志数}
+        """
+        if self.throttle is None:
+            return
+        rates = {f'{LOGGER_NAME}.{name}': rate for name, rate in (plugin_rates or {}).items()}
+        self.throttle.configure(dedup, rate, burst, rates, report_interval)
+
+    def get_logger(self, name):
+        """获取插件的 logger（app_logger.<插件名>）
+        Args:
+            name: 插件名，或插件内的模块名（如 __name__ = 'plugins.demo.worker'）
+        """
+        if name.startswith('plugins.'):
+            name = name.split('.')[1]
+        return logging.getLogger(f'{LOGGER_NAME}.{name}')
+
+    def set_plugin_level(self, plugin_name, level=None):
+        """单独设置插件的日志级别，level 为 None 时跟随全局级别
+
+        设置后该插件低于 level 的日志在调用处直接返回，达到 level 的日志会输出到所有输出端。
+        """
+        plugin_logger = self.get_logger(plugin_name)
+        if level is None:
+            plugin_logger.setLevel(logging.NOTSET)
+            self.plugin_levels.pop(plugin_logger.name, None)
+        else:
+            plugin_logger.setLevel(_level_value(level))
+            self.plugin_levels[plugin_logger.name] = plugin_logger.level
+
+    def plugin_level(self, plugin_name):
+        """插件单独设置的日志级别名（小写），未设置返回 None"""
+        level = self.plugin_levels.get(f'{LOGGER_NAME}.{plugin_name}')
+        return logging.getLevelName(level).lower() if level is not None else None
         
     @property
     def logger(self):
@@ -90,5 +338,12 @@ class LoggerManager:
             self._logger = self.setup()
         return self._logger
 
+def _level_value(level):
+    """'debug' / 'info' 等级别名转换为数值"""
+    if isinstance(level, int):
+        return level
+    value = getattr(logging, str(level).upper(), logging.INFO)
+    return value if isinstance(value, int) else logging.INFO
+
 # 全局单例
-logger_manager = LoggerManager() 
\ No newline at end of file
+logger_manager = LoggerManager()
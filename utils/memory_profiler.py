@@ -0,0 +1,151 @@
+# 插件内存统计
+# tracemalloc 按插件目录统计 Python 内存，进程 RSS 差值记录插件加载、创建、卸载前后的变化
+import gc
+import os
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+if sys.platform == 'win32':
+    import ctypes
+    from ctypes import wintypes
+
+    class _ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    _GetCurrentProcess = ctypes.windll.kernel32.GetCurrentProcess
+    _GetCurrentProcess.restype = wintypes.HANDLE
+    _GetProcessMemoryInfo = ctypes.windll.psapi.GetProcessMemoryInfo
+    _GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(_ProcessMemoryCounters), wintypes.DWORD]
+
+
+def process_rss():
+    """当前进程常驻内存（字节），无法获取时返回 0"""
+    try:
+        if sys.platform == 'win32':
+            counters = _ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            if _GetProcessMemoryInfo(_GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return 0
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        return 0
+
+
+def format_size(size):
+    """格式化字节数，保留符号"""
+    sign = '-' if size < 0 else ''
+    size = abs(size)
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{sign}{size:.0f} {unit}" if unit == 'B' else f"{sign}{size:.1f} {unit}"
+        size /= 1024
+    return f"{sign}{size:.1f} GB"
+
+
+def _plugin_filters(plugin_path):
+    """匹配插件目录（package）或插件文件（pyd）的 tracemalloc 过滤器"""
+    return [tracemalloc.Filter(True, os.path.join(plugin_path, '*')),
+            tracemalloc.Filter(True, plugin_path + '.*')]
+
+
+class PluginMemoryTracker:
+    """插件内存统计
+
+    rss 记录每个插件 load / construct / unload 阶段的 RSS 差值，
+    多个插件在后台并发加载时 load 阶段的差值会相互影响，只作参考。
+    Python 内存需要 tracemalloc，可在启动时开启，或在泄漏检测时按需开启。
+    """
+    def __init__(self):
+        self.rss = {}  # {插件名: {阶段: RSS 差值}}
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start(self, frames=1):
+        """开启 tracemalloc"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def record(self, plugin_name, stage, delta):
+        with self._lock:
+            self.rss.setdefault(plugin_name, {})[stage] = delta
+
+    @contextmanager
+    def measure(self, plugin_name, stage):
+        """记录一段代码前后的 RSS 差值"""
+        before = process_rss()
+        try:
+            yield
+        finally:
+            self.record(plugin_name, stage, process_rss() - before)
+
+    def python_usage(self, plugin_paths):
+        """按插件统计 tracemalloc 跟踪到的 Python 内存
+        Args:
+            plugin_paths: {插件名: 插件路径（去掉 .pyd 后缀）}
+        Returns:
+            dict: {插件名: 字节数}，未开启 tracemalloc 时返回空字典
+        """
+        if not tracemalloc.is_tracing():
+            return {}
+        usage = {name: 0 for name in plugin_paths}
+        prefixes = [(os.path.normcase(path), name) for name, path in plugin_paths.items()]
+        for stat in tracemalloc.take_snapshot().statistics('filename'):
+            filename = os.path.normcase(stat.traceback[0].filename)
+            for prefix, name in prefixes:
+                if filename.startswith(prefix + os.sep) or filename.startswith(prefix + '.'):
+                    usage[name] += stat.size
+                    break
+        return usage
+
+    def leak_check(self, plugin_path, cycle, cycles=3, limit=10):
+        """比较若干次开关插件前后的内存分配
+        Args:
+            plugin_path: 插件路径（去掉 .pyd 后缀）
+            cycle: 执行一次开关插件的函数
+            cycles: 循环次数
+            limit: 返回的条目数
+        Returns:
+            tuple: (增长总字节数, [(位置, 增长字节数, 增长次数)])
+        """
+        # 检测结束后关闭按需开启的 tracemalloc，之后的分配不再有跟踪开销
+        was_tracing = self.tracing
+        self.start()
+        try:
+            filters = _plugin_filters(plugin_path)
+            # 先执行一次，排除首次加载时的缓存
+            cycle()
+            gc.collect()
+            before = tracemalloc.take_snapshot().filter_traces(filters)
+            for _ in range(cycles):
+                cycle()
+            gc.collect()
+            after = tracemalloc.take_snapshot().filter_traces(filters)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        diffs = [diff for diff in after.compare_to(before, 'lineno') if diff.size_diff > 0]
+        total = sum(diff.size_diff for diff in diffs)
+        top = [(str(diff.traceback[0]), diff.size_diff, diff.count_diff) for diff in diffs[:limit]]
+        return total, top
+
+
+# 全局单例
+memory_tracker = PluginMemoryTracker()
@@ -0,0 +1,152 @@
+# 插件清单索引
+# 缓存每个插件的元信息、别名和 QWidget 类名，避免启动时导入全部插件
+import hashlib
+import json
+import os
+import threading
+
+from constants.config import PLUGIN_INDEX_FILE
+
+INDEX_VERSION = 1
+
+
+def _iter_plugin_files(path):
+    """遍历插件包含的文件，返回排序后的 (相对路径, 绝对路径) 列表"""
+    if os.path.isfile(path):
+        return [(os.path.basename(path), path)]
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        for name in names:
+            if name.endswith(('.pyc', '.pyo')):
+                continue
+            full_path = os.path.join(root, name)
+            files.append((os.path.relpath(full_path, path).replace(os.sep, '/'), full_path))
+    files.sort()
+    return files
+
+
+def _stat_fingerprint(path):
+    """计算插件的 mtime 和大小，文件夹插件取最大 mtime 与总大小"""
+    mtime = 0
+    size = 0
+    for _, full_path in _iter_plugin_files(path):
+        st = os.stat(full_path)
+        mtime = max(mtime, st.st_mtime_ns)
+        size += st.st_size
+    return mtime, size
+
+
+def _content_hash(path):
+    """计算插件内容哈希"""
+    sha1 = hashlib.sha1()
+    for rel_path, full_path in _iter_plugin_files(path):
+        sha1.update(rel_path.encode('utf-8'))
+        with open(full_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+class PluginIndex:
+    """插件清单索引
+
+    以插件名为键，保存 kind、path、mtime、size、hash、info、alias、widgets。
+    mtime 和大小一致时直接命中；不一致时再比较哈希，内容未变则刷新指纹后命中。
+    """
+    def __init__(self, index_file=PLUGIN_INDEX_FILE):
+        self.index_file = index_file
+        self.entries = {}
+        self._dirty = False
+        self._lock = threading.RLock()  # 后台加载插件时可能并发更新
+        self.load()
+
+    def load(self):
+        """读取索引文件，格式不对时丢弃"""
+        self.entries = {}
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                self.entries = data.get('plugins', {})
+        except Exception as e:
+            print(f"读取插件索引失败: {str(e)}")
+
+    def save(self):
+        """有改动时写入索引文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.index_file) or '.', exist_ok=True)
+            tmp_file = f"{self.index_file}.tmp"
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump({'version': INDEX_VERSION, 'plugins': self.entries}, f,
+                              ensure_ascii=False, indent=2, default=str)
+                os.replace(tmp_file, self.index_file)
+                self._dirty = False
+            except Exception as e:
+                print(f"保存插件索引失败: {str(e)}")
+
+    def lookup(self, name, kind, path):
+        """查找仍然有效的索引项
+        Args:
+            name: 插件名（文件夹名或 pyd 文件名）
+            kind: 'package' 或 'pyd'
+            path: 插件路径
+        Returns:
+            dict: 有效的索引项，失效或不存在时返回 None
+        """
+        entry = self.entries.get(name)
+        if not entry or entry.get('kind') != kind:
+            return None
+        try:
+            mtime, size = _stat_fingerprint(path)
+            if entry.get('mtime') == mtime and entry.get('size') == size:
+                return entry
+            # 指纹变化但内容可能没变（如复制、touch），比较哈希
+            if entry.get('hash') != _content_hash(path):
+                return None
+        except OSError:
+            return None
+        entry['mtime'] = mtime
+        entry['size'] = size
+        self._dirty = True
+        return entry
+
+    def update(self, name, kind, path, info, alias, widgets):
+        """导入插件后更新索引项"""
+        try:
+            mtime, size = _stat_fingerprint(path)
+            content_hash = _content_hash(path)
+        except OSError as e:
+            print(f"计算插件 {name} 指纹失败: {str(e)}")
+            return None
+        entry = {
+            'kind': kind,
+            'path': os.path.basename(path),
+            'mtime': mtime,
+            'size': size,
+            'hash': content_hash,
+            'info': info,
+            'alias': alias,
+            'widgets': list(widgets),
+        }
+        with self._lock:
+            self.entries[name] = entry
+            self._dirty = True
+        return entry
+
+    def remove(self, name):
+        with self._lock:
+            if self.entries.pop(name, None) is not None:
+                self._dirty = True
+
+    def prune(self, names):
+        """删除已不存在的插件"""
+        with self._lock:
+            for name in list(self.entries):
+                if name not in names:
+                    self.remove(name)
@@ -0,0 +1,116 @@
+# 插件注册表
+# 以插件（文件夹名 / pyd 名）为单位登记，提供别名、控件类、插件信息的 O(1) 索引
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class PluginRecord:
+    """插件记录"""
+    name: str  # 插件名（文件夹名或 pyd 文件名）
+    kind: str  # 'package' 或 'pyd'
+    path: str  # 插件在 plugins 目录下的文件名
+    alias: str  # 插件别名
+    info: dict  # PLUGIN_INFO
+    widgets: List[str]  # QWidget 类名
+    row: int  # 稳定行号，插件删除后不复用
+    classes: Dict[str, type] = field(default_factory=dict)  # 已导入的 QWidget 类
+
+
+class PluginRegistry:
+    """插件注册表
+
+    索引：
+        alias -> 插件名
+        控件类名 -> 插件名
+        插件名 -> PluginRecord（含 info、widgets、classes）
+    generation 在插件登记、变更、删除时递增，使用方可据此判断缓存是否失效。
+    """
+    def __init__(self):
+        self._records: Dict[str, PluginRecord] = {}
+        self._by_alias: Dict[str, str] = {}
+        self._by_widget: Dict[str, str] = {}
+        self._next_row = 0
+        self._rows_cache = None
+        self.generation = 0
+        self._lock = threading.RLock()  # 后台加载插件时可能并发登记
+
+    def register(self, name, kind, path, alias, info, widgets) -> PluginRecord:
+        """登记或更新插件，已登记的插件保留原行号和已导入的类"""
+        with self._lock:
+            record = self._records.get(name)
+            if record is None:
+                record = PluginRecord(name, kind, path, alias, info, list(widgets), self._next_row)
+                self._next_row += 1
+                self._records[name] = record
+            else:
+                self._unindex(record)
+                record.kind, record.path, record.alias, record.info = kind, path, alias, info
+                record.widgets = list(widgets)
+                record.classes = {k: v for k, v in record.classes.items() if k in record.widgets}
+            self._by_alias[alias] = name
+            for class_name in record.widgets:
+                self._by_widget[class_name] = name
+            self._changed()
+            return record
+
+    def set_classes(self, name, classes: Dict[str, type]):
+        """记录插件导入后的 QWidget 类"""
+        with self._lock:
+            record = self._records.get(name)
+            if record is not None:
+                record.classes = dict(classes)
+
+    def remove(self, name):
+        with self._lock:
+            record = self._records.pop(name, None)
+            if record is not None:
+                self._unindex(record)
+                self._changed()
+
+    def _unindex(self, record):
+        if self._by_alias.get(record.alias) == record.name:
+            del self._by_alias[record.alias]
+        for class_name in record.widgets:
+            if self._by_widget.get(class_name) == record.name:
+                del self._by_widget[class_name]
+
+    def _changed(self):
+        self.generation += 1
+        self._rows_cache = None
+
+    def get(self, name) -> Optional[PluginRecord]:
+        return self._records.get(name)
+
+    def by_alias(self, alias) -> Optional[PluginRecord]:
+        name = self._by_alias.get(alias)
+        return self._records.get(name) if name else None
+
+    def by_widget(self, class_name) -> Optional[PluginRecord]:
+        name = self._by_widget.get(class_name)
+        return self._records.get(name) if name else None
+
+    def widget_class(self, class_name) -> Optional[type]:
+        record = self.by_widget(class_name)
+        return record.classes.get(class_name) if record else None
+
+    def widget_names(self) -> List[str]:
+        """所有插件的 QWidget 类名，按插件行号排序"""
+        return [class_name for record in self.rows() for class_name in record.widgets]
+
+    def rows(self) -> List[PluginRecord]:
+        """按行号排序的插件列表，同一 generation 内复用"""
+        with self._lock:
+            if self._rows_cache is None:
+                self._rows_cache = sorted(self._records.values(), key=lambda record: record.row)
+            return self._rows_cache
+
+    def names(self) -> List[str]:
+        return [record.name for record in self.rows()]
+
+    def __contains__(self, name):
+        return name in self._records
+
+    def __len__(self):
+        return len(self._records)
@@ -0,0 +1,230 @@
+# 进程工作线程
+# 插件的 CPU 密集任务在子进程（或共享进程池）中运行，不占用 GUI 进程的 GIL
+# 进度、日志和结果通过管道传回，由 QThread 转发为 Qt 信号
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from PySide2.QtCore import QThread, Signal
+
+from constants.config import PROCESS_CANCEL_GRACE, PROCESS_POOL_WORKERS
+from utils.logger_manager import logger_manager
+
+_POLL_INTERVAL = 0.05  # 等待子进程消息的间隔（秒）
+
+
+def _spawn_context():
+    """获取 spawn 方式的多进程上下文，避免 fork 复制 Qt 状态"""
+    ctx = multiprocessing.get_context('spawn')
+    # 打包后 sys.executable 是启动器，子进程需要使用 runtime 中的 python.exe
+    if not os.path.basename(sys.executable).lower().startswith('python'):
+        runtime_python = os.path.join('runtime', 'python.exe')
+        if os.path.exists(runtime_python):
+            ctx.set_executable(runtime_python)
+    return ctx
+
+
+class _PipeChannel:
+    """把管道连接包装成与队列相同的 put 接口"""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def put(self, msg):
+        self.conn.send(msg)
+
+
+class ProcessContext:
+    """传给子进程任务函数的上下文"""
+    def __init__(self, channel, cancel_event):
+        self._channel = channel
+        self._cancel_event = cancel_event
+
+    def progress(self, msg):
+        """发送进度，对应 progress 信号"""
+        self._channel.put(('progress', msg))
+
+    def log(self, level, msg):
+        """发送日志，由主进程写入 app_logger"""
+        self._channel.put(('log', level, msg))
+
+    def debug(self, msg):
+        self.log(logging.DEBUG, msg)
+
+    def info(self, msg):
+        self.log(logging.INFO, msg)
+
+    def warning(self, msg):
+        self.log(logging.WARNING, msg)
+
+    def error(self, msg):
+        self.log(logging.ERROR, msg)
+
+    def is_cancelled(self):
+        """是否已请求取消，任务应定期检查并尽快返回"""
+        return self._cancel_event.is_set()
+
+
+def _run_job(job, args, kwargs, channel, cancel_event):
+    """子进程入口"""
+    ctx = ProcessContext(channel, cancel_event)
+    try:
+        channel.put(('result', job(ctx, *args, **kwargs)))
+    except BaseException:
+        channel.put(('error', traceback.format_exc()))
+    finally:
+        channel.put(('done',))
+
+
+_pool = None
+_manager = None
+_pool_lock = threading.Lock()
+
+
+def shared_process_pool():
+    """获取共享进程池及其 Manager（用于跨进程队列和事件）"""
+    global _pool, _manager
+    with _pool_lock:
+        if _pool is None:
+            ctx = _spawn_context()
+            _manager = ctx.Manager()
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS, mp_context=ctx)
+        return _pool, _manager
+
+
+def shutdown_process_pool():
+    """关闭共享进程池，程序退出时调用"""
+    global _pool, _manager
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _manager.shutdown()
+            _pool = None
+            _manager = None
+
+
+class ProcessWorker(QThread):
+    """进程工作线程基类
+
+    子类实现静态方法 job(ctx, *args, **kwargs)，它在子进程中运行，必须能被 pickle
+    （定义在模块顶层的类中）。信号有 progress、finished，
+    另外提供 result 和 error。stop() 请求取消，独立进程超过宽限时间未退出会被终止。
+
+    use_pool = True 时任务提交到共享进程池，多个插件共用 CPU 核心，只支持协作式取消。
+    """
+    finished = Signal()  # 任务结束（完成、失败或取消）
+    progress = Signal(str)  # 进度信息
+    result = Signal(object)  # 任务返回值
+    error = Signal(str)  # 子进程中的异常堆栈
+
+    use_pool = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.args = args
+        self.kwargs = kwargs
+        module = self.__class__.__module__
+        # 插件中的任务使用插件自己的 logger
+        self.logger = logger_manager.get_logger(module) if module.startswith('plugins.') else logger_manager.logger
+        self._cancel_event = None
+        self._cancel_time = None
+
+    @staticmethod
+    def job(ctx, *args, **kwargs):
+        raise NotImplementedError
+
+    def run(self):
+        self._cancel_time = None
+        try:
+            if self.use_pool:
+                self._run_in_pool()
+            else:
+                self._run_in_process()
+        except Exception as e:
+            self.logger.error(f"进程任务 {self.__class__.__name__} 失败: {e}")
+            self.error.emit(traceback.format_exc())
+        self.finished.emit()
+
+    def stop(self):
+        """请求取消任务"""
+        self._cancel_time = time.monotonic()
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+
+    def _run_in_process(self):
+        ctx = _spawn_context()
+        reader, writer = ctx.Pipe(duplex=False)
+        self._cancel_event = ctx.Event()
+        if self._cancel_time is not None:
+            self._cancel_event.set()
+        process = ctx.Process(target=_run_job,
+                              args=(type(self).job, self.args, self.kwargs, _PipeChannel(writer), self._cancel_event),
+                              daemon=True)
+        process.start()
+        writer.close()
+        done = False
+        try:
+            while True:
+                if reader.poll(_POLL_INTERVAL):
+                    try:
+                        if self._dispatch(reader.recv()):
+                            done = True
+                            break
+                    except EOFError:
+                        break
+                elif not process.is_alive():
+                    break
+                if self._cancel_time is not None and time.monotonic() - self._cancel_time > PROCESS_CANCEL_GRACE:
+                    self.logger.warning(f"进程任务 {self.__class__.__name__} 未响应取消，强制结束")
+                    process.terminate()
+                    break
+        finally:
+            process.join(PROCESS_CANCEL_GRACE)
+            reader.close()
+        if not done and self._cancel_time is None:
+            # 子进程没有发出结束消息就退出（崩溃、被系统结束等）
+            message = f"子进程意外退出，退出码 {process.exitcode}"
+            self.logger.error(f"进程任务 {self.__class__.__name__} 失败: {message}")
+            self.error.emit(message)
+
+    def _run_in_pool(self):
+        pool, manager = shared_process_pool()
+        channel = manager.Queue()
+        self._cancel_event = manager.Event()
+        if self._cancel_time is not None:
+            self._cancel_event.set()
+        future = pool.submit(_run_job, type(self).job, self.args, self.kwargs, channel, self._cancel_event)
+        while True:
+            try:
+                msg = channel.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if self._cancel_time is not None and future.cancel():
+                    # 还在排队的任务直接取消
+                    break
+                if future.done():
+                    future.result()  # 进程池异常（如子进程崩溃）在这里抛出
+                    break
+                continue
+            if self._dispatch(msg):
+                break
+
+    def _dispatch(self, msg):
+        """转发子进程消息，收到 done 返回 True"""
+        kind = msg[0]
+        if kind == 'progress':
+            self.progress.emit(msg[1])
+        elif kind == 'log':
+            self.logger.log(msg[1], msg[2])
+        elif kind == 'result':
+            self.result.emit(msg[1])
+        elif kind == 'error':
+            self.logger.error(f"进程任务 {self.__class__.__name__} 失败:\n{msg[1]}")
+            self.error.emit(msg[1])
+        elif kind == 'done':
+            return True
+        return False
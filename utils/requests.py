@@ -1,18 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from constants.config import (HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB,
+                              HTTP_CACHE_OFFLINE_TTL, HTTP_CACHE_TTL,
+                              HTTP_POOL_HOSTS, HTTP_POOL_PER_HOST)
 from utils.logger_manager import logger_manager
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """共享的 keep-alive 会话，复用 TCP/TLS 连接
+
+    每个主机最多 HTTP_POOL_PER_HOST 个连接，并发请求超出时等待空闲连接。
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_PER_HOST, pool_block=True)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+class HttpCache:
+    """HTTP 响应的磁盘缓存，每个 URL 一个 JSON 文件
+
+    保存响应内容和 ETag / Last-Modified，过期后带条件请求确认，内容没变时服务器只返回 304。
+    文件修改时间即最近使用时间（读取和写入时更新），总大小超出上限时删除最久未使用的。
+    各文件的大小在第一次写入时扫描一次，之后随写入更新，不再每次扫描目录。
+    """
+    def __init__(self, directory=HTTP_CACHE_DIR, ttl=HTTP_CACHE_TTL, offline_ttl=HTTP_CACHE_OFFLINE_TTL,
+                 max_mb=HTTP_CACHE_MAX_MB):
+        self.directory = directory
+        self.ttl = ttl
+        self.offline_ttl = offline_ttl
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self._sizes = None  # {路径: 大小}
+        self._total = 0
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, url):
+        """缓存的条目，没有时返回 None
+        Returns:
+            dict: url, etag, last_modified, checked（上次确认的时间）, body
+        """
+        path = self._path(url)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('url') != url:
+            return None
+        try:
+            # 记录最近使用时间
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, url, entry):
+        """写入条目（同时作为最近使用），之后按大小清理"""
+        entry = dict(entry, url=url)
+        path = self._path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            if self._sizes is None:
+                self._scan()
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+            self._total += size - self._sizes.get(path, 0)
+            self._sizes[path] = size
+            if 0 < self.max_bytes < self._total:
+                self._evict()
+
+    def _scan(self):
+        self._sizes = {}
+        with os.scandir(self.directory) as entries:
+            for item in entries:
+                if item.name.endswith('.json'):
+                    self._sizes[item.path] = item.stat().st_size
+        self._total = sum(self._sizes.values())
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0
+
+    def _evict(self):
+        """按最近使用时间从旧到新删除，直到总大小不超过上限"""
+        for path in sorted(self._sizes, key=self._mtime):
+            if self._total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            self._total -= self._sizes.pop(path)
+
+    def clear(self):
+        with self._lock:
+            self._sizes = None
+            self._total = 0
+            if not os.path.isdir(self.directory):
+                return
+            for name in os.listdir(self.directory):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+# 全局单例
+http_cache = HttpCache()
+
 
 def download_file(url, file_path):
-    response = requests.get(url)
+    response = get_session().get(url)
     with open(file_path, 'wb') as file:
         file.write(response.content)
 
 
-def get_json(url, **kwargs):
+def get_json(url, use_cache=False, **kwargs):
+    """请求 JSON，失败时返回空字典
+    Args:
+        use_cache: 使用 http_cache（用于插件更新信息等很少变化的数据）
+    """
     try:
         if len(url) == 0:
             return {}
-        response = requests.get(url, **kwargs)
+        if use_cache:
+            return _get_json_cached(url, **kwargs)
+        response = get_session().get(url, **kwargs)
         if response.status_code == 200:
             return response.json()
         else:
@@ -21,3 +160,43 @@ def get_json(url, **kwargs):
     except Exception as e:
         logger_manager.logger.error(f"获取JSON数据时发生错误: {e}")
         return {}
+
+
+def _get_json_cached(url, headers=None, **kwargs):
+    entry = http_cache.get(url)
+    now = time.time()
+    if entry is not None and now - entry['checked'] < http_cache.ttl:
+        return json.loads(entry['body'])
+
+    headers = dict(headers or {})
+    if entry is not None:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    try:
+        response = get_session().get(url, headers=headers, **kwargs)
+    except requests.RequestException as e:
+        if entry is not None and now - entry['checked'] < http_cache.offline_ttl:
+            logger_manager.logger.warning(f"无法连接 {url}，使用缓存: {e}")
+            return json.loads(entry['body'])
+        raise
+
+    if response.status_code == 304 and entry is not None:
+        # 内容没有变化，只更新确认时间
+        entry['checked'] = now
+        http_cache.put(url, entry)
+        return json.loads(entry['body'])
+    if response.status_code == 200:
+        data = response.json()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified or http_cache.ttl > 0:
+            http_cache.put(url, {'etag': etag, 'last_modified': last_modified, 'checked': now,
+                                 'body': response.text})
+        return data
+    if entry is not None and now - entry['checked'] < http_cache.offline_ttl:
+        logger_manager.logger.warning(f"获取 {url} 失败 ({response.status_code})，使用缓存")
+        return json.loads(entry['body'])
+    logger_manager.logger.error(f"获取JSON数据时发生错误: {response.status_code}")
+    return {}
@@ -0,0 +1,156 @@
+# 信号合并器
+# 工作线程高频发出的更新先写入合并器，GUI 线程每帧（默认 16 ms）最多刷新一次
+# latest 模式只保留最新值，batch 模式把一帧内的值合并成列表
+import threading
+import weakref
+
+import shiboken2
+from PySide2.QtCore import QObject, Qt, QTimer, Signal
+
+from constants.config import COALESCE_INTERVAL
+from utils.logger_manager import logger_manager
+
+_coalescers = weakref.WeakSet()
+
+
+class CoalescedSlot:
+    """合并后的槽，可以直接在任意线程调用，或以 Qt.DirectConnection 连接到信号"""
+    def __init__(self, coalescer, slot, mode):
+        self.coalescer = coalescer
+        self.slot = slot
+        self.mode = mode  # 'latest' 或 'batch'
+        self.received = 0  # 收到的更新数
+        self.delivered = 0  # 实际调用槽的次数
+        self.dropped = 0  # latest 模式下被新值覆盖的更新数
+        self.merged = 0  # batch 模式下合并进同一次调用的更新数
+        self._pending = []
+        self._has_pending = False
+
+    def __call__(self, *args):
+        value = args[0] if len(args) == 1 else args
+        coalescer = self.coalescer
+        with coalescer._lock:
+            self.received += 1
+            if self.mode == 'batch':
+                if self._has_pending:
+                    self.merged += 1
+                self._pending.append(value)
+            else:
+                if self._has_pending:
+                    self.dropped += 1
+                self._pending = [value]
+            self._has_pending = True
+            wake = not coalescer._scheduled
+            coalescer._scheduled = True
+        if wake and shiboken2.isValid(coalescer):
+            # 每帧只唤醒一次 GUI 线程，由它启动刷新定时器
+            coalescer._wake.emit()
+
+    def _take(self):
+        """取出待刷新的值，调用方持有锁"""
+        if not self._has_pending:
+            return False, None
+        pending = self._pending
+        self._pending = []
+        self._has_pending = False
+        return True, (pending if self.mode == 'batch' else pending[0])
+
+
+class SignalCoalescer(QObject):
+    """信号合并器
+
+    示例:
+        self.coalescer = SignalCoalescer(self)
+        worker.progress.connect(self.coalescer.latest(self.update_progress), Qt.DirectConnection)
+    使用 DirectConnection 时每帧只有第一个更新向 Qt 事件队列投递一次唤醒，由单次定时器按帧刷新；
+    没有更新时定时器不运行。
+    """
+    _wake = Signal()
+
+    def __init__(self, parent=None, interval_ms=COALESCE_INTERVAL):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._slots = []
+        self._scheduled = False  # 已有待刷新的更新，刷新前不再唤醒
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._arm, Qt.QueuedConnection)
+        _coalescers.add(self)
+
+    def _arm(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def latest(self, slot):
+        """每帧只把最新值传给 slot"""
+        return self._bind(slot, 'latest')
+
+    def batch(self, slot):
+        """每帧把收到的所有值作为列表传给 slot"""
+        return self._bind(slot, 'batch')
+
+    def _bind(self, slot, mode):
+        coalesced = CoalescedSlot(self, slot, mode)
+        with self._lock:
+            self._slots.append(coalesced)
+        return coalesced
+
+    def flush(self):
+        """在 GUI 线程中调用有更新的槽
+
+        槽所属的 QObject 已被删除时移除该槽；槽抛出的其他异常写入日志，
+        其余的槽照常调用后再抛出第一个异常。
+        """
+        with self._lock:
+            self._scheduled = False
+            ready = []
+            for coalesced in self._slots:
+                has_value, value = coalesced._take()
+                if has_value:
+                    coalesced.delivered += 1
+                    ready.append((coalesced, value))
+        error = None
+        for coalesced, value in ready:
+            receiver = getattr(coalesced.slot, '__self__', None)
+            if isinstance(receiver, QObject) and not shiboken2.isValid(receiver):
+                # 目标控件已被删除
+                with self._lock:
+                    if coalesced in self._slots:
+                        self._slots.remove(coalesced)
+                continue
+            try:
+                coalesced.slot(value)
+            except Exception as e:
+                logger_manager.logger.error(f"合并的槽 {_slot_name(coalesced.slot)} 异常: {e!r}")
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+
+    def stats(self):
+        """各槽的计数"""
+        with self._lock:
+            return [{
+                'slot': _slot_name(coalesced.slot),
+                'mode': coalesced.mode,
+                'received': coalesced.received,
+                'delivered': coalesced.delivered,
+                'dropped': coalesced.dropped,
+                'merged': coalesced.merged,
+            } for coalesced in self._slots]
+
+
+def _slot_name(slot):
+    return getattr(slot, '__qualname__', repr(slot))
+
+
+def coalescer_stats():
+    """所有合并器的汇总计数"""
+    total = {'received': 0, 'delivered': 0, 'dropped': 0, 'merged': 0}
+    for coalescer in list(_coalescers):
+        for item in coalescer.stats():
+            for key in total:
+                total[key] += item[key]
+    return total
@@ -0,0 +1,212 @@
+# 任务调度器
+# 基于 QThreadPool 的全局任务调度：限制并发、支持优先级、协作式取消和进度信号
+# 插件用 task_scheduler.submit() 代替自己创建 QThread
+import itertools
+import logging
+import threading
+import traceback
+
+from PySide2.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from constants.config import TASK_SCHEDULER_WORKERS
+from utils.logger_manager import logger_manager
+
+
+class TaskPriority:
+    """任务优先级，数值越大越先执行"""
+    LOW = 0
+    NORMAL = 5
+    HIGH = 10
+
+
+class TaskState:
+    QUEUED = '排队中'
+    RUNNING = '运行中'
+    FINISHED = '已完成'
+    FAILED = '失败'
+    CANCELLED = '已取消'
+
+
+class CancelToken:
+    """取消令牌，任务函数定期检查 is_cancelled()"""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """等待取消，用于代替 time.sleep()，取消时立即返回
+        Returns:
+            bool: 是否已取消
+        """
+        return self._event.wait(timeout)
+
+
+class TaskContext:
+    """传给任务函数的上下文，接口与 ProcessContext 一致"""
+    def __init__(self, task):
+        self._task = task
+        self.token = task.token
+
+    def progress(self, msg):
+        self._task.progress_text = str(msg)
+        self._task.signals.progress.emit(str(msg))
+
+    def log(self, level, msg):
+        logger = logger_manager.get_logger(self._task.owner) if self._task.owner else logger_manager.logger
+        logger.log(level, msg)
+
+    def debug(self, msg):
+        self.log(logging.DEBUG, msg)
+
+    def info(self, msg):
+        self.log(logging.INFO, msg)
+
+    def warning(self, msg):
+        self.log(logging.WARNING, msg)
+
+    def error(self, msg):
+        self.log(logging.ERROR, msg)
+
+    def is_cancelled(self):
+        return self.token.is_cancelled()
+
+
+class TaskSignals(QObject):
+    progress = Signal(str)  # 进度信息
+    finished = Signal(object)  # 任务返回值
+    failed = Signal(str)  # 异常堆栈
+    cancelled = Signal()
+    state_changed = Signal(int, str)  # 任务ID, 状态
+
+
+class Task(QRunnable):
+    """调度器中的一个任务"""
+    def __init__(self, task_id, name, fn, args, kwargs, priority, owner):
+        super().__init__()
+        self.setAutoDelete(False)  # 由调度器持有引用
+        self.task_id = task_id
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.owner = owner
+        self.state = TaskState.QUEUED
+        self.progress_text = ''
+        self.token = CancelToken()
+        self.signals = TaskSignals()
+
+    def _set_state(self, state):
+        self.state = state
+        self.signals.state_changed.emit(self.task_id, state)
+
+    def run(self):
+        if self.token.is_cancelled():
+            self._set_state(TaskState.CANCELLED)
+            self.signals.cancelled.emit()
+            return
+        self._set_state(TaskState.RUNNING)
+        try:
+            result = self.fn(TaskContext(self), *self.args, **self.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+            logger_manager.logger.error(f"任务 {self.name} 失败:\n{error}")
+            self._set_state(TaskState.FAILED)
+            self.signals.failed.emit(error)
+            return
+        if self.token.is_cancelled():
+            self._set_state(TaskState.CANCELLED)
+            self.signals.cancelled.emit()
+        else:
+            self._set_state(TaskState.FINISHED)
+            self.signals.finished.emit(result)
+
+
+class TaskScheduler(QObject):
+    """全局任务调度器
+
+    tasks 只保存排队中和运行中的任务，结束后移除。
+    """
+    task_added = Signal(int)
+    task_changed = Signal(int)
+    task_removed = Signal(int)
+
+    def __init__(self, max_workers=TASK_SCHEDULER_WORKERS):
+        super().__init__()
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(max_workers)
+        self._ids = itertools.count(1)
+        self.tasks = {}
+
+    def submit(self, fn, *args, name=None, priority=TaskPriority.NORMAL, owner='',
+               on_progress=None, on_finished=None, on_failed=None, **kwargs):
+        """提交任务
+        Args:
+            fn: 任务函数 fn(ctx, *args, **kwargs)，在线程池中运行
+            name: 显示在任务面板中的名称
+            priority: TaskPriority 中的优先级
+            owner: 所属插件名，插件卸载时取消其全部任务
+            on_progress / on_finished / on_failed: 在任务开始前连接的回调
+        Returns:
+            Task: 可连接 task.signals，调用 cancel(task.task_id) 取消
+        """
+        task = Task(next(self._ids), name or getattr(fn, '__name__', '任务'), fn, args, kwargs, priority, owner)
+        if on_progress:
+            task.signals.progress.connect(on_progress)
+        if on_finished:
+            task.signals.finished.connect(on_finished)
+        if on_failed:
+            task.signals.failed.connect(on_failed)
+        task.signals.progress.connect(lambda _, task_id=task.task_id: self.task_changed.emit(task_id))
+        task.signals.state_changed.connect(self._on_state_changed)
+        self.tasks[task.task_id] = task
+        self.task_added.emit(task.task_id)
+        self._pool.start(task, priority)
+        return task
+
+    def cancel(self, task_id):
+        """取消任务，排队中的任务直接移出队列，运行中的任务由任务函数检查令牌后退出"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return
+        task.token.cancel()
+        if task.state == TaskState.QUEUED and self._pool.tryTake(task):
+            task.state = TaskState.CANCELLED
+            task.signals.cancelled.emit()
+            self._remove(task_id)
+
+    def cancel_owner(self, owner):
+        """取消某个插件的全部任务"""
+        for task in list(self.tasks.values()):
+            if task.owner == owner:
+                self.cancel(task.task_id)
+
+    def active_tasks(self):
+        """排队中和运行中的任务，按状态和优先级排序"""
+        return sorted(self.tasks.values(),
+                      key=lambda task: (task.state != TaskState.RUNNING, -task.priority, task.task_id))
+
+    def shutdown(self, wait_ms=3000):
+        """取消所有任务并等待运行中的任务结束，程序退出时调用"""
+        for task_id in list(self.tasks):
+            self.cancel(task_id)
+        self._pool.waitForDone(wait_ms)
+
+    def _on_state_changed(self, task_id, state):
+        if state in (TaskState.FINISHED, TaskState.FAILED, TaskState.CANCELLED):
+            self._remove(task_id)
+        elif task_id in self.tasks:
+            self.task_changed.emit(task_id)
+
+    def _remove(self, task_id):
+        if self.tasks.pop(task_id, None) is not None:
+            self.task_removed.emit(task_id)
+
+
+# 全局单例
+task_scheduler = TaskScheduler()
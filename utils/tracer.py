@@ -0,0 +1,110 @@
+# 启动耗时追踪
+# 记录启动各阶段耗时，输出 Chrome trace-event 格式，可用 chrome://tracing 或 Perfetto 打开
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from constants.config import STARTUP_TRACE_FILE
+
+
+class StartupTracer:
+    """启动追踪器
+
+    span() 只记录开始和结束时间，事件数量有上限，启动完成后 finish() 写出文件并停止记录，
+    生产环境可以一直开启。
+    """
+    MAX_EVENTS = 10000
+
+    def __init__(self):
+        self.enabled = True
+        self.events = []  # (名称, 类别, 开始, 结束, 线程ID, 参数)
+        self.thread_names = {}
+        self.trace_file = ''
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name, cat='startup', **args):
+        """记录一段耗时
+        Args:
+            name: 阶段名称
+            cat: 类别，如 import、construct
+            args: 附加信息，写入 trace 的 args
+        """
+        if not self.enabled or len(self.events) >= self.MAX_EVENTS:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            tid = threading.get_ident()
+            if tid not in self.thread_names:
+                self.thread_names[tid] = threading.current_thread().name
+            self.events.append((name, cat, start, end, tid, args or None))
+
+    def slowest(self, limit=None):
+        """按耗时倒序返回各阶段
+        Returns:
+            list: [{'name', 'cat', 'duration_ms', 'thread', 'args'}]
+        """
+        stages = [{
+            'name': name,
+            'cat': cat,
+            'duration_ms': (end - start) * 1000,
+            'thread': self.thread_names.get(tid, str(tid)),
+            'args': args or {},
+        } for name, cat, start, end, tid, args in list(self.events)]
+        stages.sort(key=lambda stage: stage['duration_ms'], reverse=True)
+        return stages[:limit] if limit else stages
+
+    def total_ms(self):
+        """从追踪器创建到最后一个阶段结束的耗时"""
+        if not self.events:
+            return 0.0
+        return (max(event[3] for event in list(self.events)) - self._origin) * 1000
+
+    def to_chrome_trace(self):
+        """转换为 Chrome trace-event 格式"""
+        pid = os.getpid()
+        trace_events = [{
+            'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+            'args': {'name': thread_name},
+        } for tid, thread_name in self.thread_names.items()]
+        for name, cat, start, end, tid, args in list(self.events):
+            event = {
+                'name': name,
+                'cat': cat,
+                'ph': 'X',
+                'ts': round((start - self._origin) * 1e6, 3),
+                'dur': round((end - start) * 1e6, 3),
+                'pid': pid,
+                'tid': tid,
+            }
+            if args:
+                event['args'] = args
+            trace_events.append(event)
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, trace_file=STARTUP_TRACE_FILE):
+        """写出 trace 文件"""
+        try:
+            os.makedirs(os.path.dirname(trace_file) or '.', exist_ok=True)
+            with open(trace_file, 'w', encoding='utf-8') as f:
+                json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)
+            self.trace_file = trace_file
+        except Exception as e:
+            print(f"写入启动追踪文件失败: {str(e)}")
+
+    def finish(self):
+        """启动完成，写出 trace 文件并停止记录"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.dump()
+
+
+# 全局单例
+tracer = StartupTracer()